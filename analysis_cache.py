@@ -0,0 +1,98 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+def analysis_key(symbols, settings):
+    """Cache key for a run: the symbol set plus the analyzer settings"""
+    return tuple(sorted(set(symbols))), tuple(sorted(settings.items()))
+
+class AnalysisResultCache:
+    """Process-wide TTL + LRU cache of analysis results, shared by every dashboard session
+
+    Concurrent requests for the same key run the analysis once; the other callers
+    wait for it and share the result.
+    """
+
+    def __init__(self, ttl_seconds=6 * 3600, max_entries=16):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (created_at, results)
+        self._pending = {}  # key -> Event set when the in-flight computation finishes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """(results, created_at) for a live entry, None if missing or expired"""
+        with self._lock:
+            return self._get_locked(key)
+
+    def _get_locked(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1], entry[0]
+
+    def put(self, key, results):
+        with self._lock:
+            self._put_locked(key, results)
+
+    def _put_locked(self, key, results):
+        self._entries[key] = (time.time(), results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            logger.info(f"Evicted cached analysis for {len(evicted[0])} symbols")
+
+    def get_or_compute(self, key, compute, refresh=False):
+        """Return (results, created_at, cache_hit), running compute() at most once per key at a time"""
+        while True:
+            with self._lock:
+                if not refresh:
+                    cached = self._get_locked(key)
+                    if cached is not None:
+                        self.hits += 1
+                        return cached[0], cached[1], True
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # Another session is computing this key - wait and read its result
+            pending.wait()
+            refresh = False
+
+        try:
+            results = compute()
+            with self._lock:
+                self._put_locked(key, results)
+                created_at = self._entries[key][0]
+            return results, created_at, False
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def invalidate(self, key=None):
+        """Drop one entry, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'in_flight': len(self._pending),
+            }
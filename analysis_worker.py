@@ -0,0 +1,225 @@
+import time
+import queue
+import logging
+import threading
+from collections import namedtuple
+from analysis_cache import AnalysisResultCache, analysis_key
+from results_table import ResultsTable
+
+logger = logging.getLogger(__name__)
+
+# One published analysis run; treat results and inputs as read-only, they are shared by every reader.
+# inputs are the analyzer's kept inputs for the run (see StockAnalyzer.adopt_inputs), profile its
+# stage timing summary when profile_runs was on.
+AnalysisSnapshot = namedtuple(
+    'AnalysisSnapshot',
+    ['universe', 'symbols', 'settings', 'results', 'started_at', 'completed_at', 'inputs', 'profile'],
+    defaults=(None, None)
+)
+
+class AnalysisWorker:
+    """Long-lived background thread that owns a StockAnalyzer and publishes result snapshots
+
+    Universes (named symbol loaders) are analyzed once at start, then every
+    refresh_interval seconds, and on request(). Runs are serialized on the worker
+    thread so concurrent users never multiply upstream load; readers only look up
+    the latest published snapshot. Snapshots are kept in an AnalysisResultCache
+    (the shared one when given, else a private one), so they expire and are
+    evicted like any cached run. With a RunHistoryStore every published run is
+    also recorded there.
+    """
+
+    def __init__(self, analyzer_factory, cache=None, refresh_interval=3600, history=None):
+        self.analyzer_factory = analyzer_factory
+        self.cache = cache if cache is not None else AnalysisResultCache()
+        self.history = history
+        self.refresh_interval = refresh_interval
+        self._universes = {}  # name -> symbol loader
+        self._next_due = {}  # name -> monotonic time of the next scheduled run
+        self._latest = {}  # universe name -> latest AnalysisSnapshot with its default settings
+        self._jobs = queue.Queue()
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.analyzer = None
+        self.current_job = None
+        self.progress = None  # (analyzed, total) for the current run
+        self._current_key = None  # analysis_key of the run in progress
+        self._partial = {}  # symbol -> result of the run in progress
+        self.profile_runs = False  # record stage timings into each snapshot
+        self.last_error = None
+
+    def add_universe(self, name, load_symbols, run_now=True):
+        """Register a named symbol loader; it is analyzed with the default settings on schedule"""
+        with self._lock:
+            self._universes[name] = load_symbols
+            self._next_due[name] = time.monotonic() if run_now else time.monotonic() + self.refresh_interval
+        self._jobs.put(None)  # wake the loop to recompute its timeout
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="analysis-worker", daemon=True)
+        self._thread.start()
+        logger.info("Analysis worker started")
+
+    def stop(self, timeout=None):
+        """Stop after the current run finishes"""
+        self._stop.set()
+        self._jobs.put(None)
+        if self._thread:
+            self._thread.join(timeout)
+        logger.info("Analysis worker stopped")
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def request(self, universe, settings=None, symbols=None):
+        """Queue an on-demand run of a universe, optionally with other analyzer settings
+
+        symbols runs that list under the universe name instead of its loader (e.g.
+        an uploaded list, which need not be registered). Returns False if the same
+        run is already queued.
+        """
+        job = (universe, tuple(sorted(settings.items())) if settings else None, tuple(symbols) if symbols else None)
+        with self._lock:
+            if symbols is None and universe not in self._universes:
+                raise KeyError(f"Unknown universe: {universe}")
+            if job in self._queued:
+                return False
+            self._queued.add(job)
+        self._jobs.put(job)
+        return True
+
+    def snapshot(self, universe):
+        """Latest snapshot of a universe analyzed with the default settings, None before the first run"""
+        return self._latest.get(universe)
+
+    def snapshot_for(self, symbols, settings):
+        """Latest snapshot for exactly these symbols and settings, None if not run or expired from the cache"""
+        cached = self.cache.get(analysis_key(symbols, settings))
+        return cached[0] if cached is not None else None
+
+    def live_results(self, symbols, settings):
+        """Results so far of the run in progress for exactly these symbols and settings, None if it is not running"""
+        with self._lock:
+            if self._current_key is None or self._current_key != analysis_key(symbols, settings):
+                return None
+            return list(self._partial.values())
+
+    def status(self):
+        with self._lock:
+            due_in = {name: max(0.0, due - time.monotonic()) for name, due in self._next_due.items()}
+            return {
+                'running': self.is_running(),
+                'current_job': self.current_job,
+                'progress': self.progress,
+                'queued': len(self._queued),
+                'next_run_in': due_in if self.refresh_interval else {},
+                'snapshots': {name: snapshot.completed_at for name, snapshot in self._latest.items()},
+                'last_error': self.last_error,
+            }
+
+    def _run(self):
+        self.analyzer = self.analyzer_factory()
+        # Snapshots carry the run's inputs so sessions can re-score them
+        self.analyzer.keep_inputs = True
+        self.default_settings = self.analyzer.settings()
+        while not self._stop.is_set():
+            try:
+                job = self._jobs.get(timeout=self._seconds_until_due())
+            except queue.Empty:
+                job = None
+            if self._stop.is_set():
+                break
+
+            if job is not None:
+                universe, settings, symbols = job
+                with self._lock:
+                    # Busy before leaving the queue, so status() never shows the run as neither
+                    self.current_job = universe
+                    self._queued.discard(job)
+                self._analyze(universe, dict(settings) if settings else None, symbols)
+
+            for universe in self._due_universes():
+                self._analyze(universe, None)
+
+    def _seconds_until_due(self):
+        with self._lock:
+            if not self._next_due:
+                return None
+            return max(0.0, min(self._next_due.values()) - time.monotonic())
+
+    def _due_universes(self):
+        now = time.monotonic()
+        with self._lock:
+            due = [name for name, when in self._next_due.items() if when <= now]
+            for name in due:
+                if self.refresh_interval:
+                    self._next_due[name] = now + self.refresh_interval
+                else:
+                    del self._next_due[name]
+            return due
+
+    def _analyze(self, universe, settings, symbols=None):
+        """Run one universe (or the symbols requested under its name) on the worker's analyzer and publish the snapshot"""
+        settings = settings or self.default_settings
+        self.current_job = universe
+        started_at = time.time()
+        try:
+            symbols = list(symbols) if symbols else self._universes[universe]()
+            if not symbols:
+                logger.warning(f"Universe {universe} has no symbols")
+                return
+
+            self.analyzer.apply_settings(settings)
+            self.analyzer.profiler.enabled = self.profile_runs
+            with self._lock:
+                self._current_key = analysis_key(symbols, settings)
+                self._partial = {}
+
+            def compute():
+                results = self._compute(symbols)
+                profile = self.analyzer.profiler.summary() if self.profile_runs else None
+                return AnalysisSnapshot(
+                    universe, tuple(symbols), dict(settings), results, started_at, time.time(),
+                    self.analyzer.last_inputs, profile
+                )
+
+            snapshot, _, _ = self.cache.get_or_compute(analysis_key(symbols, settings), compute, refresh=True)
+            if settings == self.default_settings and universe in self._universes:
+                with self._lock:
+                    self._latest[universe] = snapshot
+            if self.history is not None:
+                self.history.record_run(
+                    snapshot.results, universe, settings, run_at=snapshot.completed_at,
+                    duration=snapshot.completed_at - started_at
+                )
+            self.last_error = None
+            logger.info(f"Published {universe} snapshot: {len(snapshot.results)} results in {snapshot.completed_at - started_at:.1f}s")
+
+        except Exception as e:
+            self.last_error = f"{universe}: {str(e)}"
+            logger.error(f"Background analysis of {universe} failed: {str(e)}")
+        finally:
+            self.current_job = None
+            self.progress = None
+            with self._lock:
+                self._current_key = None
+                self._partial = {}
+
+    def _compute(self, symbols):
+        """analyze_stocks(symbols, as_table=True), run through iter_analyze so status() and live_results() follow it"""
+        results = self._partial
+        total = len(symbols)
+        self.progress = (0, total)
+        for done, (symbol, result) in enumerate(self.analyzer.iter_analyze(symbols), 1):
+            if result:
+                with self._lock:
+                    results[symbol] = result
+            self.progress = (done, total)
+        return ResultsTable.from_results(
+            (results[symbol] for symbol in dict.fromkeys(symbols) if symbol in results), self.analyzer.last_run_id
+        )
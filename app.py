@@ -5,10 +5,14 @@ import plotly.graph_objects as go
 from datetime import datetime
 import time
 import os
+import math
 import logging
 from dotenv import load_dotenv
 from stock_analyzer import StockAnalyzer
 from sms_service import SMSService
+from analysis_cache import AnalysisResultCache, analysis_key
+from analysis_worker import AnalysisWorker
+from run_history import RunHistoryStore
 
 # Load environment variables first
 load_dotenv()
@@ -104,6 +108,136 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_analysis_cache():
+    """Analysis result cache shared by every session in this server process"""
+    return AnalysisResultCache(
+        ttl_seconds=int(os.getenv('ANALYSIS_CACHE_TTL', 6 * 3600)),
+        max_entries=int(os.getenv('ANALYSIS_CACHE_SIZE', 16))
+    )
+
+@st.cache_resource
+def get_run_history():
+    """SQLite history of every analysis run, shared by every session"""
+    return RunHistoryStore(os.getenv('RUN_HISTORY_DB', '.cache/run_history.sqlite3'))
+
+@st.cache_resource
+def get_analysis_worker():
+    """Background analyzer shared by every session; refreshes both stock lists on a schedule"""
+    worker = AnalysisWorker(
+        StockAnalyzer,
+        cache=get_analysis_cache(),
+        refresh_interval=int(os.getenv('ANALYSIS_REFRESH_MINUTES', 60)) * 60,
+        history=get_run_history()
+    )
+    worker.add_universe('default', lambda: read_symbol_file('input.txt'))
+    worker.add_universe('mutual_funds', lambda: read_symbol_file('top-mutual-fund-stocks.txt'))
+    worker.start()
+    return worker
+
+RECOMMENDATION_ORDER = ['STRONG_BUY', 'BUY', 'WEAK_BUY', 'HOLD', 'WEAK_SELL', 'SELL', 'STRONG_SELL']
+
+def request_analysis(universe, symbols, settings, label, refresh=False):
+    """Serve symbols from the shared cache, or queue them on the background worker
+    
+    Returns True when shared results were loaded; otherwise the run is pending and
+    show_pending_analysis() adopts the worker's snapshot once it is published.
+    """
+    if not refresh:
+        cached = get_analysis_cache().get(analysis_key(symbols, settings))
+        if cached is not None:
+            adopt_results(cached[0])
+            st.session_state.analysis_message = (
+                f"⚡ Loaded shared results from {datetime.fromtimestamp(cached[1]).strftime('%H:%M')}"
+            )
+            return True
+    
+    get_analysis_worker().request(universe, settings, symbols)
+    st.session_state.pending_analysis = {
+        'universe': universe, 'symbols': list(symbols), 'settings': settings, 'label': label,
+        'requested_at': time.time()
+    }
+    return False
+
+def adopt_results(snapshot, background=False):
+    """Show a worker snapshot; its kept inputs let the session analyzer re-score it for new settings
+    
+    background=True marks a scheduled refresh, which a newer one may replace.
+    """
+    st.session_state.last_analysis_results = snapshot.results
+    st.session_state.results_settings = snapshot.settings
+    st.session_state.results_profile = snapshot.profile
+    st.session_state.snapshot_completed_at = snapshot.completed_at if background else None
+    if snapshot.inputs is not None:
+        st.session_state.analyzer.adopt_inputs(snapshot.results.run_id, snapshot.inputs)
+
+@st.fragment(run_every=1)
+def show_pending_analysis():
+    """Worker progress for this session's queued run; reruns the page once its snapshot is published"""
+    pending = st.session_state.get('pending_analysis')
+    if not pending:
+        return
+    
+    worker = get_analysis_worker()
+    # Status first: a run that ends between the two reads has already published its snapshot
+    status = worker.status()
+    snapshot = worker.snapshot_for(pending['symbols'], pending['settings'])
+    if snapshot and snapshot.completed_at >= pending['requested_at']:
+        st.session_state.pending_analysis = None
+        adopt_results(snapshot)
+        st.session_state.analysis_message = (
+            f"✅ {pending['label']} analysis completed in {snapshot.completed_at - snapshot.started_at:.1f} seconds"
+        )
+        st.rerun()
+    
+    if status['current_job'] is None and not status['queued']:
+        # The worker finished without publishing this run
+        st.session_state.pending_analysis = None
+        st.error(f"{pending['label']} analysis failed: {status['last_error'] or 'no results'}")
+        return
+    
+    live = worker.live_results(pending['symbols'], pending['settings'])
+    if live is not None and status['progress']:
+        done, total = status['progress']
+        st.progress(done / total if total else 0, text=f"{pending['label']}: {done}/{total} stocks analyzed, {len(live)} succeeded")
+        display_live_results(st.empty(), live)
+    else:
+        st.progress(0, text=f"{pending['label']}: queued behind {status['current_job'] or 'another run'}")
+
+def display_live_results(live_area, results):
+    """Running recommendation counts and per-category tables while an analysis is in progress"""
+    with live_area.container():
+        counts = {rec: 0 for rec in RECOMMENDATION_ORDER}
+        for result in results:
+            counts[result['recommendation']] = counts.get(result['recommendation'], 0) + 1
+        
+        tabs = st.tabs([f"{rec.replace('_', ' ')} ({counts[rec]})" for rec in RECOMMENDATION_ORDER])
+        for tab, rec in zip(tabs, RECOMMENDATION_ORDER):
+            with tab:
+                rows = [
+                    {
+                        'Symbol': result['symbol'].replace('.NS', ''),
+                        'Price': result['current_price'],
+                        'Target': result['target_price'],
+                        'Score': result['overall_score'],
+                        'Confidence': result['confidence']
+                    }
+                    for result in results if result['recommendation'] == rec
+                ]
+                if rows:
+                    live_frame = pd.DataFrame(rows).sort_values('Score', ascending=False)
+                    st.dataframe(live_frame, hide_index=True, use_container_width=True)
+                else:
+                    st.caption("None yet")
+
+def read_symbol_file(path):
+    """Symbols from a one-per-line file, [] if it does not exist"""
+    try:
+        with open(path, 'r') as f:
+            return [line.strip() for line in f.readlines() if line.strip()]
+    except FileNotFoundError:
+        return []
+
 def load_stock_symbols():
     """Load stock symbols from input.txt (one per line)"""
     try:
@@ -240,8 +374,8 @@ def display_stock_card(stock):
     with col5:
         st.metric("Confidence", f"{stock['confidence']:.0f}%")
         
-    # Expandable details
-    with st.expander(f"📊 Details - {symbol_clean}"):
+    # Details are built only when requested instead of for every card on every rerun
+    if st.checkbox(f"📊 Details - {symbol_clean}", key=f"details_{stock['symbol']}"):
         col1, col2 = st.columns(2)
         
         with col1:
@@ -278,12 +412,96 @@ def display_stock_card(stock):
     
     st.divider()
 
+def select_page(total_items, page_size, key):
+    """Page picker for a list of total_items - returns the (start, stop) slice of the chosen page"""
+    pages = max(1, math.ceil(total_items / page_size))
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=key)
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total_items)
+
+def display_results_table(stocks):
+    """Compact one-widget view of a ResultsTable"""
+    frame = stocks.frame
+    table = pd.DataFrame({
+        'Symbol': frame['symbol'].str.replace('.NS', '', regex=False),
+        'Price': frame['current_price'],
+        'Target': frame['target_price'],
+        'Return %': frame['potential_return'],
+        'Score': frame['overall_score'],
+        'Confidence %': frame['confidence'],
+        'Divergence': frame['divergence_signal'].astype(str),
+        'Chart': "https://www.tradingview.com/chart/?symbol=NSE%3A" + frame['symbol'].str.replace('.NS', '', regex=False)
+    })
+    st.dataframe(
+        table, hide_index=True, use_container_width=True,
+        column_config={'Chart': st.column_config.LinkColumn("Chart", display_text="TradingView")}
+    )
+
+def display_run_history():
+    """Look up past signals for a symbol or a recommendation without re-analysis"""
+    history = get_run_history()
+    col1, col2 = st.columns(2)
+    with col1:
+        symbol = st.text_input("Symbol history", placeholder="RELIANCE.NS")
+        if symbol:
+            symbol = symbol.strip().upper()
+            rows = history.symbol_history(symbol if '.' in symbol else f"{symbol}.NS", limit=100)
+            if len(rows):
+                st.dataframe(
+                    rows[['run_at', 'recommendation', 'divergence_signal', 'current_price', 'overall_score', 'confidence']],
+                    hide_index=True, use_container_width=True
+                )
+            else:
+                st.caption("No recorded runs for this symbol")
+    with col2:
+        recommendation = st.selectbox("Recommendation", RECOMMENDATION_ORDER)
+        days = st.number_input("Within the last N days", value=7, min_value=1, max_value=365)
+        rows = history.with_recommendation(recommendation, since=time.time() - days * 86400)
+        if len(rows):
+            # Latest call per symbol within the window
+            rows = rows.drop_duplicates('symbol')
+            st.dataframe(
+                rows[['symbol', 'run_at', 'current_price', 'target_price', 'overall_score', 'divergence_signal']],
+                hide_index=True, use_container_width=True
+            )
+        else:
+            st.caption(f"No {recommendation.replace('_', ' ')} calls recorded in this window")
+
+def display_stage_timings(summary):
+    """Per-stage p50/p95/max and slowest symbols from the last run's profile"""
+    if not summary['stages']:
+        st.caption("Run an analysis to record stage timings")
+        return
+    
+    st.caption(f"Last run: {summary['wall_seconds']:.1f}s wall")
+    stage_rows = [
+        {
+            'Stage': name,
+            'Count': stats['count'],
+            'Total (s)': round(stats['total'], 2),
+            'p50 (ms)': round(stats['p50'] * 1000, 1),
+            'p95 (ms)': round(stats['p95'] * 1000, 1),
+            'Max (ms)': round(stats['max'] * 1000, 1)
+        }
+        for name, stats in summary['stages'].items()
+    ]
+    st.dataframe(pd.DataFrame(stage_rows), hide_index=True, use_container_width=True)
+    
+    if summary['slowest_symbols']:
+        st.write("**Slowest symbols:**")
+        for entry in summary['slowest_symbols']:
+            slowest_stage = max(entry['stages'], key=entry['stages'].get)
+            st.text(f"{entry['symbol'].replace('.NS', '')}: {entry['seconds'] * 1000:.0f}ms ({slowest_stage})")
+
 def main():
     # Header
     st.markdown('<h1 class="main-header">📈 Indian Stock Market Analyzer</h1>', unsafe_allow_html=True)
     
     # Initialize session state
     if 'analyzer' not in st.session_state:
+        # This session's settings; it re-scores adopted worker snapshots, runs happen on the worker
         st.session_state.analyzer = StockAnalyzer()
     if 'sms_service' not in st.session_state:
         st.session_state.sms_service = SMSService()
@@ -339,6 +557,52 @@ def main():
         st.session_state.analyzer.knox_rsi_period = knox_rsi_period
         st.session_state.analyzer.knox_momentum_period = knox_momentum_period
         
+        # What-if weights - re-classify the shown results without changing the analyzer
+        st.subheader("⚖️ What-if Weights")
+        analyzer = st.session_state.analyzer
+        raw_weights = (
+            st.slider("Divergence", 0.0, 1.0, analyzer.divergence_weight, 0.05, key='what_if_divergence'),
+            st.slider("Fundamental", 0.0, 1.0, analyzer.fundamental_weight, 0.05, key='what_if_fundamental'),
+            st.slider("Technical", 0.0, 1.0, analyzer.technical_weight, 0.05, key='what_if_technical'),
+        )
+        # Score thresholds assume the weights sum to 1
+        weight_total = sum(raw_weights)
+        what_if_weights = tuple(weight / weight_total for weight in raw_weights) if weight_total else None
+        if what_if_weights:
+            st.caption("Normalized: " + " / ".join(f"{weight:.0%}" for weight in what_if_weights))
+        else:
+            st.caption("Set at least one weight above zero")
+        
+        # Stage timings
+        st.subheader("⏱️ Performance")
+        worker = get_analysis_worker()
+        worker.profile_runs = st.checkbox(
+            "Record stage timings", value=worker.profile_runs,
+            help="Time fetch, cleaning, indicators, divergence, fundamentals and scoring for each background run"
+        )
+        if st.session_state.get('results_profile'):
+            display_stage_timings(st.session_state.results_profile)
+        
+        force_refresh = st.checkbox(
+            "Bypass shared result cache",
+            help="Re-run the analysis even if another session already analyzed these stocks with the same settings"
+        )
+        cache_stats = get_analysis_cache().stats()
+        st.caption(f"Shared cache: {cache_stats['entries']} runs, {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+        
+        worker_status = worker.status()
+        if worker_status['current_job']:
+            st.caption(f"🛰️ Background worker: analyzing {worker_status['current_job']}")
+        else:
+            st.caption(f"🛰️ Background worker: {'idle' if worker_status['running'] else 'stopped'}, {worker_status['queued']} queued")
+        if worker_status['last_error']:
+            st.caption(f"⚠️ Last background run failed - {worker_status['last_error']}")
+        if st.button("🔄 Refresh in background", help="Re-analyze the default stocks with these settings without blocking this page"):
+            if worker.request('default', st.session_state.analyzer.settings()):
+                st.success("Background refresh queued")
+            else:
+                st.info("A refresh is already queued")
+        
         # SMS/WhatsApp Controls
         st.subheader("📱 SMS/WhatsApp Alerts")
         
@@ -360,8 +624,9 @@ def main():
         with col1:
             if st.button("🔔 Start Alerts"):
                 if st.session_state.last_analysis_results:
+                    # Sends the dashboard's latest results - nothing to pre-warm or time
                     st.session_state.sms_service.start_scheduler(
-                        lambda: st.session_state.last_analysis_results
+                        lambda: st.session_state.last_analysis_results, prewarm=False
                     )
                     st.success("Alerts started!")
                 else:
@@ -426,8 +691,34 @@ def main():
                 st.error("⚠️ Twilio credentials not loaded properly!")
                 st.info("Make sure your .env file is in the project root directory.")
     
+    # Knox settings changed since the results were computed - re-score from the kept inputs, no refetch
+    settings = st.session_state.analyzer.settings()
+    rescore_message = None
+    results_settings = st.session_state.get('results_settings')
+    if st.session_state.last_analysis_results is not None and results_settings not in (None, settings):
+        started = time.time()
+        rescored = st.session_state.analyzer.reanalyze_table(st.session_state.last_analysis_results)
+        if rescored is not None:
+            st.session_state.last_analysis_results = rescored
+            st.session_state.results_settings = settings
+            rescore_message = f"⚡ Re-scored {len(rescored)} stocks with the new settings in {(time.time() - started) * 1000:.0f} ms"
+    
+    # Pick up the background worker's latest snapshot unless this session ran its own analysis
+    snapshot = get_analysis_worker().snapshot_for(symbols, settings)
+    showing_snapshot = st.session_state.get('snapshot_completed_at')
+    if snapshot and (st.session_state.last_analysis_results is None or
+                     st.session_state.get('results_settings') != settings or
+                     (showing_snapshot and snapshot.completed_at > showing_snapshot)):
+        adopt_results(snapshot, background=True)
+    
     # Main content
     st.header("🔍 Stock Analysis")
+    if st.session_state.get('snapshot_completed_at'):
+        st.caption(f"🛰️ Showing background analysis from {datetime.fromtimestamp(st.session_state.snapshot_completed_at).strftime('%H:%M')}")
+    if rescore_message:
+        st.caption(rescore_message)
+    elif st.session_state.last_analysis_results is not None and st.session_state.get('results_settings') != settings:
+        st.info("⚙️ Settings changed since these shared results were computed - run the analysis again to apply them")
     
     # Add Strategy Explanation
     with st.expander("📚 **Understanding Recommendation Categories & Knox Divergence Logic**", expanded=False):
@@ -527,7 +818,7 @@ def main():
         - Alignment with institutional support levels
         """)
     
-    # Analysis buttons
+    # Analysis buttons - runs go to the background worker so this session never computes them
     col1, col2 = st.columns(2)
     
     with col1:
@@ -536,22 +827,8 @@ def main():
                 st.error("Please provide stock symbols to analyze")
                 return
             
-            with st.spinner(f"Analyzing {len(symbols)} default stocks... This may take a few minutes."):
-                progress_bar = st.progress(0)
-                start_time = time.time()
-                
-                try:
-                    results = st.session_state.analyzer.analyze_stocks(symbols)
-                    st.session_state.last_analysis_results = results
-                    
-                    progress_bar.progress(100)
-                    end_time = time.time()
-                    
-                    st.success(f"✅ Analysis completed in {end_time - start_time:.1f} seconds")
-                    
-                except Exception as e:
-                    st.error(f"Analysis failed: {str(e)}")
-                    return
+            universe = 'custom' if upload_file or manual_stocks else 'default'
+            request_analysis(universe, symbols, settings, f"{len(symbols)} stocks", refresh=force_refresh)
     
     with col2:
         if st.button("📊 Analyze Small Cap MF Stocks", type="secondary"):
@@ -561,47 +838,49 @@ def main():
                 return
             
             st.info(f"📈 Analyzing {len(mutual_fund_symbols)} small cap mutual fund stocks from top-mutual-fund-stocks.txt")
-            
-            with st.spinner(f"Analyzing {len(mutual_fund_symbols)} mutual fund stocks... This may take a few minutes."):
-                progress_bar = st.progress(0)
-                start_time = time.time()
-                
-                try:
-                    results = st.session_state.analyzer.analyze_stocks(mutual_fund_symbols)
-                    st.session_state.last_analysis_results = results
-                    
-                    progress_bar.progress(100)
-                    end_time = time.time()
-                    
-                    st.success(f"✅ Mutual fund stocks analysis completed in {end_time - start_time:.1f} seconds")
-                    st.info(f"📊 Analyzed stocks: {', '.join([s.replace('.NS', '') for s in mutual_fund_symbols[:10]])}{'...' if len(mutual_fund_symbols) > 10 else ''}")
-                    
-                except Exception as e:
-                    st.error(f"Mutual fund analysis failed: {str(e)}")
-                    return
+            st.info(f"📊 Analyzed stocks: {', '.join([s.replace('.NS', '') for s in mutual_fund_symbols[:10]])}{'...' if len(mutual_fund_symbols) > 10 else ''}")
+            request_analysis(
+                'mutual_funds', mutual_fund_symbols, settings, f"{len(mutual_fund_symbols)} mutual fund stocks",
+                refresh=force_refresh
+            )
+    
+    show_pending_analysis()
+    if st.session_state.get('analysis_message'):
+        st.success(st.session_state.pop('analysis_message'))
     
     # Display results
     if st.session_state.last_analysis_results:
         results = st.session_state.last_analysis_results
         
+        base_weights = (analyzer.divergence_weight, analyzer.fundamental_weight, analyzer.technical_weight)
+        if what_if_weights and not all(math.isclose(what_if, base) for what_if, base in zip(what_if_weights, base_weights)):
+            started = time.time()
+            results = analyzer.reweight_table(results, *what_if_weights)
+            st.caption(
+                f"⚖️ What-if weights {' / '.join(f'{weight:.0%}' for weight in what_if_weights)} applied to "
+                f"{len(results)} stocks in {(time.time() - started) * 1000:.0f} ms - stored results and alerts are unchanged"
+            )
+        
         # Summary metrics
         st.header("📊 Summary")
         
+        recommendation_counts = results.recommendation_counts()
+        
         col1, col2, col3, col4 = st.columns(4)
         with col1:
             total_stocks = len(results)
             st.metric("Total Analyzed", total_stocks)
         
         with col2:
-            actionable = len([r for r in results if r['recommendation'] in ['STRONG_BUY', 'BUY', 'WEAK_BUY', 'WEAK_SELL', 'SELL', 'STRONG_SELL']])
+            actionable = total_stocks - recommendation_counts.get('HOLD', 0)
             st.metric("Actionable", actionable)
         
         with col3:
-            avg_score = sum(r['overall_score'] for r in results) / len(results) if results else 0
+            avg_score = results.frame['overall_score'].mean() if total_stocks else 0
             st.metric("Avg Score", f"{avg_score:.1f}")
         
         with col4:
-            strong_buys = len([r for r in results if r['recommendation'] == 'STRONG_BUY'])
+            strong_buys = recommendation_counts.get('STRONG_BUY', 0)
             st.metric("Strong Buys", strong_buys)
         
         # Stock Analysis Results (Categorized)
@@ -627,6 +906,13 @@ def main():
             
             st.info("📍 **Key Rule:** Buy recommendations only when price is below the 200-period Envelope SMA")
         
+        # Only one page of cards is rendered per tab so reruns stay fast for large universes
+        col_view1, col_view2 = st.columns([1, 3])
+        with col_view1:
+            view_mode = st.radio("View:", ["Cards", "Table"], key="results_view", horizontal=True)
+        with col_view2:
+            page_size = st.selectbox("Cards per page:", [10, 25, 50], key="page_size", disabled=(view_mode == "Table"))
+        
         # Create tabs for different categories
         tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs(["🚀 STRONG BUY", "📈 BUY", "📊 WEAK BUY", "⏸️ HOLD", "📉 WEAK SELL", "🔻 SELL", "💥 STRONG SELL"])
         
@@ -636,9 +922,9 @@ def main():
         
         for tab, rec in zip(tabs, recommendations):
             with tab:
-                stocks_in_category = [stock for stock in results if stock['recommendation'] == rec]
+                stocks_in_category = results.with_recommendation(rec)
                 
-                if stocks_in_category:
+                if len(stocks_in_category):
                     st.write(f"**{len(stocks_in_category)} stocks** with {rec.replace('_', ' ')} recommendation")
                     
                     # Sorting controls
@@ -658,18 +944,25 @@ def main():
                         )
                     
                     # Apply sorting
-                    if sort_by == "Score":
-                        stocks_in_category.sort(key=lambda x: x['overall_score'], reverse=(sort_order == "High to Low"))
-                    elif sort_by == "Symbol":
-                        stocks_in_category.sort(key=lambda x: x['symbol'].replace('.NS', ''), reverse=(sort_order == "High to Low"))
-                    elif sort_by == "Price":
-                        stocks_in_category.sort(key=lambda x: x['current_price'], reverse=(sort_order == "High to Low"))
-                    elif sort_by == "Target":
-                        stocks_in_category.sort(key=lambda x: x['target_price'], reverse=(sort_order == "High to Low"))
-                    elif sort_by == "Confidence":
-                        stocks_in_category.sort(key=lambda x: x['confidence'], reverse=(sort_order == "High to Low"))
-                    elif sort_by == "Return %":
-                        stocks_in_category.sort(key=lambda x: x['potential_return'], reverse=(sort_order == "High to Low"))
+                    sort_columns = {
+                        "Score": 'overall_score',
+                        "Symbol": 'symbol',
+                        "Price": 'current_price',
+                        "Target": 'target_price',
+                        "Confidence": 'confidence',
+                        "Return %": 'potential_return'
+                    }
+                    stocks_in_category = stocks_in_category.sort(
+                        sort_columns[sort_by], ascending=(sort_order == "Low to High")
+                    )
+                    
+                    if view_mode == "Table":
+                        display_results_table(stocks_in_category)
+                        continue
+                    
+                    start, stop = select_page(len(stocks_in_category), page_size, key=f"page_{rec}")
+                    if stop - start < len(stocks_in_category):
+                        st.caption(f"Showing {start + 1}-{stop} of {len(stocks_in_category)}")
                     
                     # Display sortable header row with clickable columns
                     st.markdown("---")
@@ -687,7 +980,7 @@ def main():
                     
                     st.divider()
                     
-                    for stock in stocks_in_category:
+                    for stock in stocks_in_category.slice(start, stop):
                         display_stock_card(stock)
                 else:
                     st.info(f"No stocks found with {rec.replace('_', ' ')} recommendation")
@@ -708,22 +1001,7 @@ def main():
         st.header("📁 Export Results")
         
         # Create DataFrame for export
-        export_data = []
-        for stock in results:
-            export_data.append({
-                'Symbol': stock['symbol'],
-                'Recommendation': stock['recommendation'],
-                'Current Price': stock['current_price'],
-                'Target Price': stock['target_price'],
-                'Potential Return %': stock['potential_return'],
-                'Overall Score': stock['overall_score'],
-                'Confidence %': stock['confidence'],
-                'Divergence Signal': stock['divergence_signal'],
-                'Technical Score': stock['technical_score'],
-                'Fundamental Score': stock['fundamental_score']
-            })
-        
-        df = pd.DataFrame(export_data)
+        df = results.export_frame()
         
         col1, col2 = st.columns(2)
         with col1:
@@ -739,6 +1017,10 @@ def main():
             if st.button("📊 Show Data Table"):
                 st.dataframe(df, use_container_width=True)
     
+    # Run history
+    with st.expander("📜 Run History", expanded=False):
+        display_run_history()
+    
     # Footer
     st.markdown("---")
     st.markdown("**Disclaimer:** This is for educational purposes only. Please do your own research before making investment decisions.")
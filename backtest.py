@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Knox Divergence Backtest
+Replays the divergence and recommendation rules at every historical bar for a
+whole universe in vectorized passes
+
+    python backtest.py --symbols-file input.txt --period 5y     # yfinance
+    python backtest.py --data-dir .cache/benchmark/bars1250-seed42 --symbols 500
+    python backtest.py --horizon 10 --allow-short --trades trades.csv
+
+Each bar's signal uses only data up to that bar. Fundamentals are not
+point-in-time: every bar gets the neutral score (50) unless
+--current-fundamentals applies today's scores to the whole history.
+"""
+
+import os
+import time
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+from indicators import clean_volume
+from panel_indicators import compute_panel_indicators, knox_divergence, pct_change, rolling_extreme
+from scoring import technical_scores, recommendations
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+BUY_RECOMMENDATIONS = ('STRONG_BUY', 'BUY', 'WEAK_BUY')
+SELL_RECOMMENDATIONS = ('WEAK_SELL', 'SELL', 'STRONG_SELL')
+TRADING_DAYS = 252
+
+def align_by_date(histories):
+    """Stack cleaned histories into bars x symbols arrays on the union of their dates
+
+    Unlike panel_indicators.align_histories (right-aligned on each symbol's last
+    bar), rows here are calendar dates so every column shares one timeline;
+    dates a symbol did not trade are NaN.
+    """
+    symbols = list(histories)
+    panel = {'symbols': symbols}
+    for field in ('High', 'Low', 'Close', 'Volume'):
+        frame = pd.DataFrame({
+            symbol: clean_volume(hist) if field == 'Volume' else hist[field]
+            for symbol, hist in histories.items()
+        })
+        panel[field] = frame.to_numpy(dtype=float)
+        panel['dates'] = frame.index
+    panel['lengths'] = np.sum(~np.isnan(panel['Close']), axis=0)
+    return panel
+
+def symbol_layout(valid):
+    """Map a date panel's traded cells to a per-symbol layout without gaps
+
+    Returns (rows, cols, bars): traded cell (rows[i], cols[i]) of the date grid
+    is bar bars[i] of its symbol in a right-aligned bars x symbols array, the
+    layout align_histories uses. Indicators computed in that layout see each
+    symbol's own consecutive bars, so a session one symbol missed does not put
+    NaNs inside its rolling windows.
+    """
+    rows, cols = np.nonzero(valid)
+    bars = valid.shape[0] - valid.sum(axis=0)[cols] + np.cumsum(valid, axis=0)[rows, cols] - 1
+    return rows, cols, bars
+
+def to_symbol_bars(values, layout):
+    """Date-grid array -> per-symbol bar layout (see symbol_layout)"""
+    rows, cols, bars = layout
+    out = np.full(values.shape, np.nan)
+    out[bars, cols] = values[rows, cols]
+    return out
+
+def to_dates(values, layout, fill=np.nan):
+    """Per-symbol bar layout -> date-grid array; dates a symbol did not trade get fill"""
+    rows, cols, bars = layout
+    out = np.full(values.shape, fill, dtype=values.dtype if fill is None else float)
+    out[rows, cols] = values[bars, cols]
+    return out
+
+def forward_window(values, horizon, mode):
+    """Max/min over the next horizon bars (t+1 .. t+horizon), NaN past the end"""
+    out = np.full(values.shape, np.nan)
+    if horizon < values.shape[0]:
+        out[:-horizon] = rolling_extreme(values, horizon, mode)[horizon:]
+    return out
+
+def outcome_stats(trades, by):
+    """Per-group trade count, target hit rate, win rate and return statistics"""
+    grouped = trades.groupby(by, observed=True)
+    return pd.DataFrame({
+        'trades': grouped.size(),
+        'hit_rate': grouped['hit'].mean(),
+        'win_rate': grouped['return'].apply(lambda returns: (returns > 0).mean()),
+        'avg_return': grouped['return'].mean(),
+        'median_return': grouped['return'].median(),
+        'avg_adverse': grouped['adverse'].mean(),
+    }).sort_values('trades', ascending=False)
+
+class KnoxBacktester:
+    """Vectorized replay of detect_knox_divergence + calculate_recommendation over history
+
+    Every non-HOLD recommendation is a trade entered at that bar's close and
+    held for horizon bars. It is a hit when the high (buys) or low (sells)
+    reaches target_price within the horizon. The equity curve holds an
+    equal-weight portfolio of each day's buy signals (and short sells with
+    allow_short) until the next close.
+    """
+
+    def __init__(self, analyzer, horizon=20, allow_short=False):
+        self.analyzer = analyzer
+        self.horizon = horizon
+        self.allow_short = allow_short
+
+    def fetch_histories(self, symbols, period='5y'):
+        """Cleaned {symbol: history} for symbols through the analyzer's provider"""
+        analyzer = self.analyzer
+        history_period = analyzer.history_period
+        analyzer.history_period = period
+        try:
+            history = analyzer.fetch_history_batch(symbols)
+        finally:
+            analyzer.history_period = history_period
+
+        histories = {}
+        for symbol in dict.fromkeys(symbols):
+            hist = analyzer._history_slice(history, symbol)
+            if hist is not None:
+                hist = analyzer._prepare_history(symbol, hist)
+            if hist is not None:
+                histories[symbol] = hist
+        return histories
+
+    def signals(self, panel, fundamental_scores=None):
+        """Divergence and recommendation at every bar of an align_by_date panel - dict of date-grid arrays
+
+        Everything is computed on each symbol's own bars (symbol_layout) and
+        mapped back onto the dates; dates a symbol did not trade are NaN/None.
+        """
+        analyzer = self.analyzer
+        layout = symbol_layout(~np.isnan(panel['Close']))
+        bars_panel = {field: to_symbol_bars(panel[field], layout) for field in ('High', 'Low', 'Close', 'Volume')}
+        bars_panel['lengths'] = panel['lengths']
+        close = bars_panel['Close']
+        indicators = compute_panel_indicators(
+            bars_panel, analyzer.knox_rsi_period, analyzer.knox_momentum_period,
+            analyzer.envelope_length, analyzer.envelope_percent
+        )
+
+        bars_seen = np.cumsum(~np.isnan(close), axis=0)
+        divergence_signal, divergence_score = knox_divergence(
+            bars_panel['High'], bars_panel['Low'], close, indicators['knox_rsi'],
+            pct_change(close, analyzer.knox_momentum_period), bars_seen, analyzer.knox_bars_back
+        )
+
+        # Fundamentals have no history - one score per symbol for every bar
+        fundamental_scores = fundamental_scores or {}
+        fundamental = np.broadcast_to(
+            np.array([fundamental_scores.get(symbol, 50) for symbol in panel['symbols']], dtype=float), close.shape
+        )
+
+        size = close.size
+        technical = technical_scores({key: values.ravel() for key, values in indicators.items()}, size)
+        recommendation, overall_score, target_price, confidence = recommendations(
+            close.ravel(), indicators['envelope_sma'].ravel(), divergence_signal.ravel(), divergence_score.ravel(),
+            technical, fundamental.ravel(),
+            (analyzer.divergence_weight, analyzer.fundamental_weight, analyzer.technical_weight)
+        )
+        columns = {
+            'divergence_signal': to_dates(divergence_signal, layout, None),
+            'divergence_score': to_dates(divergence_score, layout),
+            'technical_score': to_dates(technical.reshape(close.shape), layout),
+            'recommendation': to_dates(recommendation.reshape(close.shape), layout, None),
+            'overall_score': to_dates(overall_score.reshape(close.shape), layout),
+            'target_price': to_dates(target_price.reshape(close.shape), layout),
+            'confidence': to_dates(confidence.reshape(close.shape), layout),
+            'bars_seen': to_dates(bars_seen, layout, 0),
+        }
+        return columns
+
+    def run(self, histories, fundamental_scores=None):
+        """Backtest {symbol: cleaned history} - returns a report dict
+
+        summary (hit rate, returns, drawdown), by_signal and by_recommendation
+        DataFrames, trades (one row per signal) and the equity Series.
+        Bars before knox_bars_back bars of history are warm-up and never trade.
+        """
+        return self.run_panel(align_by_date(histories), fundamental_scores)
+
+    def run_panel(self, panel, fundamental_scores=None):
+        """run() on an already aligned panel, e.g. one shared by a parameter sweep"""
+        started = time.perf_counter()
+        columns = self.signals(panel, fundamental_scores)
+        close, high, low = panel['Close'], panel['High'], panel['Low']
+        recommendation = columns['recommendation']
+
+        direction = np.where(
+            np.isin(recommendation, BUY_RECOMMENDATIONS), 1,
+            np.where(np.isin(recommendation, SELL_RECOMMENDATIONS), -1, 0)
+        )
+        direction[(columns['bars_seen'] < self.analyzer.knox_bars_back) | np.isnan(close)] = 0
+
+        # Per-trade outcomes over the next horizon bars of the symbol itself
+        horizon = self.horizon
+        layout = symbol_layout(~np.isnan(close))
+        bars_close = to_symbol_bars(close, layout)
+        exit_price = np.full(close.shape, np.nan)
+        if horizon < close.shape[0]:
+            exit_price[:-horizon] = bars_close[horizon:]
+        exit_price = to_dates(exit_price, layout)
+        future_high = to_dates(forward_window(to_symbol_bars(high, layout), horizon, 'max'), layout)
+        future_low = to_dates(forward_window(to_symbol_bars(low, layout), horizon, 'min'), layout)
+        target = columns['target_price']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            trade_return = direction * (exit_price / close - 1)
+            hit = np.where(direction > 0, future_high >= target, future_low <= target)
+            adverse = np.where(direction > 0, future_low / close - 1, 1 - future_high / close)
+        traded = (direction != 0) & ~np.isnan(exit_price)
+
+        rows, cols = np.nonzero(traded)
+        trades = pd.DataFrame({
+            'date': panel['dates'][rows],
+            'symbol': np.asarray(panel['symbols'], dtype=object)[cols],
+            'recommendation': pd.Categorical(recommendation[rows, cols]),
+            'divergence_signal': pd.Categorical(columns['divergence_signal'][rows, cols]),
+            'entry_price': close[rows, cols],
+            'target_price': target[rows, cols],
+            'exit_price': exit_price[rows, cols],
+            'return': trade_return[rows, cols],
+            'hit': hit[rows, cols],
+            'adverse': adverse[rows, cols],
+        })
+
+        equity = self._equity_curve(panel, direction)
+        running_peak = equity.cummax()
+        years = max(len(equity) / TRADING_DAYS, 1 / TRADING_DAYS)
+        total_return = float(equity.iloc[-1] - 1) if len(equity) else 0.0
+
+        summary = {
+            'symbols': len(panel['symbols']),
+            'bars': len(panel['dates']),
+            'start': str(panel['dates'][0].date()) if len(panel['dates']) else None,
+            'end': str(panel['dates'][-1].date()) if len(panel['dates']) else None,
+            'horizon': horizon,
+            'trades': len(trades),
+            'hit_rate': float(trades['hit'].mean()) if len(trades) else 0.0,
+            'win_rate': float((trades['return'] > 0).mean()) if len(trades) else 0.0,
+            'avg_return': float(trades['return'].mean()) if len(trades) else 0.0,
+            'avg_adverse': float(trades['adverse'].mean()) if len(trades) else 0.0,
+            'total_return': total_return,
+            'annualized_return': (1 + total_return) ** (1 / years) - 1 if total_return > -1 else -1.0,
+            'max_drawdown': float((equity / running_peak - 1).min()) if len(equity) else 0.0,
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+        return {
+            'summary': summary,
+            'by_signal': outcome_stats(trades, 'divergence_signal'),
+            'by_recommendation': outcome_stats(trades, 'recommendation'),
+            'trades': trades,
+            'equity': equity,
+        }
+
+    def _equity_curve(self, panel, direction):
+        """Daily equal-weight returns of the positions signalled at the previous close"""
+        close = panel['Close']
+        position = direction if self.allow_short else np.maximum(direction, 0)
+        next_return = np.full(close.shape, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            next_return[:-1] = close[1:] / close[:-1] - 1
+
+        held = (position != 0) & ~np.isnan(next_return)
+        pnl = np.where(held, position * next_return, 0.0).sum(axis=1)
+        count = held.sum(axis=1)
+        daily = np.divide(pnl, count, out=np.zeros(len(pnl)), where=count > 0)
+        # Returns earned over bar t -> t+1 are booked on t+1
+        return pd.Series(np.cumprod(1 + daily[:-1]), index=panel['dates'][1:], name='equity')
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the Knox divergence recommendations")
+    parser.add_argument('--symbols-file', default='input.txt', help="One symbol per line")
+    parser.add_argument('--data-dir', help="Read LocalDirectoryProvider files instead of yfinance")
+    parser.add_argument('--symbols', type=int, help="Use the first N symbols")
+    parser.add_argument('--period', default='5y')
+    parser.add_argument('--horizon', type=int, default=20, help="Holding period in bars")
+    parser.add_argument('--allow-short', action='store_true', help="Short sell signals in the equity curve")
+    parser.add_argument('--current-fundamentals', action='store_true',
+                        help="Score every bar with today's fundamentals (look-ahead) instead of neutral 50")
+    parser.add_argument('--trades', help="Write every trade to this CSV")
+    args = parser.parse_args()
+
+    from stock_analyzer import StockAnalyzer
+    from data_providers import LocalDirectoryProvider
+
+    if args.data_dir:
+        provider = LocalDirectoryProvider(args.data_dir)
+        symbols = sorted(name.rsplit('.', 1)[0] for name in os.listdir(os.path.join(args.data_dir, 'history')))
+    else:
+        provider = None
+        with open(args.symbols_file) as f:
+            symbols = [line.strip() for line in f if line.strip()]
+    symbols = symbols[:args.symbols] if args.symbols else symbols
+
+    # The price cache keeps one year of bars, so backtests always read the provider
+    analyzer = StockAnalyzer(provider=provider, use_caches=False)
+    backtester = KnoxBacktester(analyzer, horizon=args.horizon, allow_short=args.allow_short)
+
+    started = time.perf_counter()
+    histories = backtester.fetch_histories(symbols, args.period)
+    loaded = time.perf_counter()
+    fundamental_scores = None
+    if args.current_fundamentals:
+        fundamental_scores = {
+            symbol: analyzer.get_fundamental_data(symbol, price=hist['Close'].iloc[-1])[0]
+            for symbol, hist in histories.items()
+        }
+    report = backtester.run(histories, fundamental_scores)
+
+    summary = report['summary']
+    print(f"Loaded {len(histories)}/{len(symbols)} symbols in {loaded - started:.1f}s, "
+          f"backtest {summary['seconds']:.2f}s over {summary['bars']} bars ({summary['start']} to {summary['end']})")
+    print(f"{summary['trades']} trades, hit rate {summary['hit_rate']:.1%}, win rate {summary['win_rate']:.1%}, "
+          f"avg {args.horizon}-bar return {summary['avg_return']:.2%}, avg adverse move {summary['avg_adverse']:.2%}")
+    print(f"Equity: total {summary['total_return']:.1%}, annualized {summary['annualized_return']:.1%}, "
+          f"max drawdown {summary['max_drawdown']:.1%}")
+    with pd.option_context('display.float_format', '{:.3f}'.format, 'display.width', 120, 'display.max_columns', None):
+        print("\nBy divergence signal:")
+        print(report['by_signal'])
+        print("\nBy recommendation:")
+        print(report['by_recommendation'])
+
+    if args.trades:
+        report['trades'].to_csv(args.trades, index=False)
+        print(f"Trades written to {args.trades}")
+
+if __name__ == "__main__":
+    main()
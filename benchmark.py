@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Analysis Benchmark
+Runs StockAnalyzer offline over synthetic universes and records timings
+
+    python benchmark.py                              # 50, 500 and 5,000 symbols
+    python benchmark.py --sizes 500 --latency 0.05   # simulate network round trips
+    python benchmark.py --latency 0.05 --rps 10      # ... behind a 10 req/s rate limiter
+    python benchmark.py --output results.json        # compare between versions
+
+Each size runs in a fresh interpreter so peak RSS is per size.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import resource
+import subprocess
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from data_providers import LocalDirectoryProvider, LatencyInjectingProvider
+from rate_limiter import HostRateLimiter
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (50, 500, 5000)
+
+def generate_universe(root, size, bars=300, seed=42, end_date='2026-01-02'):
+    """Write synthetic OHLCV and fundamentals for size symbols in LocalDirectoryProvider layout
+
+    Symbols are deterministic per (seed, index) and files that already exist are
+    reused, so larger sizes extend the universe generated for smaller ones.
+    """
+    os.makedirs(os.path.join(root, 'history'), exist_ok=True)
+    os.makedirs(os.path.join(root, 'fundamentals'), exist_ok=True)
+    try:
+        import pyarrow  # noqa: F401
+        extension = 'parquet'
+    except ImportError:
+        extension = 'csv'
+
+    dates = pd.bdate_range(end=end_date, periods=bars)
+    symbols = []
+    for index in range(size):
+        symbol = f"SYN{index:05d}.NS"
+        symbols.append(symbol)
+        history_path = os.path.join(root, 'history', f"{symbol}.{extension}")
+        if os.path.exists(history_path):
+            continue
+
+        rng = np.random.default_rng((seed, index))
+        hist = synthetic_history(rng, dates)
+        if extension == 'parquet':
+            hist.to_parquet(history_path)
+        else:
+            hist.to_csv(history_path)
+        with open(os.path.join(root, 'fundamentals', f"{symbol}.json"), 'w') as f:
+            json.dump(synthetic_info(rng, hist['Close'].iloc[-1]), f)
+    return symbols
+
+def synthetic_history(rng, dates):
+    """Geometric random walk with a per-symbol drift and volatility"""
+    bars = len(dates)
+    drift = rng.normal(0.0003, 0.0005)
+    volatility = rng.uniform(0.01, 0.03)
+    close = rng.uniform(50, 5000) * np.exp(np.cumsum(rng.normal(drift, volatility, bars)))
+    spread = rng.uniform(0, volatility, (2, bars))
+    high = close * (1 + spread[0])
+    low = close * (1 - spread[1])
+    return pd.DataFrame({
+        'Open': low + (high - low) * rng.uniform(0, 1, bars),
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': rng.integers(50_000, 5_000_000, bars).astype(float),
+    }, index=pd.Index(dates, name='Date'))
+
+def synthetic_info(rng, price):
+    """yfinance-style info dict spanning every fundamental scoring band at the given last close"""
+    pe_ratio = float(rng.uniform(5, 60))
+    pb_ratio = float(rng.uniform(0.5, 8))
+    return {
+        'currentPrice': float(price),
+        'trailingPE': pe_ratio,
+        'trailingEps': float(price) / pe_ratio,
+        'priceToBook': pb_ratio,
+        'bookValue': float(price) / pb_ratio,
+        'returnOnEquity': float(rng.uniform(-0.05, 0.35)),
+        'profitMargins': float(rng.uniform(-0.02, 0.3)),
+        'revenueGrowth': float(rng.uniform(-0.1, 0.4)),
+    }
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_size(data_dir, size, latency=0.0, process_pool=False, rps=0):
+    """Analyze size symbols from data_dir in this process and return the measurements
+
+    The latency stand-in is only rate limited when rps is given, so by default
+    the benchmark measures the pipeline rather than the limiter.
+    """
+    from stock_analyzer import StockAnalyzer
+
+    symbols = [f"SYN{index:05d}.NS" for index in range(size)]
+    provider = LocalDirectoryProvider(data_dir)
+    if latency:
+        provider = LatencyInjectingProvider(provider, latency, host='latency.local' if rps else None)
+    analyzer = StockAnalyzer(provider=provider)
+    if rps:
+        analyzer.rate_limiter = HostRateLimiter(requests_per_second=rps)
+    analyzer.use_process_pool = process_pool
+    analyzer.profiler.enabled = True
+
+    start = time.perf_counter()
+    results = analyzer.analyze_stocks(symbols)
+    wall = time.perf_counter() - start
+    profile = analyzer.profiler.summary()
+
+    return {
+        'symbols': size,
+        'analyzed': len(results),
+        'wall_seconds': round(wall, 4),
+        'symbols_per_second': round(size / wall, 2) if wall else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        # Threaded stages overlap, so stage totals can exceed the wall time
+        'stages': {
+            stage: {key: round(value, 6) if isinstance(value, float) else value for key, value in stats.items()}
+            for stage, stats in profile['stages'].items()
+        },
+        'slowest_symbols': [
+            {'symbol': entry['symbol'], 'seconds': round(entry['seconds'], 6)}
+            for entry in profile['slowest_symbols']
+        ],
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark StockAnalyzer on synthetic universes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--bars', type=int, default=300, help="Daily bars per symbol")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every provider call")
+    parser.add_argument('--rps', type=float, default=0,
+                        help="Rate-limit the --latency stand-in to this many requests/s (default: no limiter)")
+    parser.add_argument('--process-pool', action='store_true', help="Use the process-pool pipeline")
+    parser.add_argument('--data-dir', default=os.path.join('.cache', 'benchmark'))
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--single', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    data_dir = os.path.join(args.data_dir, f"bars{args.bars}-seed{args.seed}")
+
+    # Child mode: run one size and print its measurements for the parent
+    if args.single:
+        print(json.dumps(run_size(data_dir, args.single, args.latency, args.process_pool, args.rps)))
+        return
+
+    print(f"Generating synthetic universe ({max(args.sizes)} symbols, {args.bars} bars) in {data_dir}")
+    generate_universe(data_dir, max(args.sizes), args.bars, args.seed)
+
+    runs = []
+    for size in args.sizes:
+        command = [
+            sys.executable, os.path.abspath(__file__), '--single', str(size),
+            '--bars', str(args.bars), '--seed', str(args.seed),
+            '--latency', str(args.latency), '--rps', str(args.rps), '--data-dir', args.data_dir,
+        ]
+        if args.process_pool:
+            command.append('--process-pool')
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            logger.error(f"Benchmark for {size} symbols failed: {completed.stderr.strip()}")
+            continue
+        run = json.loads(completed.stdout.strip().splitlines()[-1])
+        runs.append(run)
+        stage_summary = ', '.join(f"{stage} {stats['total']:.2f}s" for stage, stats in run['stages'].items())
+        print(f"{size:>6} symbols: {run['wall_seconds']:.2f}s wall, {run['symbols_per_second']:.1f} symbols/s, "
+              f"peak RSS {run['peak_rss_mb']:.0f} MiB ({stage_summary})")
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': {
+            'bars': args.bars, 'seed': args.seed, 'latency': args.latency, 'rps': args.rps,
+            'process_pool': args.process_pool,
+        },
+        'runs': runs,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import time
+import logging
+from abc import ABC, abstractmethod
+from datetime import timedelta
+import pandas as pd
+import yfinance as yf
+from rate_limiter import YAHOO_HOST
+
+logger = logging.getLogger(__name__)
+
+class MarketDataProvider(ABC):
+    """Source of OHLCV history and fundamentals used by StockAnalyzer
+
+    host is the rate-limiter key for the upstream service (None = not limited);
+    cacheable=False tells StockAnalyzer to skip its on-disk caches because the
+    provider is already local.
+    """
+
+    host = None
+    cacheable = True
+
+    @abstractmethod
+    def get_history(self, symbol, period=None, start=None):
+        """Daily OHLCV frame for one symbol, empty if unavailable"""
+
+    def get_history_batch(self, symbols, period=None, start=None):
+        """{symbol: frame} for the symbols that came back; missing symbols are simply absent"""
+        frames = {}
+        for symbol in symbols:
+            try:
+                hist = self.get_history(symbol, period=period, start=start)
+            except Exception as e:
+                logger.warning(f"History fetch failed for {symbol}: {str(e)}")
+                continue
+            if hist is not None and not hist.empty:
+                frames[symbol] = hist
+        return frames
+
+    @abstractmethod
+    def get_info(self, symbol):
+        """Fundamentals as a yfinance-style info dict (trailingPE, priceToBook, ...)"""
+
+class YFinanceProvider(MarketDataProvider):
+    """Yahoo Finance through yfinance"""
+
+    host = YAHOO_HOST
+
+    def get_history(self, symbol, period=None, start=None):
+        stock = yf.Ticker(symbol)
+        if start is not None:
+            return stock.history(start=start, auto_adjust=True, prepost=True)
+        return stock.history(period=period, auto_adjust=True, prepost=True)
+
+    def get_history_batch(self, symbols, period=None, start=None):
+        """One bulk yf.download request for the whole chunk"""
+        kwargs = {'start': start} if start is not None else {'period': period}
+        data = yf.download(
+            list(symbols), auto_adjust=True, prepost=True, group_by='ticker',
+            threads=True, progress=False, **kwargs
+        )
+        frames = {}
+        for symbol in symbols:
+            hist = self._extract_symbol_history(data, symbol, len(symbols))
+            if hist is not None:
+                frames[symbol] = hist
+        return frames
+
+    def get_info(self, symbol):
+        return yf.Ticker(symbol).info
+
+    def _extract_symbol_history(self, data, symbol, chunk_size):
+        """Pull one symbol's OHLCV out of a yf.download result, None if absent"""
+        if data is None or data.empty:
+            return None
+
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol not in data.columns.get_level_values(0):
+                return None
+            hist = data[symbol]
+        elif chunk_size == 1:
+            hist = data
+        else:
+            return None
+
+        hist = hist.dropna(how='all')
+        return None if hist.empty else hist
+
+class LocalDirectoryProvider(MarketDataProvider):
+    """Offline provider reading a directory of per-symbol files
+
+    Layout::
+
+        <root>/history/<SYMBOL>.parquet or <SYMBOL>.csv   (Date index + OHLCV columns)
+        <root>/fundamentals/<SYMBOL>.json                 (yfinance-style info dict)
+
+    Periods are measured back from the last bar in the file, so replays of an
+    old snapshot analyze the same window they would have on that day.
+    """
+
+    cacheable = False
+
+    def __init__(self, root):
+        self.root = root
+
+    def get_history(self, symbol, period=None, start=None):
+        hist = self._read_history(symbol)
+        if hist is None or hist.empty:
+            return pd.DataFrame()
+        if start is not None:
+            return hist[hist.index >= pd.Timestamp(start)]
+        days = period_to_days(period)
+        if days is not None:
+            return hist[hist.index >= hist.index.max() - timedelta(days=days)]
+        return hist
+
+    def get_info(self, symbol):
+        path = os.path.join(self.root, 'fundamentals', f"{symbol}.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _read_history(self, symbol):
+        base = os.path.join(self.root, 'history', symbol)
+        if os.path.exists(f"{base}.parquet"):
+            return pd.read_parquet(f"{base}.parquet")
+        if os.path.exists(f"{base}.csv"):
+            return pd.read_csv(f"{base}.csv", index_col=0, parse_dates=True)
+        return None
+
+class LatencyInjectingProvider(MarketDataProvider):
+    """Wraps another provider and sleeps before every call to stand in for network round trips
+
+    host is None by default so the analyzer's rate limiter does not throttle the
+    stand-in; give a host to measure the pipeline behind a limiter as well.
+    """
+
+    def __init__(self, provider, latency=0.1, host=None):
+        self.provider = provider
+        self.latency = latency
+        self.host = host
+        self.cacheable = provider.cacheable
+        self.calls = 0
+
+    def get_history(self, symbol, period=None, start=None):
+        self._wait()
+        return self.provider.get_history(symbol, period=period, start=start)
+
+    def get_history_batch(self, symbols, period=None, start=None):
+        # A bulk request costs one round trip however many symbols it carries
+        self._wait()
+        frames = {}
+        for symbol in symbols:
+            hist = self.provider.get_history(symbol, period=period, start=start)
+            if hist is not None and not hist.empty:
+                frames[symbol] = hist
+        return frames
+
+    def get_info(self, symbol):
+        self._wait()
+        return self.provider.get_info(symbol)
+
+    def _wait(self):
+        self.calls += 1
+        time.sleep(self.latency)
+
+def period_to_days(period):
+    """Approximate days in a yfinance period string ('5d', '6mo', '1y'); None for 'max' or None"""
+    if not period or period == 'max':
+        return None
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    return count * {'d': 1, 'wk': 7, 'mo': 31, 'y': 365}[unit]
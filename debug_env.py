@@ -105,7 +105,7 @@ def check_python_modules():
     
     required_modules = [
         'streamlit', 'pandas', 'yfinance', 'plotly', 'twilio',
-        'python-dotenv', 'schedule', 'ta', 'requests', 'certifi',
+        'python-dotenv', 'ta', 'requests', 'certifi',
         'numpy', 'pytz', 'logging'
     ]
     
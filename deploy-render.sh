@@ -44,7 +44,6 @@ python-dotenv==1.1.1
 requests==2.32.4
 numpy==1.24.4
 ta==0.13.0
-schedule==1.3.0
 pytz==2024.2
 certifi==2024.8.30
 EOF
@@ -25,7 +25,6 @@ python-dotenv
 requests
 numpy
 ta
-schedule
 pytz
 EOF
 
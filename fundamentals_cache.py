@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Only statement-based fields are cached - they change on results, not with price.
+# P/E and P/B are derived from eps/book_value and the current close at analysis time
+# (StockAnalyzer.valuation_metrics), so price moves never force a refetch.
+DEFAULT_FIELD_TTLS = {
+    'eps': 7 * DAY,
+    'book_value': 30 * DAY,
+    'roe': 7 * DAY,
+    'profit_margin': 7 * DAY,
+    'revenue_growth': 7 * DAY,
+}
+
+# Fields the endpoint did not return (None) are retried sooner - often a throttled
+# or partial response rather than a company that does not report them
+MISSING_TTL = 6 * HOUR
+
+class FundamentalsCache:
+    """Persistent per-symbol fundamentals cache with per-field TTLs and stale-while-revalidate"""
+
+    def __init__(self, path='.cache/fundamentals.json', field_ttls=None, max_stale=30 * DAY, background_workers=2,
+                 missing_ttl=MISSING_TTL):
+        self.path = path
+        self.field_ttls = dict(DEFAULT_FIELD_TTLS, **(field_ttls or {}))
+        self.missing_ttl = missing_ttl
+        self.max_stale = max_stale
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._revalidating = set()
+        self._dirty = False
+        self._executor = ThreadPoolExecutor(max_workers=background_workers, thread_name_prefix="fundamentals")
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'revalidations': 0, 'errors': 0}
+        self._load()
+
+    def get(self, symbol, fetch, allow_fetch=True):
+        """Return cached metrics for symbol, calling fetch() only when needed
+
+        Expired entries within max_stale are served immediately and refreshed in
+        the background. fetch() returns every field in one call, so an entry
+        expires as a whole when any field does (None values after missing_ttl)
+        and the refresh restarts every field's TTL. Entries missing a field in
+        field_ttls (an older cache layout) count as expired. With
+        allow_fetch=False the endpoint is never touched and None is returned for
+        symbols that were never cached.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(symbol)
+
+        if not entry:
+            self._count('misses')
+            if not allow_fetch:
+                return None
+            return self._refresh(symbol, fetch)
+
+        metrics = {field: item['value'] for field, item in entry.items()}
+        ages = [now - entry[field]['fetched_at'] for field in entry]
+        expired = any(now - item['fetched_at'] > self._ttl(field, item) for field, item in entry.items())
+        expired = expired or any(field not in entry for field in self.field_ttls)
+
+        if not expired or not allow_fetch:
+            self._count('hits' if not expired else 'stale_hits')
+            return metrics
+
+        if max(ages) > self.max_stale:
+            self._count('misses')
+            return self._refresh(symbol, fetch)
+
+        self._count('stale_hits')
+        self._revalidate_in_background(symbol, fetch)
+        return metrics
+
+    def stats(self):
+        """Hit/miss counters plus the overall hit rate"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['revalidating'] = len(self._revalidating)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['stale_hits']) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def flush(self):
+        """Write the cache to disk if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = json.dumps(self._entries)
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not write fundamentals cache: {str(e)}")
+
+    def _refresh(self, symbol, fetch):
+        """Fetch and store metrics synchronously"""
+        metrics = fetch()
+        self._store(symbol, metrics)
+        return metrics
+
+    def _revalidate_in_background(self, symbol, fetch):
+        with self._lock:
+            if symbol in self._revalidating:
+                return
+            self._revalidating.add(symbol)
+        self._executor.submit(self._revalidate, symbol, fetch)
+
+    def _revalidate(self, symbol, fetch):
+        try:
+            self._store(symbol, fetch())
+            self._count('revalidations')
+        except Exception as e:
+            self._count('errors')
+            logger.warning(f"Background fundamentals refresh failed for {symbol}: {str(e)}")
+        finally:
+            with self._lock:
+                self._revalidating.discard(symbol)
+                drained = not self._revalidating
+            if drained:
+                self.flush()
+
+    def _ttl(self, field, item):
+        if item['value'] is None:
+            return min(self.missing_ttl, self.field_ttls.get(field, DAY))
+        return self.field_ttls.get(field, DAY)
+
+    def _store(self, symbol, metrics):
+        fetched_at = time.time()
+        entry = {field: {'value': value, 'fetched_at': fetched_at} for field, value in metrics.items()}
+        with self._lock:
+            # An all-None response (throttled or failed) keeps the cached entry, which stays
+            # expired and is retried on the next lookup; a new symbol's is retried after missing_ttl
+            if all(value is None for value in metrics.values()) and symbol in self._entries:
+                return
+            self._entries[symbol] = entry
+            self._dirty = True
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                self._entries = json.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable fundamentals cache: {str(e)}")
+            self._entries = {}
@@ -0,0 +1,124 @@
+import logging
+from ta.momentum import RSIIndicator
+from ta.trend import MACD, SMAIndicator
+from ta.volatility import BollingerBands
+
+logger = logging.getLogger(__name__)
+
+# The only ta columns the scoring code reads: technical_data key -> indicator column.
+# Names and parameters match what add_all_ta_features produced before.
+TECHNICAL_INDICATORS = {
+    'rsi_14': 'momentum_rsi',
+    'macd': 'trend_macd',
+    'macd_signal': 'trend_macd_signal',
+    'bb_upper': 'volatility_bbh',
+    'bb_lower': 'volatility_bbl',
+    'sma_20': 'trend_sma_slow',
+}
+
+def clean_volume(data):
+    """Volume series with gaps filled, synthesized from the bar range if missing"""
+    if 'Volume' not in data.columns or data['Volume'].isna().all():
+        logger.warning("Volume data missing, creating synthetic volume data")
+        # Create synthetic volume based on price volatility
+        volume = (data['High'] - data['Low']) / data['Close'] * 1000000
+        volume = volume.fillna(1000000)
+    else:
+        volume = data['Volume']
+    
+    # Fill any missing volume values
+    return volume.ffill().fillna(1000000)
+
+def _rsi(close, fillna):
+    return {'momentum_rsi': RSIIndicator(close=close, window=14, fillna=fillna).rsi()}
+
+def _macd(close, fillna):
+    indicator = MACD(close=close, window_slow=26, window_fast=12, window_sign=9, fillna=fillna)
+    return {'trend_macd': indicator.macd(), 'trend_macd_signal': indicator.macd_signal()}
+
+def _bollinger(close, fillna):
+    indicator = BollingerBands(close=close, window=20, window_dev=2, fillna=fillna)
+    return {'volatility_bbh': indicator.bollinger_hband(), 'volatility_bbl': indicator.bollinger_lband()}
+
+def _sma_slow(close, fillna):
+    return {'trend_sma_slow': SMAIndicator(close=close, window=26, fillna=fillna).sma_indicator()}
+
+# Indicator column -> builder; builders computing several columns are run once
+INDICATOR_BUILDERS = {
+    'momentum_rsi': _rsi,
+    'trend_macd': _macd,
+    'trend_macd_signal': _macd,
+    'volatility_bbh': _bollinger,
+    'volatility_bbl': _bollinger,
+    'trend_sma_slow': _sma_slow,
+}
+
+def compute_indicators(close, columns=None, fillna=True):
+    """Compute only the requested indicator columns from a Close series
+
+    Returns a dict of column name -> Series. Defaults to every column listed in
+    TECHNICAL_INDICATORS.
+    """
+    columns = list(TECHNICAL_INDICATORS.values()) if columns is None else columns
+    indicators = {}
+    for column in columns:
+        if column in indicators:
+            continue
+        builder = INDICATOR_BUILDERS.get(column)
+        if builder is None:
+            raise KeyError(f"Unknown indicator column: {column}")
+        indicators.update(builder(close, fillna))
+    return {column: indicators[column] for column in columns}
+
+class FeatureContext:
+    """Per-symbol memo of derived series shared by every analysis stage
+
+    Each series (close diff, Knox RSI, momentum, rolling means, indicators) is
+    computed at most once per symbol, however many stages read it.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._series = {}
+
+    @property
+    def close(self):
+        return self.data['Close']
+
+    def _memo(self, key, build):
+        if key not in self._series:
+            self._series[key] = build()
+        return self._series[key]
+
+    def delta(self):
+        """Bar-to-bar close change"""
+        return self._memo('delta', lambda: self.close.diff())
+
+    def simple_rsi(self, period):
+        """Rolling-mean RSI (the Knox RSI)"""
+        def build():
+            delta = self.delta()
+            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+            rs = gain / loss
+            return 100 - (100 / (1 + rs))
+        return self._memo(('simple_rsi', period), build)
+
+    def pct_change(self, periods):
+        """Fractional close change over periods bars (momentum)"""
+        return self._memo(('pct_change', periods), lambda: self.close.pct_change(periods))
+
+    def rolling_mean(self, window, column='Close'):
+        """Rolling mean of a column, 'Volume' uses the cleaned volume series"""
+        def build():
+            series = self.volume() if column == 'Volume' else self.data[column]
+            return series.rolling(window=window).mean()
+        return self._memo(('rolling_mean', column, window), build)
+
+    def volume(self):
+        """Cleaned volume series"""
+        return self._memo('volume', lambda: clean_volume(self.data))
+
+    def indicators(self):
+        """ta indicator columns listed in TECHNICAL_INDICATORS"""
+        return self._memo('indicators', lambda: compute_indicators(self.close))
@@ -0,0 +1,225 @@
+import logging
+import warnings
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from indicators import clean_volume
+
+logger = logging.getLogger(__name__)
+
+PANEL_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+def align_histories(histories, fields=PANEL_FIELDS):
+    """Stack per-symbol histories into bars x symbols float arrays
+
+    Rows are bars right-aligned on each symbol's latest bar, so the last row is
+    every symbol's current bar and shorter histories are NaN-padded at the top.
+    Volume is cleaned the same way calculate_technical_indicators cleans it.
+    Returns a dict with 'symbols', 'lengths' and one array per field.
+    """
+    symbols = list(histories)
+    lengths = np.array([len(histories[symbol]) for symbol in symbols], dtype=int)
+    rows = int(lengths.max()) if len(lengths) else 0
+
+    panel = {'symbols': symbols, 'lengths': lengths}
+    for field in fields:
+        panel[field] = np.full((rows, len(symbols)), np.nan)
+
+    for column, symbol in enumerate(symbols):
+        hist = histories[symbol]
+        start = rows - len(hist)
+        for field in fields:
+            if field == 'Volume':
+                values = clean_volume(hist).to_numpy(dtype=float)
+            elif field in hist.columns:
+                values = hist[field].to_numpy(dtype=float)
+            else:
+                continue
+            panel[field][start:, column] = values
+    return panel
+
+def rolling_mean(values, window, min_periods=None):
+    """NaN-aware rolling mean along the bar axis (pandas rolling().mean() semantics)"""
+    sums, counts = _rolling_sums(values, window)
+    min_periods = window if min_periods is None else max(1, min_periods)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts >= min_periods, sums / counts, np.nan)
+
+def rolling_std(values, window, min_periods=None, ddof=0):
+    """NaN-aware rolling standard deviation along the bar axis"""
+    # Shift by the first valid value per symbol to limit cancellation in E[x^2] - E[x]^2
+    offset = _first_valid(values)
+    centered = values - offset
+    sums, counts = _rolling_sums(centered, window)
+    squares, _ = _rolling_sums(centered * centered, window)
+    min_periods = window if min_periods is None else max(1, min_periods)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums / counts
+        variance = (squares - counts * mean * mean) / (counts - ddof)
+    variance = np.maximum(variance, 0.0)
+    return np.where((counts >= min_periods) & (counts > ddof), np.sqrt(variance), np.nan)
+
+def ewm_mean(values, alpha):
+    """Recursive EMA (pandas ewm(adjust=False).mean()) seeded at each symbol's first bar"""
+    out = np.full(values.shape, np.nan)
+    previous = np.full(values.shape[1:], np.nan)
+    for row in range(values.shape[0]):
+        current = values[row]
+        previous = np.where(
+            np.isnan(previous), current,
+            np.where(np.isnan(current), previous, (1 - alpha) * previous + alpha * current)
+        )
+        out[row] = previous
+    return out
+
+def shift(values, periods):
+    """Shift down by periods bars, NaN-filling the top"""
+    out = np.full(values.shape, np.nan)
+    if periods < values.shape[0]:
+        out[periods:] = values[:values.shape[0] - periods]
+    return out
+
+def diff(values):
+    """Bar-to-bar difference"""
+    return values - shift(values, 1)
+
+def gains_losses(close):
+    """Up and down moves; a symbol's first bar counts as 0 like Series.where(cond, 0)"""
+    delta = diff(close)
+    valid = ~np.isnan(close)
+    with np.errstate(invalid='ignore'):
+        gain = np.where(valid, np.where(delta > 0, delta, 0.0), np.nan)
+        loss = np.where(valid, np.where(delta < 0, -delta, 0.0), np.nan)
+    return gain, loss
+
+def simple_rsi(close, period):
+    """Rolling-mean RSI used for the Knox RSI"""
+    gain, loss = gains_losses(close)
+    avg_gain = rolling_mean(gain, period)
+    avg_loss = rolling_mean(loss, period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+def wilder_rsi(close, period=14):
+    """Wilder RSI matching ta's RSIIndicator(fillna=True)"""
+    gain, loss = gains_losses(close)
+    avg_gain = ewm_mean(gain, 1 / period)
+    avg_loss = ewm_mean(loss, 1 / period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi = np.where(avg_loss == 0, 100, 100 - (100 / (1 + avg_gain / avg_loss)))
+    return _fill_forward(rsi, 50)
+
+def macd(close, fast=12, slow=26, signal=9):
+    """MACD line and signal matching ta's MACD(fillna=True)"""
+    line = ewm_mean(close, 2 / (fast + 1)) - ewm_mean(close, 2 / (slow + 1))
+    signal_line = ewm_mean(line, 2 / (signal + 1))
+    return _fill_forward(line, 0), _fill_forward(signal_line, 0)
+
+def pct_change(close, periods):
+    return close / shift(close, periods) - 1
+
+def rolling_extreme(values, window, mode='max'):
+    """NaN-skipping rolling max/min along the bar axis, like Series.tail(window).max() at every bar
+
+    Windows are strided views (sliding_window_view) reduced in one call; rows
+    before a full window use the bars available.
+    """
+    padding = np.full((window - 1,) + values.shape[1:], np.nan)
+    windows = sliding_window_view(np.concatenate([padding, values]), window, axis=0)
+    with warnings.catch_warnings():
+        # All-NaN windows (before a symbol's first bar) are NaN, as pandas returns
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmax(windows, axis=-1) if mode == 'max' else np.nanmin(windows, axis=-1)
+
+def knox_divergence(high, low, close, knox_rsi, momentum, bars_seen, bars_back=200, window=20):
+    """Vectorized detect_knox_divergence at every bar of a bars x symbols panel
+
+    momentum is the fractional change (not percent); bars_seen is how many bars
+    each symbol has up to and including each row. Returns (signal, score)
+    arrays; bars with fewer than bars_back bars are NEUTRAL/50.
+    """
+    price_high = rolling_extreme(high, window, 'max')
+    price_low = rolling_extreme(low, window, 'min')
+    rsi_high = rolling_extreme(knox_rsi, window, 'max')
+    rsi_low = rolling_extreme(knox_rsi, window, 'min')
+
+    # NaN comparisons are False, falling through to NEUTRAL like the scalar if/elif chain
+    with np.errstate(invalid='ignore'):
+        enough = bars_seen >= bars_back
+        bullish = enough & (close <= price_low * 1.02) & (knox_rsi > rsi_low * 1.1)
+        bearish = enough & (close >= price_high * 0.98) & (knox_rsi < rsi_high * 0.9)
+        hidden_bullish = enough & (close > price_low * 1.05) & (knox_rsi < rsi_low * 1.05)
+        hidden_bearish = enough & (close < price_high * 0.95) & (knox_rsi > rsi_high * 0.95)
+        branches = [
+            (bullish & (momentum > 0.05), "STRONG_BULLISH", 85),
+            (bullish, "BULLISH", 75),
+            (bearish & (momentum < -0.05), "STRONG_BEARISH", 15),
+            (bearish, "BEARISH", 25),
+            (hidden_bullish, "HIDDEN_BULLISH", 65),
+            (hidden_bearish, "HIDDEN_BEARISH", 35),
+        ]
+    conditions = [condition for condition, _, _ in branches]
+    signal = np.select(conditions, [label for _, label, _ in branches], "NEUTRAL").astype(object)
+    score = np.select(conditions, [value for _, _, value in branches], 50)
+    return signal, score
+
+def compute_panel_indicators(panel, knox_rsi_period=7, knox_momentum_period=20,
+                             envelope_length=200, envelope_percent=14):
+    """Compute every technical_data series for the whole universe in vectorized passes
+
+    Returns a dict of technical_data key -> bars x symbols array.
+    """
+    close = panel['Close']
+    volume = panel['Volume']
+
+    macd_line, macd_signal = macd(close)
+    bb_mid = rolling_mean(close, 20, min_periods=0)
+    bb_std = rolling_std(close, 20, min_periods=0)
+    envelope_sma = rolling_mean(close, envelope_length)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        volume_trend = rolling_mean(volume, 20) / rolling_mean(volume, 50)
+
+    return {
+        'rsi_14': wilder_rsi(close, 14),
+        'knox_rsi': simple_rsi(close, knox_rsi_period),
+        'macd': macd_line,
+        'macd_signal': macd_signal,
+        'bb_upper': bb_mid + 2 * bb_std,
+        'bb_lower': bb_mid - 2 * bb_std,
+        'sma_20': rolling_mean(close, 26, min_periods=0),
+        'sma_50': rolling_mean(close, 50),
+        'momentum': pct_change(close, knox_momentum_period) * 100,
+        'envelope_sma': envelope_sma,
+        'upper_envelope': envelope_sma * (1 + envelope_percent / 100),
+        'lower_envelope': envelope_sma * (1 - envelope_percent / 100),
+        'volume_trend': np.where(panel['lengths'] >= 50, volume_trend, 1.0),
+    }
+
+def latest_technical_data(panel, indicators):
+    """Per-symbol technical_data dicts from the last bar of each indicator array"""
+    return {
+        symbol: {key: float(values[-1, column]) for key, values in indicators.items()}
+        for column, symbol in enumerate(panel['symbols'])
+    }
+
+def _rolling_sums(values, window):
+    valid = ~np.isnan(values)
+    padding = np.zeros((window,) + values.shape[1:])
+    sums = np.concatenate([padding, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    counts = np.concatenate([padding, np.cumsum(valid, axis=0)])
+    return sums[window:] - sums[:-window], counts[window:] - counts[:-window]
+
+def _first_valid(values):
+    valid = ~np.isnan(values)
+    first = np.argmax(valid, axis=0)
+    offset = values[first, np.arange(values.shape[1])] if values.ndim == 2 else values[first]
+    return np.where(np.isnan(offset), 0.0, offset)
+
+def _fill_forward(values, fill_value):
+    """ta's fillna: inf -> NaN, forward fill, then a constant"""
+    values = np.where(np.isinf(values), np.nan, values)
+    out = np.empty(values.shape)
+    previous = np.full(values.shape[1:], np.nan)
+    for row in range(values.shape[0]):
+        previous = np.where(np.isnan(values[row]), previous, values[row])
+        out[row] = previous
+    return np.where(np.isnan(out), fill_value, out)
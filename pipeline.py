@@ -0,0 +1,164 @@
+import os
+import queue
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from stock_analyzer import StockAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# One cache-free analyzer per worker process, created by the pool initializer
+_worker_analyzer = None
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = StockAnalyzer(use_caches=False)
+
+def _analyze_in_worker(settings, profile, symbol, hist, fundamental_score, fundamental_metrics):
+    """CPU stage run inside a worker process - returns (result, exported stage timings or None)"""
+    profiler = _worker_analyzer.profiler
+    profiler.enabled = profile
+    profiler.reset()
+    try:
+        _worker_analyzer.apply_settings(settings)
+        result = _worker_analyzer.analyze_prefetched(symbol, hist, fundamental_score, fundamental_metrics)
+    except Exception as e:
+        logger.error(f"Error analyzing {symbol} in worker: {str(e)}")
+        result = None
+    return result, profiler.export() if profile else None
+
+class AnalysisPipeline:
+    """Two-stage executor: I/O-bound fetch threads feed a bounded queue drained by a process pool
+
+    The fetch stage (history slice or download, fundamentals) runs on threads;
+    indicators, Knox divergence and scoring run in worker processes so universe
+    runs use every core. The queue and the in-flight limit provide backpressure,
+    so fetched-but-unanalyzed data stays bounded however large the universe is.
+    """
+
+    def __init__(self, analyzer, fetch_workers=None, process_workers=None, queue_size=None):
+        self.analyzer = analyzer
+        self.fetch_workers = fetch_workers or analyzer.max_workers
+        self.process_workers = process_workers or analyzer.process_workers or os.cpu_count() or 1
+        self.queue_size = queue_size or analyzer.pipeline_queue_size
+        self.max_in_flight = self.process_workers * 2
+
+    def run(self, symbols, price_only=False):
+        """Analyze symbols and return results in input order"""
+        positions = {}
+        for index, symbol in enumerate(symbols):
+            positions.setdefault(symbol, []).append(index)
+        results = [None] * len(symbols)
+        for symbol, result in self.iter_run(symbols, price_only):
+            results[positions[symbol].pop(0)] = result
+        return [result for result in results if result]
+
+    def iter_run(self, symbols, price_only=False):
+        """Yield (symbol, result) as each analysis completes; result is None on failure
+
+        History is batch-fetched one batch_chunk_size chunk at a time, each once the
+        previous chunk's inputs are queued, so the first chunk is analyzed while
+        later chunks download and memory stays flat however large the universe is.
+        """
+        analyzer = self.analyzer
+        total_stocks = len(symbols)
+        if not total_stocks:
+            return
+
+        work = queue.Queue(maxsize=self.queue_size)
+        settings = analyzer.settings()
+        stopped = threading.Event()
+
+        def fetch(symbol, hist):
+            if stopped.is_set():
+                return
+            inputs = None
+            try:
+                inputs = analyzer.fetch_inputs(symbol, hist, price_only)
+            except Exception as e:
+                logger.error(f"Error fetching {symbol}: {str(e)}")
+            # Blocks while the queue is full - this is the backpressure on the fetch stage.
+            # Gives up once the consumer has stopped iterating.
+            while not stopped.is_set():
+                try:
+                    work.put((symbol, inputs), timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def submit_chunks(fetchers):
+            for start in range(0, total_stocks, analyzer.batch_chunk_size):
+                if stopped.is_set():
+                    return
+                chunk = symbols[start:start + analyzer.batch_chunk_size]
+                history = None
+                if analyzer.use_batch_download:
+                    try:
+                        with analyzer.profiler.stage('batch_fetch'):
+                            history = analyzer.fetch_history_batch(chunk)
+                    except Exception as e:
+                        # Symbols without a batch slice are fetched one by one
+                        logger.error(f"Error fetching batch of {len(chunk)} symbols: {str(e)}")
+                futures = [fetchers.submit(fetch, symbol, analyzer._history_slice(history, symbol)) for symbol in chunk]
+                del history
+                # Backpressure: the next chunk downloads once this one's inputs are on the bounded
+                # queue, so at most one chunk of raw history is held beyond the queue
+                wait(futures)
+
+        logger.info(f"Pipeline: {total_stocks} stocks, {self.fetch_workers} fetch threads, "
+                    f"{self.process_workers} analysis processes")
+
+        analyzed = 0
+        # spawn avoids forking a process that has live fetch threads
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.process_workers, mp_context=context,
+                                 initializer=_init_worker) as processes, \
+                ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="fetch") as fetchers:
+            producer = threading.Thread(target=submit_chunks, args=(fetchers,), name="pipeline-batches", daemon=True)
+            producer.start()
+
+            in_flight = {}
+            try:
+                for symbol, result in self._drain(work, processes, in_flight, settings, total_stocks):
+                    analyzed += 1 if result else 0
+                    yield symbol, result
+            finally:
+                stopped.set()
+                producer.join()
+
+        if analyzer.fundamentals_cache:
+            analyzer.fundamentals_cache.flush()
+
+        logger.info(f"Analysis completed. {analyzed} stocks analyzed successfully.")
+        analyzer._finish_profile(total_stocks, analyzed)
+
+    def _drain(self, work, processes, in_flight, settings, total_stocks):
+        """Submit fetched inputs to the process pool and yield results as they complete"""
+        profile = self.analyzer.profiler.enabled
+        for done in range(total_stocks):
+            symbol, inputs = work.get()
+            logger.info(f"Analyzing {symbol} ({done + 1}/{total_stocks})")
+            if inputs is None:
+                yield symbol, None
+                continue
+            if len(in_flight) >= self.max_in_flight:
+                finished = wait(in_flight, return_when=FIRST_COMPLETED).done
+            else:
+                finished = [future for future in in_flight if future.done()]
+            yield from self._collect(finished, in_flight)
+            future = processes.submit(_analyze_in_worker, settings, profile, symbol, *inputs)
+            in_flight[future] = symbol
+        for future in as_completed(list(in_flight)):
+            yield from self._collect([future], in_flight)
+
+    def _collect(self, done, in_flight):
+        for future in done:
+            symbol = in_flight.pop(future)
+            result = None
+            try:
+                result, timings = future.result()
+                self.analyzer.profiler.merge(timings)
+            except Exception as e:
+                logger.error(f"Worker failed: {str(e)}")
+            yield symbol, result
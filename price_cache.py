@@ -0,0 +1,166 @@
+import os
+import logging
+from datetime import datetime, timedelta
+import pandas as pd
+import pytz
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'parquet'
+except ImportError:
+    # Without a Parquet engine fall back to pickle so the cache still works
+    CACHE_FORMAT = 'pkl'
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+class PriceCache:
+    """On-disk per-symbol daily OHLCV cache with incremental bar append"""
+
+    def __init__(self, cache_dir='.cache/ohlcv', market_timezone='Asia/Kolkata', market_close='15:30',
+                 retention_days=366, adjustment_tolerance=0.005):
+        self.cache_dir = cache_dir
+        self.market_timezone = pytz.timezone(market_timezone)
+        self.market_close = datetime.strptime(market_close, '%H:%M').time()
+        self.retention_days = retention_days
+        self.adjustment_tolerance = adjustment_tolerance
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path(self, symbol):
+        """File path for a symbol's cached bars"""
+        safe_symbol = symbol.replace('/', '_').replace('^', '_')
+        return os.path.join(self.cache_dir, f"{safe_symbol}.{CACHE_FORMAT}")
+
+    def load(self, symbol):
+        """Return cached bars for symbol, None if not cached or unreadable"""
+        path = self.path(symbol)
+        if not os.path.exists(path):
+            return None
+        try:
+            if CACHE_FORMAT == 'parquet':
+                return pd.read_parquet(path)
+            return pd.read_pickle(path)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable price cache for {symbol}: {str(e)}")
+            return None
+
+    def save(self, symbol, hist):
+        """Write bars for symbol, trimmed to the retention window"""
+        hist = self._normalize(hist)
+        cutoff = hist.index.max() - timedelta(days=self.retention_days)
+        hist = hist[hist.index >= cutoff]
+        path = self.path(symbol)
+        tmp_path = f"{path}.tmp"
+        try:
+            if CACHE_FORMAT == 'parquet':
+                hist.to_parquet(tmp_path)
+            else:
+                hist.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write price cache for {symbol}: {str(e)}")
+        return hist
+
+    def touch(self, symbol):
+        """Mark a symbol's cache as refreshed without rewriting it"""
+        try:
+            os.utime(self.path(symbol))
+        except OSError:
+            pass
+
+    def last_completed_session(self, now=None):
+        """Close time of the most recent weekday session that has already closed"""
+        now = now or datetime.now(self.market_timezone)
+        if now.tzinfo is None:
+            now = self.market_timezone.localize(now)
+        now = now.astimezone(self.market_timezone)
+
+        session_day = now.date()
+        if now.time() < self.market_close:
+            session_day -= timedelta(days=1)
+        while session_day.weekday() >= 5:
+            session_day -= timedelta(days=1)
+        return self.market_timezone.localize(datetime.combine(session_day, self.market_close))
+
+    def is_fresh(self, symbol, hist, now=None):
+        """True if the cache was refreshed after the last completed session closed
+
+        Bars fetched before a close (partial intraday bars) are therefore refetched
+        once, and weekends/holidays do not trigger repeated downloads.
+        """
+        if hist is None or hist.empty:
+            return False
+        refreshed_at = self._written_at(symbol)
+        return refreshed_at is not None and refreshed_at >= self.last_completed_session(now)
+
+    def completed_through(self, symbol):
+        """Last session date that had closed when the symbol's cache was written, None if not cached
+
+        Cached bars after this date were fetched while their session was still
+        trading, so their close is an intraday price rather than a final one.
+        """
+        written_at = self._written_at(symbol)
+        return self.last_completed_session(written_at).date() if written_at is not None else None
+
+    def refresh_start(self, hist, symbol=None):
+        """Start date for an incremental fetch - the last completed cached bar is refetched as an overlap check
+
+        With symbol given, a trailing bar cached during its session is skipped so
+        the check compares final closes, not a final close with an intraday one.
+        """
+        completed = self.completed_through(symbol) if symbol else None
+        if completed is not None:
+            final_bars = hist.index[hist.index.date <= completed]
+            if len(final_bars):
+                return final_bars.max().date()
+        return hist.index.max().date()
+
+    def merge(self, symbol, cached, new_bars):
+        """Append freshly fetched bars to the cache and return the merged history
+
+        Returns None when the overlapping bar no longer matches (split or dividend
+        re-adjustment); the caller should then refetch the full period.
+        """
+        if new_bars is None or new_bars.empty:
+            if cached is not None:
+                # Touch the file so holiday/weekend checks see the refresh
+                self.touch(symbol)
+            return cached
+
+        new_bars = self._normalize(new_bars)
+        if cached is None or cached.empty:
+            return self.save(symbol, new_bars)
+
+        overlap = cached.index.intersection(new_bars.index)
+        completed = self.completed_through(symbol)
+        if completed is not None:
+            # Bars cached mid-session are simply replaced by the new ones
+            overlap = overlap[overlap.date <= completed]
+        if len(overlap):
+            old_close = cached.loc[overlap[0], 'Close']
+            new_close = new_bars.loc[overlap[0], 'Close']
+            if old_close and abs(new_close - old_close) / abs(old_close) > self.adjustment_tolerance:
+                logger.info(f"Price adjustment detected for {symbol}, full refetch required")
+                return None
+
+        merged = pd.concat([cached, new_bars])
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+        return self.save(symbol, merged)
+
+    def _written_at(self, symbol):
+        """UTC time the symbol's cache file was last written or touched, None if missing"""
+        try:
+            return datetime.fromtimestamp(os.path.getmtime(self.path(symbol)), tz=pytz.utc)
+        except OSError:
+            return None
+
+    def _normalize(self, hist):
+        """Daily bars indexed by tz-naive session date with the OHLCV columns only"""
+        hist = hist[[col for col in OHLCV_COLUMNS if col in hist.columns]].copy()
+        index = pd.DatetimeIndex(hist.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        hist.index = index.normalize()
+        hist = hist[~hist.index.duplicated(keep='last')].sort_index()
+        return hist
@@ -0,0 +1,35 @@
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# yfinance routes both history and quote/info requests through Yahoo's query hosts
+YAHOO_HOST = 'finance.yahoo.com'
+
+class HostRateLimiter:
+    """Thread-safe token-bucket rate limiter keyed by upstream host"""
+
+    def __init__(self, requests_per_second=10, burst=None):
+        self.requests_per_second = requests_per_second
+        self.burst = burst if burst is not None else max(1, int(requests_per_second or 1))
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def acquire(self, host):
+        """Block until a request to host is allowed
+
+        The token is taken at once - the bucket may go negative - and the caller
+        sleeps until it would have refilled, so waiters are paced in arrival order
+        and no wake-up has to re-check a bucket that float rounding left at 0.999.
+        """
+        if not self.requests_per_second or self.requests_per_second <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.requests_per_second) - 1
+            self._buckets[host] = (tokens, now)
+        if tokens < 0:
+            time.sleep(-tokens / self.requests_per_second)
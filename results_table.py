@@ -0,0 +1,195 @@
+import logging
+from collections.abc import Mapping
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Scalar result fields stored as their own column
+SCALAR_COLUMNS = (
+    'symbol', 'current_price', 'recommendation', 'overall_score', 'target_price', 'confidence',
+    'divergence_signal', 'divergence_score', 'technical_score', 'fundamental_score', 'potential_return',
+)
+CATEGORY_COLUMNS = ('recommendation', 'divergence_signal')
+# Whole-number scores, kept as int64 (float64 only if a row lacks one) so rows return ints like the analyzer
+INTEGER_COLUMNS = ('divergence_score', 'technical_score', 'fundamental_score')
+
+# Nested dicts are flattened to prefixed columns, e.g. technical_data['rsi_14'] -> tech_rsi_14
+NESTED_PREFIXES = {
+    'technical_data': 'tech_',
+    'fundamental_metrics': 'fund_',
+}
+
+# Same key order as the per-stock result dicts built by StockAnalyzer
+RESULT_KEYS = (
+    'symbol', 'current_price', 'recommendation', 'overall_score', 'target_price', 'confidence',
+    'divergence_signal', 'divergence_score', 'technical_score', 'fundamental_score',
+    'fundamental_metrics', 'technical_data', 'tradingview_link', 'potential_return',
+)
+
+EXPORT_COLUMNS = {
+    'symbol': 'Symbol',
+    'recommendation': 'Recommendation',
+    'current_price': 'Current Price',
+    'target_price': 'Target Price',
+    'potential_return': 'Potential Return %',
+    'overall_score': 'Overall Score',
+    'confidence': 'Confidence %',
+    'divergence_signal': 'Divergence Signal',
+    'technical_score': 'Technical Score',
+    'fundamental_score': 'Fundamental Score',
+}
+
+def tradingview_link(symbol):
+    return f"https://www.tradingview.com/chart/?symbol=NSE%3A{symbol.replace('.NS', '')}"
+
+def _numeric_column(name, values):
+    """float64 column, or int64 for INTEGER_COLUMNS holding only whole numbers"""
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'iuf':
+        series = pd.Series(values, dtype='float64')
+    else:
+        series = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').astype('float64')
+    if name in INTEGER_COLUMNS and series.notna().all() and (series == series.round()).all():
+        return series.astype('int64')
+    return series
+
+def _python_value(value):
+    """numpy scalar -> Python scalar"""
+    return value.item() if isinstance(value, np.generic) else value
+
+class ResultRow(Mapping):
+    """Read-only dict view of one table row, shaped like a per-stock result dict
+
+    Nested technical_data and fundamental_metrics dicts are rebuilt on access;
+    missing fundamental metrics come back as None as they do from the analyzer.
+    """
+
+    __slots__ = ('_table', '_position')
+
+    def __init__(self, table, position):
+        self._table = table
+        self._position = position
+
+    def __getitem__(self, key):
+        table = self._table
+        if key in NESTED_PREFIXES:
+            return {
+                name: table._value(column, self._position, none_for_nan=(key == 'fundamental_metrics'))
+                for name, column in table.nested_columns[key].items()
+            }
+        if key == 'tradingview_link':
+            return tradingview_link(table._value('symbol', self._position))
+        if key not in table.frame.columns:
+            raise KeyError(key)
+        return table._value(key, self._position)
+
+    def __iter__(self):
+        return (key for key in RESULT_KEYS if key in self)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        return key in NESTED_PREFIXES or key == 'tradingview_link' or key in self._table.frame.columns
+
+    def __repr__(self):
+        return f"ResultRow({dict(self)!r})"
+
+class ResultsTable:
+    """Columnar analysis results - one row per symbol, flattened indicator columns
+
+    Filtering, sorting and aggregation run on the DataFrame in .frame; iterating
+    yields ResultRow views so list-of-dict consumers (SMSService alerts, charts)
+    keep working unchanged. run_id identifies the StockAnalyzer run that
+    produced the rows (None if unknown); derived tables keep it.
+    """
+
+    def __init__(self, frame, run_id=None):
+        self.frame = frame.reset_index(drop=True)
+        self.run_id = run_id
+        self.nested_columns = {
+            key: {column[len(prefix):]: column for column in self.frame.columns if column.startswith(prefix)}
+            for key, prefix in NESTED_PREFIXES.items()
+        }
+        self._arrays = {}
+
+    @classmethod
+    def from_results(cls, results, run_id=None):
+        """Build a table from per-stock result dicts (or rows of another table)"""
+        results = list(results)
+        columns = {}
+        for name in SCALAR_COLUMNS:
+            values = [result.get(name) for result in results]
+            if name == 'symbol' or name in CATEGORY_COLUMNS:
+                columns[name] = pd.Series(values, dtype='category' if name in CATEGORY_COLUMNS else object)
+            else:
+                columns[name] = _numeric_column(name, values)
+
+        for key, prefix in NESTED_PREFIXES.items():
+            nested = [result.get(key) or {} for result in results]
+            names = list(dict.fromkeys(name for values in nested for name in values))
+            for name in names:
+                values = pd.Series([values.get(name) for values in nested], dtype=object)
+                columns[prefix + name] = pd.to_numeric(values, errors='coerce').astype('float64')
+
+        return cls(pd.DataFrame(columns, index=pd.RangeIndex(len(results))), run_id)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __iter__(self):
+        return (ResultRow(self, position) for position in range(len(self.frame)))
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self.frame)
+        if not 0 <= position < len(self.frame):
+            raise IndexError(position)
+        return ResultRow(self, position)
+
+    def _value(self, column, position, none_for_nan=False):
+        if column not in self._arrays:
+            self._arrays[column] = self.frame[column].to_numpy(dtype=object if column in CATEGORY_COLUMNS else None)
+        value = _python_value(self._arrays[column][position])
+        if none_for_nan and isinstance(value, float) and np.isnan(value):
+            return None
+        return value
+
+    def filter(self, mask):
+        """Rows where the boolean mask (array or Series aligned with .frame) is true"""
+        return ResultsTable(self.frame[np.asarray(mask, dtype=bool)], self.run_id)
+
+    def slice(self, start, stop):
+        """Rows start:stop by position, e.g. one page of results"""
+        return ResultsTable(self.frame.iloc[start:stop], self.run_id)
+
+    def with_recommendation(self, *recommendations):
+        return self.filter(self.frame['recommendation'].isin(recommendations))
+
+    def sort(self, column, ascending=False):
+        """Rows sorted by a column, stable so ties keep analysis order; symbols sort without '.NS'"""
+        key = (lambda values: values.str.replace('.NS', '', regex=False)) if column == 'symbol' else None
+        return ResultsTable(self.frame.sort_values(column, ascending=ascending, kind='mergesort', key=key), self.run_id)
+
+    def with_columns(self, columns):
+        """Copy of the table with the given {name: array} columns replaced"""
+        frame = self.frame.copy()
+        for name, values in columns.items():
+            if name in CATEGORY_COLUMNS:
+                frame[name] = pd.Series(values, dtype='category')
+            else:
+                frame[name] = _numeric_column(name, values)
+        return ResultsTable(frame, self.run_id)
+
+    def recommendation_counts(self):
+        """{recommendation: count} for recommendations present in the table"""
+        counts = self.frame['recommendation'].value_counts(sort=False)
+        return {recommendation: int(count) for recommendation, count in counts.items() if count}
+
+    def export_frame(self):
+        """Flat frame with the user-facing column names used for CSV export"""
+        return self.frame[list(EXPORT_COLUMNS)].rename(columns=EXPORT_COLUMNS)
+
+    def to_records(self):
+        """Plain per-stock result dicts"""
+        return [dict(row) for row in self]
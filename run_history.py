@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+import pandas as pd
+from results_table import SCALAR_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_at REAL NOT NULL,
+    universe TEXT,
+    settings TEXT,
+    symbols INTEGER NOT NULL,
+    duration REAL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    run_at REAL NOT NULL,
+    symbol TEXT NOT NULL,
+    current_price REAL,
+    recommendation TEXT,
+    overall_score REAL,
+    target_price REAL,
+    confidence REAL,
+    divergence_signal TEXT,
+    divergence_score REAL,
+    technical_score REAL,
+    fundamental_score REAL,
+    potential_return REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_run_at ON runs(run_at);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results(run_id);
+CREATE INDEX IF NOT EXISTS idx_results_run_at ON results(run_at);
+CREATE INDEX IF NOT EXISTS idx_results_symbol ON results(symbol, run_at);
+CREATE INDEX IF NOT EXISTS idx_results_recommendation ON results(recommendation, run_at);
+CREATE INDEX IF NOT EXISTS idx_results_divergence ON results(divergence_signal, run_at);
+"""
+
+RESULT_COLUMNS = ('run_id', 'run_at') + SCALAR_COLUMNS
+
+def _timestamp(value):
+    """Epoch seconds from a datetime, date or number (None passes through)"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day).timestamp()
+    raise TypeError(f"Unsupported time value: {value!r}")
+
+class RunHistoryStore:
+    """SQLite history of analysis runs - one row per symbol per run
+
+    Rows are indexed by run time, symbol, recommendation and divergence signal
+    so history lookups are answered from disk without re-analysis. Connections
+    are opened per call, so one store can be shared across threads.
+    """
+
+    def __init__(self, path='.cache/run_history.sqlite3'):
+        self.path = path
+        self._write_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.execute("PRAGMA foreign_keys=ON")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def record_run(self, results, universe=None, settings=None, run_at=None, duration=None):
+        """Store a ResultsTable (or list of result dicts) as one run, returns its run_id"""
+        frame = results.frame if hasattr(results, 'frame') else pd.DataFrame(list(results))
+        run_at = _timestamp(run_at) or time.time()
+
+        rows = frame.reindex(columns=list(SCALAR_COLUMNS)).astype(object)
+        rows = rows.where(rows.notna(), None)
+        with self._write_lock, self._connect() as connection:
+            run_id = connection.execute(
+                "INSERT INTO runs (run_at, universe, settings, symbols, duration) VALUES (?, ?, ?, ?, ?)",
+                (run_at, universe, json.dumps(settings, sort_keys=True) if settings else None, len(rows), duration)
+            ).lastrowid
+            connection.executemany(
+                f"INSERT INTO results ({', '.join(RESULT_COLUMNS)}) VALUES ({', '.join('?' * len(RESULT_COLUMNS))})",
+                ((run_id, run_at) + row for row in rows.itertuples(index=False, name=None))
+            )
+        logger.info(f"Recorded run {run_id}: {len(rows)} results")
+        return run_id
+
+    def _query(self, sql, params=()):
+        with self._connect() as connection:
+            frame = pd.read_sql_query(sql, connection, params=params)
+        frame['run_at'] = pd.to_datetime(frame['run_at'], unit='s', utc=True)
+        return frame
+
+    def runs(self, universe=None, limit=20):
+        """Most recent runs first"""
+        where, params = ("WHERE universe = ?", (universe,)) if universe else ("", ())
+        return self._query(f"SELECT * FROM runs {where} ORDER BY run_at DESC LIMIT ?", params + (limit,))
+
+    def latest_run_id(self, universe=None):
+        runs = self.runs(universe, limit=1)
+        return int(runs['run_id'].iloc[0]) if len(runs) else None
+
+    def run_results(self, run_id):
+        """All rows of one run, in the order they were recorded"""
+        return self._query("SELECT * FROM results WHERE run_id = ? ORDER BY rowid", (run_id,))
+
+    def symbol_history(self, symbol, since=None, until=None, limit=None):
+        """One symbol's results across runs, newest first"""
+        return self._select("symbol = ?", (symbol,), since, until, limit)
+
+    def with_recommendation(self, recommendation, since=None, until=None, limit=None):
+        """Rows with a recommendation, e.g. last week's STRONG_BUY list, newest first"""
+        return self._select("recommendation = ?", (recommendation,), since, until, limit)
+
+    def with_divergence(self, divergence_signal, since=None, until=None, limit=None):
+        """Rows with a divergence signal, newest first"""
+        return self._select("divergence_signal = ?", (divergence_signal,), since, until, limit)
+
+    def _select(self, condition, params, since, until, limit):
+        conditions, params = [condition], list(params)
+        if since is not None:
+            conditions.append("run_at >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            conditions.append("run_at < ?")
+            params.append(_timestamp(until))
+        sql = f"SELECT * FROM results WHERE {' AND '.join(conditions)} ORDER BY run_at DESC, rowid"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._query(sql, params)
+
+    def prune(self, before):
+        """Delete runs older than a datetime/date/epoch, returns how many were removed"""
+        with self._write_lock, self._connect() as connection:
+            removed = connection.execute("DELETE FROM runs WHERE run_at < ?", (_timestamp(before),)).rowcount
+        return removed
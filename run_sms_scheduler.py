@@ -5,7 +5,6 @@ Standalone script to run SMS alerts scheduler
 """
 
 import logging
-import time
 from stock_analyzer import StockAnalyzer
 from sms_service import SMSService
 
@@ -23,6 +22,17 @@ def load_stock_symbols():
         logger.error("input.txt file not found")
         return []
 
+# One analyzer for the pre-warm and the alert-time refresh, so the refresh can
+# reuse the histories and fundamentals the pre-warm run kept
+alert_analyzer = None
+
+def get_alert_analyzer():
+    global alert_analyzer
+    if alert_analyzer is None:
+        alert_analyzer = StockAnalyzer()
+        alert_analyzer.keep_inputs = True
+    return alert_analyzer
+
 def analyze_stocks_for_alerts():
     """Analyze stocks and return results for alerts"""
     try:
@@ -31,10 +41,10 @@ def analyze_stocks_for_alerts():
             logger.error("No stock symbols loaded")
             return []
         
-        analyzer = StockAnalyzer()
+        analyzer = get_alert_analyzer()
         logger.info(f"Analyzing {len(symbols)} stocks for alerts...")
         
-        results = analyzer.analyze_stocks(symbols)
+        results = analyzer.analyze_stocks(symbols, as_table=True)
         logger.info(f"Analysis completed. {len(results)} stocks analyzed.")
         
         return results
@@ -43,6 +53,29 @@ def analyze_stocks_for_alerts():
         logger.error(f"Error in stock analysis: {str(e)}")
         return []
 
+def refresh_alert_results(results, prepared_at):
+    """Apply bars from sessions that closed after the pre-warm to its results
+    
+    Only the new bars are fetched (incrementally, via the price cache) and applied
+    to the pre-warm run's kept histories; fundamentals are carried over.
+    """
+    try:
+        analyzer = get_alert_analyzer()
+        if not results or analyzer.price_cache is None:
+            return None
+        if analyzer.price_cache.last_completed_session().timestamp() <= prepared_at:
+            return None
+        
+        symbols = list(results.frame['symbol'])
+        logger.info(f"New session data since pre-warm - applying new bars to {len(symbols)} stocks")
+        history = analyzer.fetch_history_batch(symbols)
+        histories = {symbol: analyzer._history_slice(history, symbol) for symbol in symbols}
+        return analyzer.rescore_table_with_bars(results, histories)
+        
+    except Exception as e:
+        logger.error(f"Error refreshing pre-warmed results: {str(e)}")
+        return None
+
 def main():
     """Main function to run SMS scheduler"""
     logger.info("Starting SMS Scheduler...")
@@ -62,13 +95,13 @@ def main():
         logger.info(f"WhatsApp: {'Enabled' if status['whatsapp_enabled'] else 'Disabled'}")
         
         # Start scheduler with analysis callback
-        sms_service.start_scheduler(analyze_stocks_for_alerts)
+        sms_service.start_scheduler(analyze_stocks_for_alerts, refresh_alert_results)
         
         logger.info("SMS Scheduler started. Press Ctrl+C to stop.")
         
         try:
-            while True:
-                time.sleep(1)
+            # The scheduler thread sleeps until its next job; just wait on it
+            sms_service.scheduler.wait()
         except KeyboardInterrupt:
             logger.info("Stopping SMS Scheduler...")
             sms_service.stop_scheduler()
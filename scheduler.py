@@ -0,0 +1,150 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+import pytz
+
+logger = logging.getLogger(__name__)
+
+EVERY_DAY = (0, 1, 2, 3, 4, 5, 6)
+WEEKDAYS = (0, 1, 2, 3, 4)  # Monday-Friday, as datetime.weekday()
+
+class ScheduledJob:
+    """One named job - runs func(*args) at a wall-clock time on the given weekdays"""
+
+    def __init__(self, name, at, func, args=(), days=EVERY_DAY):
+        self.name = name
+        self.at = _parse_time(at)
+        self.func = func
+        self.args = args
+        self.days = tuple(sorted(set(days)))
+        self.next_run = None  # tz-aware datetime
+        self.last_run = None
+
+    def next_after(self, moment, timezone):
+        """First run strictly after a tz-aware moment, in the scheduler's timezone"""
+        local = moment.astimezone(timezone)
+        for offset in range(8):
+            day = local.date() + timedelta(days=offset)
+            if day.weekday() not in self.days:
+                continue
+            # normalize() moves times that fall in a DST gap forward to a real instant
+            candidate = timezone.normalize(timezone.localize(datetime.combine(day, self.at)))
+            if candidate > local:
+                return candidate
+        raise ValueError(f"Job {self.name} has no run days")
+
+class JobScheduler:
+    """Instance-scoped scheduler for named daily/weekly jobs in a fixed timezone
+
+    The scheduler thread sleeps until the next due job (Condition.wait runs on
+    the monotonic clock) instead of polling, and is woken at once by stop() or
+    when jobs change. Jobs run one at a time on the scheduler thread, so a job
+    that should not hold up the others starts its own thread. Each thread has
+    its own stop event, so a thread still finishing a job after stop() timed
+    out exits when the job returns, even if start() has run again.
+    """
+
+    def __init__(self, timezone='Asia/Kolkata'):
+        self.timezone = pytz.timezone(timezone) if isinstance(timezone, str) else timezone
+        self._jobs = {}
+        self._condition = threading.Condition()
+        self._stopped = None  # stop event of the current thread
+        self._thread = None
+
+    def add_job(self, name, at, func, *args, days=EVERY_DAY):
+        """Schedule func(*args) at "HH:MM" or "HH:MM:SS"; re-adding a name replaces that job"""
+        job = ScheduledJob(name, at, func, args, days)
+        job.next_run = job.next_after(self.now(), self.timezone)
+        with self._condition:
+            self._jobs[name] = job
+            self._condition.notify_all()
+        logger.info(f"Job {name} scheduled for {job.next_run:%Y-%m-%d %H:%M:%S %Z}")
+        return job
+
+    def remove_job(self, name):
+        with self._condition:
+            removed = self._jobs.pop(name, None) is not None
+            self._condition.notify_all()
+        return removed
+
+    def jobs(self):
+        """{name: next run time}"""
+        with self._condition:
+            return {name: job.next_run for name, job in self._jobs.items()}
+
+    def now(self):
+        return datetime.now(self.timezone)
+
+    def seconds_until(self, at, days=EVERY_DAY):
+        """Seconds from now until the next occurrence of a wall-clock time in this timezone"""
+        now = self.now()
+        return (ScheduledJob(None, at, None, days=days).next_after(now, self.timezone) - now).total_seconds()
+
+    def start(self):
+        with self._condition:
+            if self._stopped is not None and not self._stopped.is_set():
+                return
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stopped,), name="job-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """Wake the scheduler thread and stop it; a job already running finishes first"""
+        with self._condition:
+            if self._stopped is not None:
+                self._stopped.set()
+            self._condition.notify_all()
+            thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def wait(self, timeout=None):
+        """Block until the scheduler thread exits (or timeout)"""
+        if self._thread:
+            self._thread.join(timeout)
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self, stopped):
+        while True:
+            with self._condition:
+                while not stopped.is_set():
+                    due = self._due_job()
+                    if due is not None:
+                        break
+                    self._condition.wait(self._seconds_to_next())
+                if stopped.is_set():
+                    return
+                due.last_run = self.now()
+                due.next_run = due.next_after(max(due.last_run, due.next_run), self.timezone)
+
+            try:
+                logger.info(f"Running scheduled job {due.name}")
+                due.func(*due.args)
+            except Exception as e:
+                logger.error(f"Scheduled job {due.name} failed: {str(e)}")
+
+    def _due_job(self):
+        now = self.now()
+        due = [job for job in self._jobs.values() if job.next_run <= now]
+        return min(due, key=lambda job: job.next_run) if due else None
+
+    def _seconds_to_next(self):
+        """Wait timeout until the earliest job; None (no wake-ups) when nothing is scheduled
+
+        The wall clock is re-read after every wake, so a wait that ends early
+        (clock adjustment, job change) simply computes a new timeout.
+        """
+        if not self._jobs:
+            return None
+        earliest = min(job.next_run for job in self._jobs.values())
+        return max(0.0, (earliest - self.now()).total_seconds())
+
+def _parse_time(at):
+    for fmt in ("%H:%M:%S", "%H:%M"):
+        try:
+            return datetime.strptime(at, fmt).time()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid time {at!r}, expected HH:MM or HH:MM:SS")
@@ -0,0 +1,187 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# technical_data defaults used by calculate_technical_score for missing keys
+TECHNICAL_DEFAULTS = {
+    'rsi_14': 50,
+    'macd': 0,
+    'macd_signal': 0,
+    'sma_20': 0,
+    'sma_50': 0,
+    'volume_trend': 1,
+}
+
+FUNDAMENTAL_METRICS = ('pe_ratio', 'pb_ratio', 'roe', 'profit_margin', 'revenue_growth')
+
+def python_round(values, digits):
+    """Element-wise round() with Python float semantics
+
+    np.round scales, rounds and divides, which can differ from Python's correctly
+    rounded round() when the scaled value sits on a .5 boundary; those few
+    elements are re-rounded in Python so the result is bit-for-bit identical.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, digits)
+    with np.errstate(invalid='ignore', over='ignore'):
+        scaled = values * 10.0 ** digits
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for index in zip(*np.nonzero(near_tie)):
+        rounded[index] = round(float(values[index]), digits)
+    return rounded
+
+def _column(columns, name, default, size):
+    if name in columns:
+        return np.asarray(columns[name], dtype=float)
+    return np.full(size, float(default))
+
+def _present(values):
+    """Python truthiness of a metric: None/NaN-from-None and 0 count as missing"""
+    return ~np.isnan(values) & (values != 0)
+
+def technical_scores(technical, size):
+    """Vectorized calculate_technical_score over technical_data columns"""
+    rsi = _column(technical, 'rsi_14', TECHNICAL_DEFAULTS['rsi_14'], size)
+    macd = _column(technical, 'macd', TECHNICAL_DEFAULTS['macd'], size)
+    macd_signal = _column(technical, 'macd_signal', TECHNICAL_DEFAULTS['macd_signal'], size)
+    sma_20 = _column(technical, 'sma_20', TECHNICAL_DEFAULTS['sma_20'], size)
+    sma_50 = _column(technical, 'sma_50', TECHNICAL_DEFAULTS['sma_50'], size)
+    volume_trend = _column(technical, 'volume_trend', TECHNICAL_DEFAULTS['volume_trend'], size)
+
+    # NaN comparisons are False, matching the scalar if/elif chains
+    with np.errstate(invalid='ignore'):
+        score = np.full(size, 50)
+        score += np.select([(rsi >= 30) & (rsi <= 70), rsi < 30, rsi > 70], [10, 15, -15], 0)
+        score += np.where(macd > macd_signal, 10, -10)
+        score += np.where(sma_20 > sma_50, 10, -10)
+        score += np.select([volume_trend > 1.2, volume_trend < 0.8], [5, -5], 0)
+    return np.clip(score, 0, 100)
+
+def fundamental_scores(metrics, size):
+    """Vectorized score_fundamentals over metric columns (missing metrics as NaN)"""
+    pe, pb, roe, margin, growth = (_column(metrics, name, np.nan, size) for name in FUNDAMENTAL_METRICS)
+
+    with np.errstate(invalid='ignore'):
+        has_pe, has_pb, has_roe, has_margin, has_growth = (
+            _present(values) for values in (pe, pb, roe, margin, growth)
+        )
+        score = np.full(size, 50)
+        score += np.select([has_pe & (pe >= 5) & (pe <= 25), has_pe & (pe < 5), has_pe & (pe > 40)], [10, -5, -10], 0)
+        score += np.select([has_pb & (pb < 3), has_pb & (pb > 5)], [10, -10], 0)
+        score += np.select([has_roe & (roe > 0.15), has_roe & (roe > 0.10), has_roe & (roe < 0)], [15, 10, -15], 0)
+        score += np.select([has_margin & (margin > 0.10), has_margin & (margin < 0)], [10, -10], 0)
+        score += np.select([has_growth & (growth > 0.15), has_growth & (growth < 0)], [10, -10], 0)
+    return np.clip(score, 0, 100)
+
+def recommendations(current_price, envelope_sma, divergence_signal, divergence_score,
+                    technical_score, fundamental_score, weights):
+    """Vectorized calculate_recommendation
+
+    weights is (divergence_weight, fundamental_weight, technical_weight).
+    Returns recommendation, overall_score, target_price and confidence arrays,
+    rounded exactly as the scalar path rounds them.
+    """
+    current_price = np.asarray(current_price, dtype=float)
+    envelope_sma = np.asarray(envelope_sma, dtype=float)
+    signal = np.asarray(divergence_signal, dtype=object)
+    divergence_weight, fundamental_weight, technical_weight = weights
+
+    # Same operation order as the scalar sum, so the floats are identical
+    overall = (
+        np.asarray(divergence_score, dtype=float) * divergence_weight +
+        np.asarray(fundamental_score, dtype=float) * fundamental_weight +
+        np.asarray(technical_score, dtype=float) * technical_weight
+    )
+
+    strong_bullish = signal == "STRONG_BULLISH"
+    bullish = (signal == "BULLISH") | (signal == "HIDDEN_BULLISH")
+    strong_bearish = signal == "STRONG_BEARISH"
+    bearish = (signal == "BEARISH") | (signal == "HIDDEN_BEARISH")
+    neutral = ~(strong_bullish | bullish | strong_bearish | bearish)
+    with np.errstate(invalid='ignore'):
+        below_envelope = current_price <= envelope_sma
+
+    # (condition, recommendation, target multiplier, confidence) in scalar branch order
+    hold_confidence = np.minimum(70, 60 + (overall - 50) / 3)
+    bullish_confidence = np.minimum(85, 70 + (overall - 60) / 2)
+    bearish_confidence = np.minimum(85, 70 + (40 - overall) / 2)
+    neutral_confidence = np.minimum(80, 50 + np.abs(overall - 50) / 2)
+    branches = [
+        (strong_bullish & below_envelope, "STRONG_BUY", 1.15, np.minimum(95, 80 + (overall - 70) / 2)),
+        (strong_bullish, "HOLD", None, hold_confidence),
+        (bullish & below_envelope & (overall >= 65), "BUY", 1.12, bullish_confidence),
+        (bullish & below_envelope, "WEAK_BUY", 1.08, bullish_confidence),
+        (bullish & (overall >= 65), "HOLD", None, hold_confidence),
+        (bullish, "WEAK_SELL", 0.95, hold_confidence),
+        (strong_bearish, "STRONG_SELL", 0.85, np.minimum(95, 80 + (30 - overall) / 2)),
+        (bearish & (overall <= 35), "SELL", 0.88, bearish_confidence),
+        (bearish, "WEAK_SELL", 0.95, bearish_confidence),
+        (neutral & (overall >= 75), "STRONG_BUY", 1.15, neutral_confidence),
+        (neutral & (overall >= 65), "BUY", 1.12, neutral_confidence),
+        (neutral & (overall >= 55), "WEAK_BUY", 1.08, neutral_confidence),
+        (neutral & (overall >= 45), "HOLD", None, neutral_confidence),
+        (neutral & (overall >= 35), "WEAK_SELL", 0.95, neutral_confidence),
+        (neutral & (overall >= 25), "SELL", 0.88, neutral_confidence),
+        (neutral, "STRONG_SELL", 0.85, neutral_confidence),
+    ]
+    conditions = [condition for condition, _, _, _ in branches]
+    recommendation = np.select(conditions, [label for _, label, _, _ in branches], "HOLD").astype(object)
+    target_price = np.select(
+        conditions,
+        [current_price if multiplier is None else current_price * multiplier for _, _, multiplier, _ in branches],
+        current_price
+    )
+    confidence = np.select(conditions, [value for _, _, _, value in branches], 50.0)
+
+    # The scalar path's price is an np.float64 (numpy rounding); scores are Python floats
+    return recommendation, python_round(overall, 1), np.round(target_price, 2), python_round(confidence, 1)
+
+def score_universe(columns, weights):
+    """Score a whole universe in array operations
+
+    columns maps names to equal-length arrays:
+      current_price, divergence_signal, divergence_score - required
+      technical_data keys (rsi_14, macd, ..., envelope_sma) - missing ones take
+        the scalar defaults
+      fundamental_metrics keys (pe_ratio, ...) with NaN for missing, or a
+        precomputed fundamental_score column
+      technical_score - optional precomputed column, used instead of the
+        technical_data keys
+
+    Returns a dict of arrays with the same values analyze_single_stock puts in
+    each result: technical_score, fundamental_score, overall_score,
+    recommendation, target_price, confidence, current_price, potential_return.
+    """
+    current_price = np.asarray(columns['current_price'], dtype=float)
+    size = len(current_price)
+
+    if 'technical_score' in columns:
+        technical_score = np.asarray(columns['technical_score'])
+    else:
+        technical_score = technical_scores(columns, size)
+    if 'fundamental_score' in columns:
+        fundamental_score = np.asarray(columns['fundamental_score'])
+    else:
+        fundamental_score = fundamental_scores(columns, size)
+    envelope_sma = columns['envelope_sma'] if 'envelope_sma' in columns else current_price
+
+    recommendation, overall_score, target_price, confidence = recommendations(
+        current_price, envelope_sma, columns['divergence_signal'], columns['divergence_score'],
+        technical_score, fundamental_score, weights
+    )
+    with np.errstate(invalid='ignore', divide='ignore'):
+        potential_return = np.where(
+            target_price != 0, np.round(((target_price - current_price) / current_price) * 100, 2), 0
+        )
+
+    return {
+        'technical_score': technical_score,
+        'fundamental_score': fundamental_score,
+        'overall_score': overall_score,
+        'recommendation': recommendation,
+        'target_price': target_price,
+        'confidence': confidence,
+        'current_price': np.round(current_price, 2),
+        'potential_return': potential_return,
+    }
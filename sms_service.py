@@ -1,13 +1,14 @@
 import os
+import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 from twilio.rest import Client
 from twilio.http.http_client import TwilioHttpClient
 import requests
-import schedule
 import time
 import threading
+from scheduler import JobScheduler, EVERY_DAY
 from dotenv import load_dotenv
 import ssl
 import certifi
@@ -80,7 +81,19 @@ class SMSService:
             self.client = None
             
         self.scheduler_running = False
-        self.scheduler_thread = None
+        self.scheduler = JobScheduler(self.timezone)  # per instance; alert_time is in self.timezone
+        
+        # Pre-warming: the analysis starts ahead of alert_time by the measured duration
+        # of recent runs, so the alert itself goes out on time
+        self.prewarm_safety_factor = 1.5
+        self.prewarm_margin = 120  # seconds on top of the scaled duration
+        self.prewarm_default_lead = 15 * 60  # until a run has been measured
+        self.prewarm_max_age = 6 * 3600  # older pre-warmed results are recomputed at alert time
+        self.run_durations_path = '.cache/alert_run_durations.json'
+        self.run_durations = self._load_run_durations()
+        self.prewarm_enabled = True  # False while the running callback only returns stored results
+        self._prewarmed = None  # (results, prepared_at - epoch seconds when the run started)
+        self._prewarm_thread = None
     
     def _get_config(self, key, default=None):
         """Get configuration from Streamlit secrets or environment variables"""
@@ -303,38 +316,118 @@ TradingView: {tradingview_link}"""
         except Exception as e:
             return False, f"Test failed: {str(e)}"
     
-    def start_scheduler(self, analysis_callback):
-        """Start the scheduled alert system"""
+    def start_scheduler(self, analysis_callback, refresh_callback=None, prewarm=True):
+        """Start the scheduled alert system
+        
+        analysis_callback() runs ahead of alert_time (see prewarm_lead_seconds) and
+        its results are sent at alert_time. refresh_callback(results, prepared_at),
+        if given, runs at alert_time and returns updated results when newer market
+        data arrived after the pre-warm, or None to send the pre-warmed ones.
+        
+        Pass prewarm=False when analysis_callback only returns results computed
+        elsewhere (e.g. the dashboard's last analysis): it then runs at alert_time
+        and is not timed, so it does not shorten the lead of real analyses.
+        """
         if self.scheduler_running:
             logger.info("Scheduler already running")
             return
-            
-        def run_scheduler():
-            schedule.every().day.at(self.alert_time).do(self._scheduled_alert, analysis_callback)
-            logger.info(f"Scheduler started - alerts at {self.alert_time} {self.timezone}")
-            
-            while self.scheduler_running:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
-                
+        
+        self.prewarm_enabled = prewarm
+        self.scheduler.add_job('alert', self.alert_time, self._scheduled_alert, analysis_callback, refresh_callback)
+        if prewarm:
+            self._schedule_prewarm(analysis_callback)
+        self.scheduler.start()
         self.scheduler_running = True
-        self.scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-        self.scheduler_thread.start()
-        logger.info("SMS scheduler started")
+        if not prewarm:
+            logger.info(f"SMS scheduler started - alerts at {self.alert_time} {self.timezone}")
+            return
+        logger.info(f"SMS scheduler started - alerts at {self.alert_time} {self.timezone}, "
+                    f"analysis starts {self.prewarm_lead_seconds() / 60:.0f} min earlier")
+        
+        # Started inside the pre-warm window - begin today's analysis now
+        if self.scheduler.seconds_until(self.alert_time) <= self.prewarm_lead_seconds():
+            self._prewarm(analysis_callback)
     
     def stop_scheduler(self):
-        """Stop the scheduled alert system"""
+        """Stop the scheduled alert system - only this service's jobs are removed"""
         self.scheduler_running = False
-        schedule.clear()
+        self.scheduler.stop(timeout=5)
+        for name in ('alert', 'prewarm'):
+            self.scheduler.remove_job(name)
         logger.info("SMS scheduler stopped")
     
-    def _scheduled_alert(self, analysis_callback):
+    def schedule_job(self, name, at, func, *args, days=EVERY_DAY):
+        """Add a named job (e.g. pre-open, close, weekly) to this service's scheduler
+        
+        at is "HH:MM" or "HH:MM:SS" in SMS_ALERT_TIMEZONE; days are datetime.weekday()
+        numbers, e.g. scheduler.WEEKDAYS or (4,) for Fridays.
+        """
+        return self.scheduler.add_job(name, at, func, *args, days=days)
+    
+    def prewarm_lead_seconds(self):
+        """How long before alert_time the analysis starts - slowest recent run, scaled, plus a margin"""
+        recent = self.run_durations[-5:]
+        if not recent:
+            return self.prewarm_default_lead
+        return max(recent) * self.prewarm_safety_factor + self.prewarm_margin
+    
+    def _schedule_prewarm(self, analysis_callback):
+        """(Re)schedule the daily pre-warm job from the current lead time"""
+        alert_at = datetime.strptime(self.alert_time, "%H:%M")
+        prewarm_at = (alert_at - timedelta(seconds=self.prewarm_lead_seconds())).strftime("%H:%M:%S")
+        self.scheduler.add_job('prewarm', prewarm_at, self._prewarm, analysis_callback)
+    
+    def _prewarm(self, analysis_callback):
+        """Start the analysis on its own thread so the scheduler loop keeps ticking"""
+        if self._prewarm_thread and self._prewarm_thread.is_alive():
+            logger.info("Pre-warm analysis already running")
+            return
+        
+        def prewarm():
+            try:
+                # Taken before the run: a session that closes while it fetches is not in its data
+                prepared_at = time.time()
+                results = self._run_analysis(analysis_callback)
+                self._prewarmed = (results, prepared_at)
+                logger.info("Pre-warmed analysis ready for the scheduled alert")
+            except Exception as e:
+                logger.error(f"Error in pre-warm analysis: {str(e)}")
+        
+        self._prewarm_thread = threading.Thread(target=prewarm, name="alert-prewarm", daemon=True)
+        self._prewarm_thread.start()
+    
+    def _run_analysis(self, analysis_callback):
+        """Run the analysis callback and record how long it took"""
+        started = time.time()
+        results = analysis_callback()
+        duration = time.time() - started
+        self.run_durations = (self.run_durations + [duration])[-20:]
+        self._save_run_durations()
+        logger.info(f"Alert analysis took {duration:.1f}s; next pre-warm lead {self.prewarm_lead_seconds() / 60:.1f} min")
+        return results
+    
+    def _scheduled_alert(self, analysis_callback, refresh_callback=None):
         """Internal method for scheduled alerts"""
         try:
-            logger.info("Running scheduled analysis for alerts")
+            if self._prewarm_thread and self._prewarm_thread.is_alive():
+                logger.warning("Pre-warm analysis still running at alert time - waiting for it")
+                self._prewarm_thread.join()
             
-            # Get current analysis results
-            analysis_results = analysis_callback()
+            prewarmed, self._prewarmed = self._prewarmed, None
+            if prewarmed and time.time() - prewarmed[1] <= self.prewarm_max_age:
+                analysis_results, prepared_at = prewarmed
+                
+                # Freshness guard - pick up market data that arrived after the pre-warm
+                if refresh_callback:
+                    refreshed = refresh_callback(analysis_results, prepared_at)
+                    if refreshed is not None:
+                        logger.info("Newer market data since pre-warm - sending refreshed results")
+                        analysis_results = refreshed
+            elif self.prewarm_enabled:
+                logger.info("No pre-warmed results - running scheduled analysis for alerts")
+                analysis_results = self._run_analysis(analysis_callback)
+            else:
+                analysis_results = analysis_callback()
             
             if analysis_results:
                 # Send summary message first
@@ -348,6 +441,32 @@ TradingView: {tradingview_link}"""
                 
         except Exception as e:
             logger.error(f"Error in scheduled alert: {str(e)}")
+        finally:
+            # Tomorrow's pre-warm uses the durations measured so far
+            if self.scheduler_running and self.prewarm_enabled:
+                self._schedule_prewarm(analysis_callback)
+    
+    def _load_run_durations(self):
+        try:
+            with open(self.run_durations_path) as f:
+                return [float(duration) for duration in json.load(f)]
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logger.warning(f"Discarding unreadable alert run durations: {str(e)}")
+            return []
+    
+    def _save_run_durations(self):
+        try:
+            directory = os.path.dirname(self.run_durations_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.run_durations_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.run_durations, f)
+            os.replace(tmp_path, self.run_durations_path)
+        except Exception as e:
+            logger.warning(f"Could not write alert run durations: {str(e)}")
     
     def _create_summary_message(self, analysis_results):
         """Create summary message for daily alerts"""
@@ -385,10 +504,13 @@ Top alerts will follow..."""
         status = {
             'client_initialized': self.client is not None,
             'scheduler_running': self.scheduler_running,
+            'scheduled_jobs': {name: f"{when:%Y-%m-%d %H:%M:%S}" for name, when in self.scheduler.jobs().items()},
             'sms_enabled': self.sms_enabled,
             'whatsapp_enabled': self.use_whatsapp,
             'alert_time': self.alert_time,
-            'timezone': self.timezone
+            'timezone': self.timezone,
+            'prewarm_lead_minutes': round(self.prewarm_lead_seconds() / 60, 1),
+            'prewarmed_at': datetime.fromtimestamp(self._prewarmed[1]).strftime('%H:%M') if self._prewarmed else None
         }
         return status
     
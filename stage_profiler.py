@@ -0,0 +1,137 @@
+import time
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class _NullStage:
+    """Shared no-op context returned while profiling is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_STAGE = _NullStage()
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'symbol', 'start')
+
+    def __init__(self, profiler, name, symbol):
+        self.profiler = profiler
+        self.name = name
+        self.symbol = symbol
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.start, self.symbol)
+        return False
+
+class StageProfiler:
+    """Per-run stage timers and counters, aggregated into p50/p95/max per stage
+
+    Disabled by default; stage() then returns a shared no-op context so the
+    instrumented code pays one attribute check per stage.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start a new run"""
+        with self._lock:
+            self._samples = {}
+            self._counters = {}
+            self._started = time.perf_counter()
+            self._wall = None
+
+    def finish(self):
+        """Mark the end of the run, fixing its wall time"""
+        self._wall = time.perf_counter() - self._started
+
+    def stage(self, name, symbol=None):
+        """Context manager timing one stage, optionally attributed to a symbol"""
+        if not self.enabled:
+            return NULL_STAGE
+        return _Stage(self, name, symbol)
+
+    def record(self, name, seconds, symbol=None):
+        with self._lock:
+            self._samples.setdefault(name, []).append((seconds, symbol))
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def export(self):
+        """Raw samples and counters, e.g. to send back from a worker process"""
+        with self._lock:
+            return {
+                'samples': {name: list(samples) for name, samples in self._samples.items()},
+                'counters': dict(self._counters),
+            }
+
+    def merge(self, exported):
+        """Add samples and counters exported by another profiler"""
+        if not exported:
+            return
+        with self._lock:
+            for name, samples in exported['samples'].items():
+                self._samples.setdefault(name, []).extend(samples)
+            for name, amount in exported['counters'].items():
+                self._counters[name] = self._counters.get(name, 0) + amount
+
+    def summary(self, slowest=5):
+        """Aggregate the run: per-stage count/total/p50/p95/max, counters and slowest symbols
+
+        Stage times of concurrent symbols overlap, so stage totals can exceed wall time.
+        """
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+            counters = dict(self._counters)
+
+        stages = {}
+        per_symbol = {}
+        for name, values in samples.items():
+            seconds = np.array([value for value, _ in values])
+            p50, p95 = np.percentile(seconds, [50, 95])
+            stages[name] = {
+                'count': len(seconds),
+                'total': float(seconds.sum()),
+                'p50': float(p50),
+                'p95': float(p95),
+                'max': float(seconds.max()),
+            }
+            for value, symbol in values:
+                if symbol is not None:
+                    per_symbol.setdefault(symbol, {})
+                    per_symbol[symbol][name] = per_symbol[symbol].get(name, 0.0) + value
+
+        ranked = sorted(per_symbol.items(), key=lambda item: sum(item[1].values()), reverse=True)
+        return {
+            'wall_seconds': self._wall if self._wall is not None else time.perf_counter() - self._started,
+            'stages': stages,
+            'counters': counters,
+            'slowest_symbols': [
+                {'symbol': symbol, 'seconds': sum(times.values()), 'stages': times}
+                for symbol, times in ranked[:slowest]
+            ],
+        }
+
+    def log_summary(self):
+        summary = self.summary()
+        for name, stats in summary['stages'].items():
+            logger.info(f"Stage {name}: n={stats['count']} total={stats['total']:.3f}s "
+                        f"p50={stats['p50'] * 1000:.1f}ms p95={stats['p95'] * 1000:.1f}ms max={stats['max'] * 1000:.1f}ms")
+        if summary['slowest_symbols']:
+            slowest = ', '.join(f"{entry['symbol']} {entry['seconds']:.3f}s" for entry in summary['slowest_symbols'])
+            logger.info(f"Slowest symbols: {slowest}")
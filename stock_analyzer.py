@@ -1,17 +1,46 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from ta import add_all_ta_features
 import logging
+import queue
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 import warnings
+from rate_limiter import HostRateLimiter
+from data_providers import YFinanceProvider
+from price_cache import PriceCache
+from fundamentals_cache import FundamentalsCache
+from stage_profiler import StageProfiler
+from results_table import ResultsTable, NESTED_PREFIXES
+from scoring import score_universe
+from indicators import TECHNICAL_INDICATORS, FeatureContext
+from streaming_indicators import IndicatorStream
+from panel_indicators import (
+    align_histories, compute_panel_indicators, latest_technical_data, knox_divergence, pct_change, rolling_mean,
+    simple_rsi
+)
 warnings.filterwarnings('ignore')
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Attributes that change analysis output - see StockAnalyzer.settings()
+SETTING_NAMES = (
+    'envelope_length', 'envelope_percent', 'knox_bars_back', 'knox_rsi_period', 'knox_momentum_period',
+    'divergence_weight', 'fundamental_weight', 'technical_weight',
+)
+
+# History columns kept per symbol for re-scoring (reanalyze_table, rescore_table_with_bars)
+KEPT_COLUMNS = ['High', 'Low', 'Close', 'Volume']
+
 class StockAnalyzer:
-    def __init__(self):
+    def __init__(self, provider=None, use_caches=True):
+        # Market data source - yfinance unless another MarketDataProvider is given
+        self.provider = provider or YFinanceProvider()
+        use_caches = use_caches and self.provider.cacheable
+        
         # Technical indicator settings
         self.envelope_length = 200
         self.envelope_percent = 14
@@ -24,156 +53,702 @@ class StockAnalyzer:
         self.fundamental_weight = 0.30
         self.technical_weight = 0.10
         
-    def analyze_stocks(self, symbols):
-        """Main analysis method - returns list of stock analysis results"""
-        results = []
+        # Concurrency settings - max_workers=1 keeps the sequential loop
+        self.max_workers = 8
+        self.rate_limiter = HostRateLimiter(requests_per_second=10)
+        
+        # History download settings
+        self.history_period = "1y"
+        self.use_batch_download = True
+        self.batch_chunk_size = 50
+        self.batch_max_retries = 2
+        
+        # Compute indicators for all batch-fetched symbols in one vectorized pass;
+        # calculate_technical_indicators remains the per-symbol reference path
+        self.use_panel_indicators = True
+        
+        # On-disk OHLCV cache - set to None to always download the full period
+        self.price_cache = PriceCache() if use_caches else None
+        
+        # Fundamentals cache with per-field TTLs - refreshed independently of prices
+        self.fundamentals_cache = FundamentalsCache() if use_caches else None
+        
+        # Two-stage pipeline: threaded fetch stage feeding a process pool for the CPU stage
+        self.use_process_pool = False
+        self.process_workers = None  # None = one per CPU
+        self.pipeline_queue_size = 64
+        
+        # Per-stage timers and counters for each analyze_stocks run - see profiler.summary()
+        self.profiler = StageProfiler(enabled=False)
+        
+        # {symbol: (cleaned history, fundamental_score, fundamental_metrics)} from the last run,
+        # so reanalyze_table can apply new settings without fetching anything. last_run_id tags
+        # the tables that run produced; only those can be re-scored from these inputs. Off by
+        # default - a run then holds no history once each symbol is analyzed; when on, only the
+        # KEPT_COLUMNS of each history are kept.
+        self.keep_inputs = False
+        self.last_inputs = {}
+        self.last_run_id = None
+        
+    def analyze_stocks(self, symbols, max_workers=None, price_only=False, as_table=False):
+        """Main analysis method - returns list of stock analysis results in input order
+        
+        price_only=True (e.g. intraday refreshes) scores fundamentals from the cache
+        only and never calls the fundamentals endpoint. as_table=True returns a
+        columnar ResultsTable instead of a list of dicts.
+        """
+        self._start_run()
+        if self.use_process_pool:
+            from pipeline import AnalysisPipeline
+            results = AnalysisPipeline(self, fetch_workers=max_workers).run(symbols, price_only)
+        else:
+            results = self._analyze_threaded(symbols, max_workers, price_only)
+        return ResultsTable.from_results(results, self.last_run_id) if as_table else results
+    
+    def _start_run(self):
+        """Reset per-run state - profile, kept inputs and a new run id"""
+        self.profiler.reset()
+        self.last_inputs = {}
+        self.last_run_id = uuid.uuid4().hex
+    
+    def _analyze_threaded(self, symbols, max_workers=None, price_only=False):
+        """Batch fetch, panel indicators, then per-symbol analysis on a thread pool"""
         total_stocks = len(symbols)
+        workers = self.max_workers if max_workers is None else max_workers
+        workers = max(1, min(workers or 1, total_stocks or 1))
         
-        logger.info(f"Analyzing {total_stocks} stocks...")
+        histories, technical_data, prepared = self._prepare_batch(symbols)
         
-        for i, symbol in enumerate(symbols):
-            try:
-                logger.info(f"Analyzing {symbol} ({i+1}/{total_stocks})")
-                result = self.analyze_single_stock(symbol)
-                if result:
-                    results.append(result)
-            except Exception as e:
-                logger.error(f"Error analyzing {symbol}: {str(e)}")
-                continue
-                
+        logger.info(f"Analyzing {total_stocks} stocks with {workers} worker(s)...")
+        
+        if workers == 1:
+            analyzed = [
+                self._analyze_symbol_safely(symbol, i, total_stocks, hist, price_only, tech, is_prepared)
+                for i, (symbol, hist, tech, is_prepared) in enumerate(zip(symbols, histories, technical_data, prepared))
+            ]
+        else:
+            # Pool size bounds concurrency; map() yields results in submission order
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyzer") as executor:
+                analyzed = list(executor.map(
+                    self._analyze_symbol_safely, symbols, range(total_stocks), [total_stocks] * total_stocks,
+                    histories, [price_only] * total_stocks, technical_data, prepared
+                ))
+        
+        if self.fundamentals_cache:
+            self.fundamentals_cache.flush()
+            logger.info(f"Fundamentals cache: {self.fundamentals_cache.stats()}")
+        
+        results = [result for result in analyzed if result]
         logger.info(f"Analysis completed. {len(results)} stocks analyzed successfully.")
+        self._finish_profile(total_stocks, len(results))
         return results
     
-    def analyze_single_stock(self, symbol):
-        """Analyze individual stock with technical and fundamental analysis"""
+    def _prepare_batch(self, symbols):
+        """Batch fetch and panel indicators for symbols - returns per-symbol (histories, technical_data, prepared) lists
+        
+        prepared marks histories already cleaned here (None when too short), so
+        fetch_inputs does not clean them again. Other entries are None where the
+        batch had no data (the symbol is then fetched on its own) or where the
+        panel could not compute indicators.
+        """
+        # Batch stage: one wide frame for the whole list, sliced per symbol below
+        with self.profiler.stage('batch_fetch'):
+            history = self.fetch_history_batch(symbols) if self.use_batch_download else None
+            histories = [self._history_slice(history, symbol) for symbol in symbols]
+        
+        # Panel stage: technical indicators for every fetched symbol in one pass
+        technical = {}
+        prepared_flags = [False] * len(symbols)
+        if self.use_panel_indicators:
+            prepared = {}
+            for symbol, hist in zip(symbols, histories):
+                if hist is not None:
+                    with self.profiler.stage('clean', symbol):
+                        cleaned = self._prepare_history(symbol, hist)
+                    if cleaned is not None:
+                        prepared[symbol] = cleaned
+            with self.profiler.stage('panel_indicators'):
+                technical = self.calculate_technical_indicators_panel(prepared)
+            prepared_flags = [hist is not None for hist in histories]
+            histories = [prepared.get(symbol) for symbol in symbols]
+        return histories, [technical.get(symbol) for symbol in symbols], prepared_flags
+    
+    def iter_analyze(self, symbols, max_workers=None, price_only=False):
+        """Yield (symbol, result) for every symbol as soon as its analysis finishes
+        
+        Results arrive in completion order; result is None for symbols that could
+        not be analyzed. History is fetched one batch_chunk_size chunk at a time,
+        so the first chunk is being analyzed while later chunks download.
+        Build the final table with ResultsTable.from_results(results, analyzer.last_run_id)
+        so it can be re-scored later.
+        """
+        self._start_run()
+        if self.use_process_pool:
+            from pipeline import AnalysisPipeline
+            yield from AnalysisPipeline(self, fetch_workers=max_workers).iter_run(symbols, price_only)
+            return
+        
+        total_stocks = len(symbols)
+        workers = self.max_workers if max_workers is None else max_workers
+        workers = max(1, min(workers or 1, total_stocks or 1))
+        completed = queue.Queue()
+        stop = threading.Event()
+        
+        def submit_chunks(executor):
+            index = 0
+            chunks = deque()
+            for start in range(0, total_stocks, self.batch_chunk_size):
+                # Backpressure: download a chunk only once the chunk before the previous one
+                # is analyzed, so at most two chunks of history are held at a time
+                while len(chunks) > 1:
+                    wait(chunks.popleft())
+                if stop.is_set():
+                    break
+                chunk = symbols[start:start + self.batch_chunk_size]
+                try:
+                    histories, technical_data, prepared = self._prepare_batch(chunk)
+                except Exception as e:
+                    logger.error(f"Error preparing batch of {len(chunk)} symbols: {str(e)}")
+                    histories, technical_data, prepared = [None] * len(chunk), [None] * len(chunk), [False] * len(chunk)
+                futures = []
+                for symbol, hist, tech, is_prepared in zip(chunk, histories, technical_data, prepared):
+                    future = executor.submit(
+                        self._analyze_symbol_safely, symbol, index, total_stocks, hist, price_only, tech, is_prepared
+                    )
+                    future.symbol = symbol
+                    future.add_done_callback(completed.put)
+                    futures.append(future)
+                    index += 1
+                chunks.append(futures)
+        
+        analyzed = 0
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyzer")
+        producer = threading.Thread(target=submit_chunks, args=(executor,), name="analyzer-batches", daemon=True)
+        producer.start()
         try:
-            # Fetch stock data with retries
-            stock = yf.Ticker(symbol)
-            hist = stock.history(period="1y", auto_adjust=True, prepost=True)
-            
-            if hist.empty or len(hist) < 50:
-                logger.warning(f"Insufficient data for {symbol}")
-                return None
+            for _ in range(total_stocks):
+                future = completed.get()
+                result = future.result() if not future.cancelled() else None
+                analyzed += 1 if result else 0
+                yield future.symbol, result
+        finally:
+            # Consumer stopped early or finished - stop submitting and drop queued work
+            stop.set()
+            producer.join()
+            executor.shutdown(wait=True, cancel_futures=True)
+            if self.fundamentals_cache:
+                self.fundamentals_cache.flush()
+            self._finish_profile(total_stocks, analyzed)
+    
+    def _finish_profile(self, total_stocks, analyzed):
+        """Close the run's profile and log it when profiling is enabled"""
+        self.profiler.finish()
+        if self.profiler.enabled:
+            self.profiler.count('symbols', total_stocks)
+            self.profiler.count('analyzed', analyzed)
+            self.profiler.count('failed', total_stocks - analyzed)
+            self.profiler.log_summary()
+    
+    def _analyze_symbol_safely(self, symbol, index, total_stocks, hist=None, price_only=False, technical_data=None,
+                               prepared=False):
+        """Analyze one symbol, isolating any failure to that symbol"""
+        try:
+            logger.info(f"Analyzing {symbol} ({index+1}/{total_stocks})")
+            return self.analyze_single_stock(symbol, hist, price_only, technical_data, prepared)
+        except Exception as e:
+            logger.error(f"Error analyzing {symbol}: {str(e)}")
+            return None
+    
+    def fetch_history_batch(self, symbols):
+        """Load history for all symbols into one wide (symbol, field) frame
+        
+        Symbols whose cache covers the last session are read from disk, stale ones
+        download only the missing range and uncached ones the full period.
+        """
+        frames = {}
+        stale = {}
+        incremental = {}
+        full_fetch = []
+        
+        for symbol in dict.fromkeys(symbols):
+            cached = self.price_cache.load(symbol) if self.price_cache else None
+            if cached is None:
+                full_fetch.append(symbol)
+            elif self.price_cache.is_fresh(symbol, cached):
+                frames[symbol] = cached
+            else:
+                stale[symbol] = cached
+                incremental.setdefault(self.price_cache.refresh_start(cached, symbol), []).append(symbol)
+        
+        for start, group in incremental.items():
+            downloaded = self._download_batch(group, start=start)
+            for symbol in group:
+                if symbol not in downloaded:
+                    # Download failed - analyze the stale bars rather than nothing
+                    frames[symbol] = stale[symbol]
+                    continue
+                merged = self.price_cache.merge(symbol, stale[symbol], downloaded[symbol])
+                if merged is None:
+                    full_fetch.append(symbol)
+                else:
+                    frames[symbol] = merged
+        
+        if full_fetch:
+            downloaded = self._download_batch(full_fetch, period=self.history_period)
+            for symbol, hist in downloaded.items():
+                frames[symbol] = self.price_cache.merge(symbol, None, hist) if self.price_cache else hist
+        
+        logger.info(f"History: {len(symbols) - len(stale) - len(full_fetch)} from cache, "
+                    f"{len(stale)} incremental, {len(full_fetch)} full downloads")
+        
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+    
+    def _download_batch(self, symbols, **download_kwargs):
+        """Download symbols in chunks, retrying only the missing ones - returns {symbol: frame}"""
+        frames = {}
+        pending = list(symbols)
+        
+        for attempt in range(self.batch_max_retries + 1):
+            if not pending:
+                break
+            if attempt > 0:
+                logger.info(f"Retrying batch download for {len(pending)} missing symbols (attempt {attempt + 1})")
             
-            # Ensure we have all required columns
-            required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            for col in required_columns:
-                if col not in hist.columns:
-                    if col == 'Volume':
-                        # Create synthetic volume if missing
-                        hist['Volume'] = (hist['High'] - hist['Low']) / hist['Close'] * 1000000
-                        logger.warning(f"Volume data missing for {symbol}, created synthetic volume")
-                    elif col == 'Open':
-                        hist['Open'] = hist['Close'].shift(1).fillna(hist['Close'])
+            missing = []
+            for start in range(0, len(pending), self.batch_chunk_size):
+                chunk = pending[start:start + self.batch_chunk_size]
+                try:
+                    self._throttle()
+                    downloaded = self.provider.get_history_batch(chunk, **download_kwargs)
+                except Exception as e:
+                    logger.warning(f"Batch download failed for chunk of {len(chunk)} symbols: {str(e)}")
+                    downloaded = {}
+                
+                # Keep the symbols that came back; only the missing ones are retried
+                for symbol in chunk:
+                    if symbol in downloaded:
+                        frames[symbol] = downloaded[symbol]
                     else:
-                        logger.warning(f"Missing {col} data for {symbol}")
-                        return None
-            
-            # Clean data - remove any rows with NaN values in critical columns
-            hist = hist.dropna(subset=['Close', 'High', 'Low'])
-            hist['Volume'] = hist['Volume'].fillna(1000000)  # Fill volume NaNs with default
-            
-            if len(hist) < 50:
-                logger.warning(f"Insufficient clean data for {symbol}")
+                        missing.append(symbol)
+            pending = missing
+        
+        if pending:
+            logger.warning(f"Batch download missing {len(pending)} symbols: {', '.join(pending)}")
+        return frames
+    
+    def _history_slice(self, history, symbol):
+        """Return one symbol's rows from the wide batch frame, None if not present"""
+        if history is None or history.empty or symbol not in history.columns.get_level_values(0):
+            return None
+        return history[symbol].dropna(how='all')
+    
+    def analyze_single_stock(self, symbol, hist=None, price_only=False, technical_data=None, prepared=False):
+        """Analyze individual stock with technical and fundamental analysis
+        
+        When hist is given (a slice of the batch frame) no history request is made;
+        technical_data may be passed in precomputed by the panel indicator pass.
+        """
+        try:
+            inputs = self.fetch_inputs(symbol, hist, price_only, prepared)
+            if inputs is None:
                 return None
-                
-            # Get current price
-            current_price = hist['Close'].iloc[-1]
             
-            # Calculate technical indicators
-            technical_data = self.calculate_technical_indicators(hist)
+            hist, fundamental_score, fundamental_metrics = inputs
+            return self.analyze_prefetched(symbol, hist, fundamental_score, fundamental_metrics, technical_data)
             
-            # Detect Knox divergence (primary signal)
-            divergence_signal, divergence_score = self.detect_knox_divergence(hist)
-            
-            # Get fundamental data
-            fundamental_score, fundamental_metrics = self.get_fundamental_data(symbol, stock)
-            
-            # Calculate technical score
-            technical_score = self.calculate_technical_score(technical_data)
+        except Exception as e:
+            logger.error(f"Error in single stock analysis for {symbol}: {str(e)}")
+            return None
+    
+    def fetch_inputs(self, symbol, hist=None, price_only=False, prepared=False):
+        """I/O stage - cleaned history plus fundamentals, None if history is insufficient
+        
+        prepared=True means hist was already cleaned (None if it was too short).
+        """
+        if not prepared:
+            if hist is None:
+                with self.profiler.stage('fetch', symbol):
+                    hist = self._fetch_history(symbol)
             
-            # Calculate final recommendation
-            recommendation, overall_score, target_price, confidence = self.calculate_recommendation(
-                technical_score, fundamental_score, divergence_signal, divergence_score, current_price, technical_data
+            with self.profiler.stage('clean', symbol):
+                hist = self._prepare_history(symbol, hist)
+        if hist is None:
+            return None
+        
+        # Get fundamental data
+        with self.profiler.stage('fundamentals', symbol):
+            fundamental_score, fundamental_metrics = self.get_fundamental_data(
+                symbol, allow_fetch=not price_only, price=hist['Close'].iloc[-1]
+            )
+        if self.keep_inputs:
+            self.last_inputs[symbol] = (hist[KEPT_COLUMNS], fundamental_score, fundamental_metrics)
+        return hist, fundamental_score, fundamental_metrics
+    
+    def analyze_prefetched(self, symbol, hist, fundamental_score, fundamental_metrics, technical_data=None):
+        """CPU stage - indicators, Knox divergence and scoring on a cleaned history, no I/O"""
+        # Get current price
+        current_price = hist['Close'].iloc[-1]
+        
+        # Derived series are shared between the indicator and divergence stages
+        context = FeatureContext(hist)
+        
+        # Calculate technical indicators
+        if technical_data is None:
+            with self.profiler.stage('technical_indicators', symbol):
+                technical_data = self.calculate_technical_indicators(context)
+        
+        # Detect Knox divergence (primary signal)
+        with self.profiler.stage('knox_divergence', symbol):
+            divergence_signal, divergence_score = self.detect_knox_divergence(context)
+        
+        with self.profiler.stage('recommendation', symbol):
+            return self._build_result(
+                symbol, current_price, technical_data, divergence_signal, divergence_score,
+                fundamental_score, fundamental_metrics
             )
+    
+    def settings(self):
+        """Indicator settings and weights, e.g. to configure worker-process analyzers"""
+        return {name: getattr(self, name) for name in SETTING_NAMES}
+    
+    def apply_settings(self, settings):
+        """Apply a settings() dict"""
+        for name, value in settings.items():
+            if name in SETTING_NAMES:
+                setattr(self, name, value)
+    
+    def _build_result(self, symbol, current_price, technical_data, divergence_signal, divergence_score,
+                      fundamental_score, fundamental_metrics):
+        """Score the analysis inputs and assemble the per-stock result dict"""
+        # Calculate technical score
+        technical_score = self.calculate_technical_score(technical_data)
+        
+        # Calculate final recommendation
+        recommendation, overall_score, target_price, confidence = self.calculate_recommendation(
+            technical_score, fundamental_score, divergence_signal, divergence_score, current_price, technical_data
+        )
+        
+        # Generate TradingView link
+        tradingview_link = f"https://www.tradingview.com/chart/?symbol=NSE%3A{symbol.replace('.NS', '')}"
+        
+        return {
+            'symbol': symbol,
+            'current_price': round(current_price, 2),
+            'recommendation': recommendation,
+            'overall_score': overall_score,
+            'target_price': target_price,
+            'confidence': confidence,
+            'divergence_signal': divergence_signal,
+            'divergence_score': divergence_score,
+            'technical_score': technical_score,
+            'fundamental_score': fundamental_score,
+            'fundamental_metrics': fundamental_metrics,
+            'technical_data': technical_data,
+            'tradingview_link': tradingview_link,
+            'potential_return': round(((target_price - current_price) / current_price) * 100, 2) if target_price else 0
+        }
+    
+    def score_universe(self, columns, weights=None):
+        """Vectorized calculate_technical_score / score_fundamentals / calculate_recommendation
+        
+        columns maps names to arrays (see scoring.score_universe); the output is
+        identical to scoring each symbol through the scalar methods. weights is
+        (divergence, fundamental, technical), by default the analyzer's.
+        """
+        if weights is None:
+            weights = (self.divergence_weight, self.fundamental_weight, self.technical_weight)
+        return score_universe(columns, weights)
+    
+    def rescore_table(self, table, current_price, weights=None):
+        """Re-score a ResultsTable in one vectorized pass from its stored component scores
+        
+        Technical and fundamental scores are kept (neither depends on the Knox
+        settings or weights); targets are computed from current_price, the
+        unrounded close of each row. The table's own current_price column is
+        rounded to 2 decimals, so targets computed from it can be a cent off
+        those of a full run.
+        """
+        frame = table.frame
+        columns = {
+            'current_price': current_price,
+            'divergence_signal': frame['divergence_signal'].to_numpy(dtype=object),
+            'divergence_score': frame['divergence_score'].to_numpy(),
+            'technical_score': frame['technical_score'].to_numpy(),
+            'fundamental_score': frame['fundamental_score'].to_numpy(),
+        }
+        envelope_column = table.nested_columns['technical_data'].get('envelope_sma')
+        if envelope_column:
+            columns['envelope_sma'] = frame[envelope_column].to_numpy()
+        
+        scores = self.score_universe(columns, weights)
+        del scores['current_price']
+        return table.with_columns(scores)
+    
+    def reweight_table(self, table, divergence_weight, fundamental_weight, technical_weight):
+        """What-if: re-weight and re-classify a whole table without touching the analyzer's weights
+        
+        Only overall_score, recommendation, target_price, confidence and
+        potential_return change. Targets use the unrounded prices kept from the
+        last run when this analyzer produced the table, otherwise the table's
+        own (rounded) prices.
+        """
+        inputs = self._kept_inputs(table)
+        if inputs is not None:
+            current_price = np.array([hist['Close'].iloc[-1] for hist, _, _ in inputs])
+        else:
+            # Approximate: targets from rounded prices can be a cent off
+            current_price = table.frame['current_price'].to_numpy()
+        return self.rescore_table(table, current_price, (divergence_weight, fundamental_weight, technical_weight))
+    
+    def reanalyze_table(self, table):
+        """Apply changed Knox/envelope settings or weights to a table from the last run
+        
+        Only the setting-dependent stages run - Knox RSI, momentum, envelope,
+        divergence and scoring - in vectorized passes over the histories kept in
+        last_inputs; nothing is fetched and fundamentals are reused. Returns None
+        unless this analyzer's last run produced the table (a table from the shared
+        cache or a worker snapshot needs a full analyze_stocks run).
+        """
+        inputs = self._kept_inputs(table)
+        if inputs is None:
+            return None
+        
+        try:
+            symbols = list(table.frame['symbol'])
+            histories = {symbol: hist for symbol, (hist, _, _) in zip(symbols, inputs)}
+            panel = align_histories(histories, fields=('High', 'Low', 'Close'))
+            close = panel['Close']
+            knox_rsi = simple_rsi(close, self.knox_rsi_period)
+            momentum = pct_change(close, self.knox_momentum_period)
+            envelope_sma = rolling_mean(close, self.envelope_length)[-1]
             
-            # Generate TradingView link
-            tradingview_link = f"https://www.tradingview.com/chart/?symbol=NSE%3A{symbol.replace('.NS', '')}"
+            # Divergence reads the last 20 bars and each symbol's bar count
+            recent = slice(-20, None)
+            bars = np.broadcast_to(panel['lengths'], close[recent].shape)
+            divergence_signal, divergence_score = knox_divergence(
+                panel['High'][recent], panel['Low'][recent], close[recent], knox_rsi[recent], momentum[recent],
+                bars, self.knox_bars_back
+            )
             
-            return {
-                'symbol': symbol,
-                'current_price': round(current_price, 2),
-                'recommendation': recommendation,
-                'overall_score': overall_score,
-                'target_price': target_price,
-                'confidence': confidence,
-                'divergence_signal': divergence_signal,
-                'divergence_score': divergence_score,
-                'technical_score': technical_score,
-                'fundamental_score': fundamental_score,
-                'fundamental_metrics': fundamental_metrics,
-                'technical_data': technical_data,
-                'tradingview_link': tradingview_link,
-                'potential_return': round(((target_price - current_price) / current_price) * 100, 2) if target_price else 0
+            # Panel columns are the unique symbols in first-seen order; map them back onto the table rows
+            column = {symbol: index for index, symbol in enumerate(panel['symbols'])}
+            rows = [column[symbol] for symbol in symbols]
+            prefix = NESTED_PREFIXES['technical_data']
+            columns = {
+                'divergence_signal': divergence_signal[-1][rows],
+                'divergence_score': divergence_score[-1][rows],
+                prefix + 'knox_rsi': knox_rsi[-1][rows],
+                prefix + 'momentum': momentum[-1][rows] * 100,
+                prefix + 'envelope_sma': envelope_sma[rows],
+                prefix + 'upper_envelope': envelope_sma[rows] * (1 + self.envelope_percent / 100),
+                prefix + 'lower_envelope': envelope_sma[rows] * (1 - self.envelope_percent / 100),
             }
+            return self.rescore_table(table.with_columns(columns), current_price=close[-1][rows])
+        except Exception as e:
+            logger.error(f"Error re-analyzing results: {str(e)}")
+            return None
+    
+    def adopt_inputs(self, run_id, inputs):
+        """Re-score tables from another analyzer's run (e.g. a worker snapshot) with this analyzer's settings
+        
+        inputs is that run's last_inputs; it is shared, not copied, and only read
+        here. reanalyze_table and reweight_table then accept tables tagged run_id.
+        """
+        self.last_run_id = run_id
+        self.last_inputs = inputs
+    
+    def _kept_inputs(self, table):
+        """last_inputs for each table row, None unless the table came from this analyzer's last run"""
+        symbols = table.frame['symbol']
+        if not len(symbols) or table.run_id is None or table.run_id != self.last_run_id:
+            return None
+        if any(symbol not in self.last_inputs for symbol in symbols):
+            return None
+        return [self.last_inputs[symbol] for symbol in symbols]
+    
+    def create_indicator_stream(self, hist):
+        """Seed an O(1)-per-bar IndicatorStream from a cleaned history with the current settings"""
+        return IndicatorStream.from_history(
+            hist,
+            knox_rsi_period=self.knox_rsi_period,
+            knox_momentum_period=self.knox_momentum_period,
+            envelope_length=self.envelope_length,
+            envelope_percent=self.envelope_percent
+        )
+    
+    def rescore_with_bar(self, result, stream, bar):
+        """Apply one new bar to a symbol's IndicatorStream and re-score its result
+        
+        bar is a mapping with 'Close' and optionally 'High', 'Low' and 'Volume'.
+        Fundamentals are carried over from result; no history is recomputed.
+        """
+        stream.update(bar['Close'], bar.get('High'), bar.get('Low'), bar.get('Volume'))
+        
+        if stream.bars >= self.knox_bars_back:
+            divergence_signal, divergence_score = self.classify_divergence(**stream.divergence_inputs())
+        else:
+            divergence_signal, divergence_score = "NEUTRAL", 50
+        
+        return self._build_result(
+            result['symbol'], stream.last_close, stream.technical_data(), divergence_signal, divergence_score,
+            result['fundamental_score'], result['fundamental_metrics']
+        )
+    
+    def rescore_table_with_bars(self, table, histories):
+        """Bring a table from the last run up to date with bars that arrived since
+        
+        histories is {symbol: history} as returned by fetch_history_batch; only the
+        bars after each kept history's last bar are applied, through an
+        IndicatorStream seeded from that history. Fundamentals are carried over.
+        Returns None unless this analyzer's last run produced the table; the
+        returned table becomes the new last run (its kept histories include the
+        appended bars, with as many of the oldest bars dropped).
+        """
+        inputs = self._kept_inputs(table)
+        if inputs is None:
+            return None
+        
+        try:
+            results = []
+            kept = {}
+            for row, (hist, fundamental_score, fundamental_metrics) in zip(table, inputs):
+                symbol = row['symbol']
+                result = dict(row)
+                latest = histories.get(symbol)
+                if latest is not None:
+                    new_bars = latest[latest.index > hist.index[-1]].dropna(subset=['Close', 'High', 'Low'])
+                    if not new_bars.empty:
+                        stream = self.create_indicator_stream(hist)
+                        for bar in new_bars.to_dict('records'):
+                            result = self.rescore_with_bar(result, stream, bar)
+                        # Drop as many old bars as were appended, so kept histories stay one window long
+                        hist = pd.concat([hist, new_bars.reindex(columns=hist.columns)]).iloc[-len(hist):]
+                        hist['Volume'] = hist['Volume'].fillna(1000000)
+                results.append(result)
+                kept[symbol] = (hist, fundamental_score, fundamental_metrics)
             
+            self.last_inputs = kept
+            self.last_run_id = uuid.uuid4().hex
+            return ResultsTable.from_results(results, self.last_run_id)
         except Exception as e:
-            logger.error(f"Error in single stock analysis for {symbol}: {str(e)}")
+            logger.error(f"Error applying new bars to results: {str(e)}")
+            return None
+    
+    def _prepare_history(self, symbol, hist):
+        """Validate and clean raw history, None if there is not enough usable data"""
+        if hist.empty or len(hist) < 50:
+            logger.warning(f"Insufficient data for {symbol}")
             return None
+        
+        # Ensure we have all required columns
+        required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+        for col in required_columns:
+            if col not in hist.columns:
+                if col == 'Volume':
+                    # Create synthetic volume if missing
+                    hist['Volume'] = (hist['High'] - hist['Low']) / hist['Close'] * 1000000
+                    logger.warning(f"Volume data missing for {symbol}, created synthetic volume")
+                elif col == 'Open':
+                    hist['Open'] = hist['Close'].shift(1).fillna(hist['Close'])
+                else:
+                    logger.warning(f"Missing {col} data for {symbol}")
+                    return None
+        
+        # Clean data - remove any rows with NaN values in critical columns
+        hist = hist.dropna(subset=['Close', 'High', 'Low'])
+        hist['Volume'] = hist['Volume'].fillna(1000000)  # Fill volume NaNs with default
+        
+        if len(hist) < 50:
+            logger.warning(f"Insufficient clean data for {symbol}")
+            return None
+        return hist
+    
+    def _throttle(self):
+        """Wait for the provider's per-host rate limit"""
+        if self.provider.host:
+            self.rate_limiter.acquire(self.provider.host)
+    
+    def _fetch_history(self, symbol):
+        """Read a symbol's history from the price cache, downloading only what is missing"""
+        cached = self.price_cache.load(symbol) if self.price_cache else None
+        if cached is not None and self.price_cache.is_fresh(symbol, cached):
+            return cached
+        
+        if cached is not None:
+            self._throttle()
+            new_bars = self.provider.get_history(symbol, start=self.price_cache.refresh_start(cached, symbol))
+            merged = self.price_cache.merge(symbol, cached, new_bars)
+            if merged is not None:
+                return merged
+        
+        self._throttle()
+        hist = self.provider.get_history(symbol, period=self.history_period)
+        if self.price_cache and not hist.empty:
+            return self.price_cache.merge(symbol, None, hist)
+        return hist
+    
+    def calculate_technical_indicators_panel(self, histories):
+        """Vectorized calculate_technical_indicators for many cleaned histories - {symbol: technical_data}"""
+        if not histories:
+            return {}
+        try:
+            panel = align_histories(histories)
+            indicators = compute_panel_indicators(
+                panel, self.knox_rsi_period, self.knox_momentum_period, self.envelope_length, self.envelope_percent
+            )
+            return latest_technical_data(panel, indicators)
+        except Exception as e:
+            logger.error(f"Error calculating panel indicators: {str(e)}")
+            return {}
     
     def calculate_technical_indicators(self, data):
-        """Calculate RSI, MACD, Bollinger Bands, Knox Divergence"""
+        """Calculate RSI, MACD, Bollinger Bands, Knox Divergence
+        
+        data is a history frame or a FeatureContext shared with other stages.
+        """
+        context = self._feature_context(data)
+        data = context.data
         try:
-            df = data.copy()
+            volume = context.volume()
             
-            # Ensure Volume column exists and has valid data
-            if 'Volume' not in df.columns or df['Volume'].isna().all():
-                logger.warning("Volume data missing, creating synthetic volume data")
-                # Create synthetic volume based on price volatility
-                df['Volume'] = (df['High'] - df['Low']) / df['Close'] * 1000000
-                df['Volume'] = df['Volume'].fillna(1000000)
-            
-            # Fill any missing volume values
-            df['Volume'] = df['Volume'].fillna(method='ffill').fillna(1000000)
-            
-            # Add all technical indicators with proper error handling
+            # Compute only the indicator columns listed in TECHNICAL_INDICATORS
             try:
-                df = add_all_ta_features(df, open="Open", high="High", low="Low", close="Close", volume="Volume", fillna=True)
+                indicators = context.indicators()
             except Exception as ta_error:
-                logger.warning(f"Error with add_all_ta_features: {ta_error}. Using manual calculations.")
+                logger.warning(f"Error with ta indicators: {ta_error}. Using manual calculations.")
                 # Calculate basic indicators manually if ta library fails
-                df = self._calculate_manual_indicators(df)
+                indicators = self._calculate_manual_indicators(data)
+            
+            latest = {key: indicators[column].iloc[-1] for key, column in TECHNICAL_INDICATORS.items() if column in indicators}
             
             # Calculate custom indicators
             # RSI with Knox period
-            delta = df['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=self.knox_rsi_period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=self.knox_rsi_period).mean()
-            rs = gain / loss
-            knox_rsi = 100 - (100 / (1 + rs))
+            knox_rsi = context.simple_rsi(self.knox_rsi_period)
             
             # Momentum
-            momentum = df['Close'].pct_change(self.knox_momentum_period) * 100
+            momentum = context.pct_change(self.knox_momentum_period) * 100
             
             # Envelope
-            sma_envelope = df['Close'].rolling(window=self.envelope_length).mean()
+            sma_envelope = context.rolling_mean(self.envelope_length)
             upper_envelope = sma_envelope * (1 + self.envelope_percent / 100)
             lower_envelope = sma_envelope * (1 - self.envelope_percent / 100)
             
             return {
-                'rsi_14': df['momentum_rsi'].iloc[-1] if 'momentum_rsi' in df.columns else 50,
+                'rsi_14': latest.get('rsi_14', 50),
                 'knox_rsi': knox_rsi.iloc[-1] if not knox_rsi.empty else 50,
-                'macd': df['trend_macd'].iloc[-1] if 'trend_macd' in df.columns else 0,
-                'macd_signal': df['trend_macd_signal'].iloc[-1] if 'trend_macd_signal' in df.columns else 0,
-                'bb_upper': df['volatility_bbh'].iloc[-1] if 'volatility_bbh' in df.columns else data['Close'].iloc[-1],
-                'bb_lower': df['volatility_bbl'].iloc[-1] if 'volatility_bbl' in df.columns else data['Close'].iloc[-1],
-                'sma_20': df['trend_sma_slow'].iloc[-1] if 'trend_sma_slow' in df.columns else data['Close'].iloc[-1],
-                'sma_50': df['Close'].rolling(50).mean().iloc[-1],
+                'macd': latest.get('macd', 0),
+                'macd_signal': latest.get('macd_signal', 0),
+                'bb_upper': latest.get('bb_upper', data['Close'].iloc[-1]),
+                'bb_lower': latest.get('bb_lower', data['Close'].iloc[-1]),
+                'sma_20': latest.get('sma_20', data['Close'].iloc[-1]),
+                'sma_50': context.rolling_mean(50).iloc[-1],
                 'momentum': momentum.iloc[-1] if not momentum.empty else 0,
                 'envelope_sma': sma_envelope.iloc[-1] if not sma_envelope.empty else data['Close'].iloc[-1],
                 'upper_envelope': upper_envelope.iloc[-1] if not upper_envelope.empty else data['Close'].iloc[-1],
                 'lower_envelope': lower_envelope.iloc[-1] if not lower_envelope.empty else data['Close'].iloc[-1],
-                'volume_trend': df['Volume'].rolling(20).mean().iloc[-1] / df['Volume'].rolling(50).mean().iloc[-1] if len(df) >= 50 else 1
+                'volume_trend': context.rolling_mean(20, 'Volume').iloc[-1] / context.rolling_mean(50, 'Volume').iloc[-1] if len(data) >= 50 else 1
             }
             
         except Exception as e:
@@ -181,38 +756,25 @@ class StockAnalyzer:
             return self._get_default_technical_data(data)
     
     def detect_knox_divergence(self, data):
-        """Implement Rob Booker KnoxDiv divergence detection"""
+        """Implement Rob Booker KnoxDiv divergence detection
+        
+        data is a history frame or a FeatureContext shared with other stages.
+        """
+        context = self._feature_context(data)
+        data = context.data
         try:
             if len(data) < self.knox_bars_back:
                 return "NEUTRAL", 50
             
-            # Calculate Knox RSI
-            delta = data['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=self.knox_rsi_period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=self.knox_rsi_period).mean()
-            rs = gain / loss
-            knox_rsi = 100 - (100 / (1 + rs))
-            
-            # Calculate momentum
-            momentum = data['Close'].pct_change(self.knox_momentum_period)
+            # Knox RSI and momentum are shared with calculate_technical_indicators
+            knox_rsi = context.simple_rsi(self.knox_rsi_period)
+            momentum = context.pct_change(self.knox_momentum_period)
             
             # Get recent data for analysis
             recent_data = data.tail(self.knox_bars_back)
             recent_rsi = knox_rsi.tail(self.knox_bars_back)
             recent_momentum = momentum.tail(self.knox_bars_back)
             
-            # Find price highs and lows
-            price_highs = recent_data['High'].rolling(window=10, center=True).max() == recent_data['High']
-            price_lows = recent_data['Low'].rolling(window=10, center=True).min() == recent_data['Low']
-            
-            # Find RSI highs and lows
-            rsi_highs = recent_rsi.rolling(window=10, center=True).max() == recent_rsi
-            rsi_lows = recent_rsi.rolling(window=10, center=True).min() == recent_rsi
-            
-            # Detect divergences
-            divergence_signal = "NEUTRAL"
-            divergence_score = 50
-            
             # Recent price and RSI values
             recent_price_high = recent_data['High'].tail(20).max()
             recent_price_low = recent_data['Low'].tail(20).min()
@@ -223,107 +785,169 @@ class StockAnalyzer:
             current_rsi = recent_rsi.iloc[-1]
             current_momentum = recent_momentum.iloc[-1] if not recent_momentum.empty else 0
             
-            # Bullish divergence detection
-            if (current_price <= recent_price_low * 1.02 and  # Price near recent low
-                current_rsi > recent_rsi_low * 1.1):  # RSI higher than recent low
-                if current_momentum > 0.05:  # Strong momentum
-                    divergence_signal = "STRONG_BULLISH"
-                    divergence_score = 85
-                else:
-                    divergence_signal = "BULLISH"
-                    divergence_score = 75
-            
-            # Bearish divergence detection
-            elif (current_price >= recent_price_high * 0.98 and  # Price near recent high
-                  current_rsi < recent_rsi_high * 0.9):  # RSI lower than recent high
-                if current_momentum < -0.05:  # Strong negative momentum
-                    divergence_signal = "STRONG_BEARISH"
-                    divergence_score = 15
-                else:
-                    divergence_signal = "BEARISH"
-                    divergence_score = 25
-            
-            # Hidden divergences
-            elif (current_price > recent_price_low * 1.05 and  # Price above recent low
-                  current_rsi < recent_rsi_low * 1.05):  # RSI still low
-                divergence_signal = "HIDDEN_BULLISH"
-                divergence_score = 65
-            
-            elif (current_price < recent_price_high * 0.95 and  # Price below recent high
-                  current_rsi > recent_rsi_high * 0.95):  # RSI still high
-                divergence_signal = "HIDDEN_BEARISH"
-                divergence_score = 35
-            
-            return divergence_signal, divergence_score
+            return self.classify_divergence(
+                current_price, current_rsi, current_momentum,
+                recent_price_high, recent_price_low, recent_rsi_high, recent_rsi_low
+            )
             
         except Exception as e:
             logger.error(f"Error in Knox divergence detection: {str(e)}")
             return "NEUTRAL", 50
     
-    def get_fundamental_data(self, symbol, stock):
-        """Fetch P/E, P/B, ROE, revenue growth, profit margins"""
+    def classify_divergence(self, current_price, current_rsi, current_momentum,
+                            recent_price_high, recent_price_low, recent_rsi_high, recent_rsi_low):
+        """Knox divergence rules on the current bar and the recent 20-bar extremes"""
+        # Detect divergences
+        divergence_signal = "NEUTRAL"
+        divergence_score = 50
+        
+        # Bullish divergence detection
+        if (current_price <= recent_price_low * 1.02 and  # Price near recent low
+            current_rsi > recent_rsi_low * 1.1):  # RSI higher than recent low
+            if current_momentum > 0.05:  # Strong momentum
+                divergence_signal = "STRONG_BULLISH"
+                divergence_score = 85
+            else:
+                divergence_signal = "BULLISH"
+                divergence_score = 75
+        
+        # Bearish divergence detection
+        elif (current_price >= recent_price_high * 0.98 and  # Price near recent high
+              current_rsi < recent_rsi_high * 0.9):  # RSI lower than recent high
+            if current_momentum < -0.05:  # Strong negative momentum
+                divergence_signal = "STRONG_BEARISH"
+                divergence_score = 15
+            else:
+                divergence_signal = "BEARISH"
+                divergence_score = 25
+        
+        # Hidden divergences
+        elif (current_price > recent_price_low * 1.05 and  # Price above recent low
+              current_rsi < recent_rsi_low * 1.05):  # RSI still low
+            divergence_signal = "HIDDEN_BULLISH"
+            divergence_score = 65
+        
+        elif (current_price < recent_price_high * 0.95 and  # Price below recent high
+              current_rsi > recent_rsi_high * 0.95):  # RSI still high
+            divergence_signal = "HIDDEN_BEARISH"
+            divergence_score = 35
+        
+        return divergence_signal, divergence_score
+    
+    def get_fundamental_data(self, symbol, stock=None, allow_fetch=True, price=None):
+        """Fetch P/E, P/B, ROE, revenue growth, profit margins (through the fundamentals cache)
+        
+        P/E and P/B are derived from the cached EPS and book value at price (the
+        current close); without a price they are None.
+        """
         try:
-            info = stock.info
-            
-            # Extract fundamental metrics
-            pe_ratio = info.get('trailingPE', None)
-            pb_ratio = info.get('priceToBook', None)
-            roe = info.get('returnOnEquity', None)
-            profit_margin = info.get('profitMargins', None)
-            revenue_growth = info.get('revenueGrowth', None)
-            
-            # Calculate fundamental score
-            fundamental_score = 50  # Base score
-            
-            # P/E ratio scoring (lower is better, but not too low)
-            if pe_ratio and 5 <= pe_ratio <= 25:
-                fundamental_score += 10
-            elif pe_ratio and pe_ratio < 5:
-                fundamental_score -= 5  # Too low might indicate problems
-            elif pe_ratio and pe_ratio > 40:
-                fundamental_score -= 10
-            
-            # P/B ratio scoring (lower is generally better)
-            if pb_ratio and pb_ratio < 3:
-                fundamental_score += 10
-            elif pb_ratio and pb_ratio > 5:
-                fundamental_score -= 10
-            
-            # ROE scoring (higher is better)
-            if roe and roe > 0.15:  # 15%+
-                fundamental_score += 15
-            elif roe and roe > 0.10:  # 10-15%
-                fundamental_score += 10
-            elif roe and roe < 0:
-                fundamental_score -= 15
-            
-            # Profit margin scoring
-            if profit_margin and profit_margin > 0.10:  # 10%+
-                fundamental_score += 10
-            elif profit_margin and profit_margin < 0:
-                fundamental_score -= 10
-            
-            # Revenue growth scoring
-            if revenue_growth and revenue_growth > 0.15:  # 15%+
-                fundamental_score += 10
-            elif revenue_growth and revenue_growth < 0:
-                fundamental_score -= 10
-            
-            # Ensure score is within bounds
-            fundamental_score = max(0, min(100, fundamental_score))
-            
-            return fundamental_score, {
-                'pe_ratio': pe_ratio,
-                'pb_ratio': pb_ratio,
-                'roe': roe,
-                'profit_margin': profit_margin,
-                'revenue_growth': revenue_growth
-            }
+            if self.fundamentals_cache:
+                metrics = self.fundamentals_cache.get(
+                    symbol, lambda: self._fetch_fundamental_metrics(symbol, stock), allow_fetch=allow_fetch
+                )
+            elif allow_fetch:
+                metrics = self._fetch_fundamental_metrics(symbol, stock)
+            else:
+                metrics = None
+            
+            if metrics is None:
+                # Price-only run and nothing cached yet - neutral fundamentals
+                return 50, {}
+            
+            metrics = self.valuation_metrics(metrics, price)
+            return self.score_fundamentals(metrics), metrics
             
         except Exception as e:
             logger.error(f"Error getting fundamental data for {symbol}: {str(e)}")
             return 50, {}
     
+    def _fetch_fundamental_metrics(self, symbol, stock=None):
+        """Read the statement-based fundamentals from the provider's info (or a given yf.Ticker)"""
+        self._throttle()
+        info = stock.info if stock is not None else self.provider.get_info(symbol)
+        
+        # Per-share EPS and book value; recovered from the ratios and quote price if not reported
+        quote_price = info.get('currentPrice') or info.get('regularMarketPrice')
+        eps = info.get('trailingEps')
+        if eps is None and info.get('trailingPE') and quote_price:
+            eps = quote_price / info['trailingPE']
+        book_value = info.get('bookValue')
+        if book_value is None and info.get('priceToBook') and quote_price:
+            book_value = quote_price / info['priceToBook']
+        
+        return {
+            'eps': eps,
+            'book_value': book_value,
+            'roe': info.get('returnOnEquity', None),
+            'profit_margin': info.get('profitMargins', None),
+            'revenue_growth': info.get('revenueGrowth', None)
+        }
+    
+    def valuation_metrics(self, fundamentals, price):
+        """Scored metrics from cached fundamentals - P/E and P/B at the given price
+        
+        Like Yahoo's trailingPE, P/E is only defined for positive EPS.
+        """
+        eps = fundamentals.get('eps')
+        book_value = fundamentals.get('book_value')
+        return {
+            'pe_ratio': price / eps if price and eps and eps > 0 else None,
+            'pb_ratio': price / book_value if price and book_value else None,
+            'roe': fundamentals.get('roe'),
+            'profit_margin': fundamentals.get('profit_margin'),
+            'revenue_growth': fundamentals.get('revenue_growth')
+        }
+    
+    def score_fundamentals(self, metrics):
+        """Score P/E, P/B, ROE, profit margin and revenue growth on a 0-100 scale"""
+        pe_ratio = metrics.get('pe_ratio')
+        pb_ratio = metrics.get('pb_ratio')
+        roe = metrics.get('roe')
+        profit_margin = metrics.get('profit_margin')
+        revenue_growth = metrics.get('revenue_growth')
+        
+        # Calculate fundamental score
+        fundamental_score = 50  # Base score
+        
+        # P/E ratio scoring (lower is better, but not too low)
+        if pe_ratio and 5 <= pe_ratio <= 25:
+            fundamental_score += 10
+        elif pe_ratio and pe_ratio < 5:
+            fundamental_score -= 5  # Too low might indicate problems
+        elif pe_ratio and pe_ratio > 40:
+            fundamental_score -= 10
+        
+        # P/B ratio scoring (lower is generally better)
+        if pb_ratio and pb_ratio < 3:
+            fundamental_score += 10
+        elif pb_ratio and pb_ratio > 5:
+            fundamental_score -= 10
+        
+        # ROE scoring (higher is better)
+        if roe and roe > 0.15:  # 15%+
+            fundamental_score += 15
+        elif roe and roe > 0.10:  # 10-15%
+            fundamental_score += 10
+        elif roe and roe < 0:
+            fundamental_score -= 15
+        
+        # Profit margin scoring
+        if profit_margin and profit_margin > 0.10:  # 10%+
+            fundamental_score += 10
+        elif profit_margin and profit_margin < 0:
+            fundamental_score -= 10
+        
+        # Revenue growth scoring
+        if revenue_growth and revenue_growth > 0.15:  # 15%+
+            fundamental_score += 10
+        elif revenue_growth and revenue_growth < 0:
+            fundamental_score -= 10
+        
+        # Ensure score is within bounds
+        fundamental_score = max(0, min(100, fundamental_score))
+        
+        return fundamental_score
+    
     def calculate_technical_score(self, technical_data):
         """Calculate technical analysis score"""
         try:
@@ -455,6 +1079,10 @@ class StockAnalyzer:
             logger.error(f"Error calculating recommendation: {str(e)}")
             return "HOLD", 50.0, current_price, 50.0
     
+    def _feature_context(self, data):
+        """Wrap a history frame in a FeatureContext unless it already is one"""
+        return data if isinstance(data, FeatureContext) else FeatureContext(data)
+    
     def _get_default_technical_data(self, data):
         """Return default technical data when calculation fails"""
         current_price = data['Close'].iloc[-1]
@@ -476,31 +1104,32 @@ class StockAnalyzer:
     
     def _calculate_manual_indicators(self, df):
         """Calculate technical indicators manually when ta library fails"""
+        indicators = {}
         try:
             # Calculate RSI manually
             delta = df['Close'].diff()
             gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
             loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
             rs = gain / loss
-            df['momentum_rsi'] = 100 - (100 / (1 + rs))
+            indicators['momentum_rsi'] = 100 - (100 / (1 + rs))
             
             # Calculate MACD manually
             ema_12 = df['Close'].ewm(span=12).mean()
             ema_26 = df['Close'].ewm(span=26).mean()
-            df['trend_macd'] = ema_12 - ema_26
-            df['trend_macd_signal'] = df['trend_macd'].ewm(span=9).mean()
+            indicators['trend_macd'] = ema_12 - ema_26
+            indicators['trend_macd_signal'] = indicators['trend_macd'].ewm(span=9).mean()
             
             # Calculate Bollinger Bands manually
             sma_20 = df['Close'].rolling(window=20).mean()
             std_20 = df['Close'].rolling(window=20).std()
-            df['volatility_bbh'] = sma_20 + (std_20 * 2)
-            df['volatility_bbl'] = sma_20 - (std_20 * 2)
+            indicators['volatility_bbh'] = sma_20 + (std_20 * 2)
+            indicators['volatility_bbl'] = sma_20 - (std_20 * 2)
             
             # Calculate SMA
-            df['trend_sma_slow'] = df['Close'].rolling(window=20).mean()
+            indicators['trend_sma_slow'] = df['Close'].rolling(window=20).mean()
             
-            return df
+            return indicators
             
         except Exception as e:
             logger.error(f"Error in manual indicator calculation: {str(e)}")
-            return df
+            return indicators
@@ -0,0 +1,384 @@
+import math
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+NAN = float('nan')
+
+def _safe_rsi(avg_gain, avg_loss):
+    """100 - 100 / (1 + gain/loss) with pandas/NumPy division semantics"""
+    if avg_loss == 0:
+        return NAN if avg_gain == 0 else 100.0
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+class EMAState:
+    """Recursive EMA, pandas ewm(adjust=False) seeded with the first value"""
+
+    def __init__(self, alpha, value=None):
+        self.alpha = alpha
+        self.value = value
+
+    def update(self, x):
+        self.value = x if self.value is None else (1 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+    def to_dict(self):
+        return {'type': 'EMAState', 'alpha': self.alpha, 'value': self.value}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['alpha'], state['value'])
+
+class RollingWindowState:
+    """Rolling mean and standard deviation with O(1) running sums
+
+    min_periods=0 reproduces ta's fillna=True partial windows; sums are rebuilt
+    from the window once per window length to stop floating-point drift.
+    """
+
+    def __init__(self, window, min_periods=None, values=None):
+        self.window = window
+        self.min_periods = window if min_periods is None else max(1, min_periods)
+        self.values = deque(values or [], maxlen=window)
+        self._resum()
+
+    def _resum(self):
+        self.total = math.fsum(self.values)
+        self.total_sq = math.fsum(v * v for v in self.values)
+        self._since_resum = 0
+
+    def update(self, x):
+        if len(self.values) == self.window:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+        self._since_resum += 1
+        if self._since_resum >= self.window:
+            self._resum()
+        return self.mean
+
+    @property
+    def ready(self):
+        return len(self.values) >= self.min_periods
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.ready else NAN
+
+    @property
+    def std(self):
+        """Population standard deviation (ddof=0) as used by Bollinger Bands"""
+        if not self.ready:
+            return NAN
+        n = len(self.values)
+        mean = self.total / n
+        return math.sqrt(max(self.total_sq / n - mean * mean, 0.0))
+
+    def to_dict(self):
+        # The running sums are kept as they are, so a restored stream continues bit for bit
+        return {'type': 'RollingWindowState', 'window': self.window,
+                'min_periods': self.min_periods, 'values': list(self.values),
+                'sums': [self.total, self.total_sq, self._since_resum]}
+
+    @classmethod
+    def from_dict(cls, state):
+        restored = cls(state['window'], state['min_periods'], state['values'])
+        if 'sums' in state:
+            restored.total, restored.total_sq, restored._since_resum = state['sums']
+        return restored
+
+class RollingExtremeState:
+    """Rolling max or min over the last window bars via a monotonic deque (amortized O(1))
+
+    NaN inputs count towards the window but never become the extreme, like
+    Series.tail(window).max().
+    """
+
+    def __init__(self, window, mode='max', count=0, candidates=None):
+        self.window = window
+        self.mode = mode
+        self.count = count
+        self.candidates = deque(tuple(item) for item in (candidates or []))
+
+    def update(self, x):
+        index = self.count
+        self.count += 1
+        if not math.isnan(x):
+            if self.mode == 'max':
+                while self.candidates and self.candidates[-1][1] <= x:
+                    self.candidates.pop()
+            else:
+                while self.candidates and self.candidates[-1][1] >= x:
+                    self.candidates.pop()
+            self.candidates.append((index, x))
+        while self.candidates and self.candidates[0][0] <= index - self.window:
+            self.candidates.popleft()
+        return self.value
+
+    @property
+    def value(self):
+        return self.candidates[0][1] if self.candidates else NAN
+
+    def to_dict(self):
+        return {'type': 'RollingExtremeState', 'window': self.window, 'mode': self.mode,
+                'count': self.count, 'candidates': [list(item) for item in self.candidates]}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['window'], state['mode'], state['count'], state['candidates'])
+
+class WilderRSIState:
+    """Wilder RSI matching ta's RSIIndicator (EMA of gains/losses, alpha=1/period)"""
+
+    def __init__(self, period=14, prev_close=None, avg_gain=None, avg_loss=None):
+        self.period = period
+        self.prev_close = prev_close
+        self.avg_gain = EMAState(1 / period, avg_gain)
+        self.avg_loss = EMAState(1 / period, avg_loss)
+
+    def update(self, close):
+        # The first bar has no change and counts as a zero move, as in ta
+        change = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        self.avg_gain.update(change if change > 0 else 0.0)
+        self.avg_loss.update(-change if change < 0 else 0.0)
+        return self.value
+
+    @property
+    def value(self):
+        if self.avg_loss.value is None:
+            return 50.0
+        if self.avg_loss.value == 0:
+            return 100.0
+        return 100 - (100 / (1 + self.avg_gain.value / self.avg_loss.value))
+
+    def to_dict(self):
+        return {'type': 'WilderRSIState', 'period': self.period, 'prev_close': self.prev_close,
+                'avg_gain': self.avg_gain.value, 'avg_loss': self.avg_loss.value}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['period'], state['prev_close'], state['avg_gain'], state['avg_loss'])
+
+class SimpleRSIState:
+    """Rolling-mean RSI (the Knox RSI)"""
+
+    def __init__(self, period, prev_close=None, gains=None, losses=None):
+        self.period = period
+        self.prev_close = prev_close
+        self.gains = gains or RollingWindowState(period)
+        self.losses = losses or RollingWindowState(period)
+
+    def update(self, close):
+        change = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        self.gains.update(change if change > 0 else 0.0)
+        self.losses.update(-change if change < 0 else 0.0)
+        return self.value
+
+    @property
+    def value(self):
+        if not self.gains.ready:
+            return NAN
+        return _safe_rsi(self.gains.mean, self.losses.mean)
+
+    def to_dict(self):
+        return {'type': 'SimpleRSIState', 'period': self.period, 'prev_close': self.prev_close,
+                'gains': self.gains.to_dict(), 'losses': self.losses.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['period'], state['prev_close'],
+                   RollingWindowState.from_dict(state['gains']), RollingWindowState.from_dict(state['losses']))
+
+class MACDState:
+    """MACD line and signal from fast/slow/signal EMAs, matching ta's MACD"""
+
+    def __init__(self, fast=12, slow=26, signal=9, emas=None):
+        self.fast, self.slow, self.signal = fast, slow, signal
+        self.fast_ema, self.slow_ema, self.signal_ema = emas or (
+            EMAState(2 / (fast + 1)), EMAState(2 / (slow + 1)), EMAState(2 / (signal + 1))
+        )
+
+    def update(self, close):
+        macd = self.fast_ema.update(close) - self.slow_ema.update(close)
+        self.signal_ema.update(macd)
+        return macd
+
+    @property
+    def macd(self):
+        if self.fast_ema.value is None:
+            return 0.0
+        return self.fast_ema.value - self.slow_ema.value
+
+    @property
+    def macd_signal(self):
+        return 0.0 if self.signal_ema.value is None else self.signal_ema.value
+
+    def to_dict(self):
+        return {'type': 'MACDState', 'fast': self.fast, 'slow': self.slow, 'signal': self.signal,
+                'emas': [self.fast_ema.to_dict(), self.slow_ema.to_dict(), self.signal_ema.to_dict()]}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['fast'], state['slow'], state['signal'],
+                   tuple(EMAState.from_dict(ema) for ema in state['emas']))
+
+class MomentumState:
+    """N-period fractional close change"""
+
+    def __init__(self, periods, closes=None):
+        self.periods = periods
+        self.closes = deque(closes or [], maxlen=periods + 1)
+
+    def update(self, close):
+        self.closes.append(close)
+        return self.value
+
+    @property
+    def value(self):
+        if len(self.closes) <= self.periods:
+            return NAN
+        return self.closes[-1] / self.closes[0] - 1
+
+    def to_dict(self):
+        return {'type': 'MomentumState', 'periods': self.periods, 'closes': list(self.closes)}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['periods'], state['closes'])
+
+class IndicatorStream:
+    """Streaming per-symbol state for every StockAnalyzer indicator and the Knox divergence inputs
+
+    Seed once from history, then update() one bar at a time in O(1).
+    technical_data() returns the same keys as calculate_technical_indicators and
+    divergence_inputs() the values detect_knox_divergence classifies.
+    """
+
+    def __init__(self, knox_rsi_period=7, knox_momentum_period=20, envelope_length=200, envelope_percent=14,
+                 divergence_window=20, states=None, bars=0, last_close=None):
+        self.knox_rsi_period = knox_rsi_period
+        self.knox_momentum_period = knox_momentum_period
+        self.envelope_length = envelope_length
+        self.envelope_percent = envelope_percent
+        self.divergence_window = divergence_window
+        self.bars = bars
+        self.last_close = last_close
+        self.states = states or {
+            'rsi_14': WilderRSIState(14),
+            'knox_rsi': SimpleRSIState(knox_rsi_period),
+            'macd': MACDState(),
+            'bollinger': RollingWindowState(20, min_periods=0),
+            'sma_20': RollingWindowState(26, min_periods=0),
+            'sma_50': RollingWindowState(50),
+            'momentum': MomentumState(knox_momentum_period),
+            'envelope': RollingWindowState(envelope_length),
+            'volume_20': RollingWindowState(20),
+            'volume_50': RollingWindowState(50),
+            'high_max': RollingExtremeState(divergence_window, 'max'),
+            'low_min': RollingExtremeState(divergence_window, 'min'),
+            'rsi_max': RollingExtremeState(divergence_window, 'max'),
+            'rsi_min': RollingExtremeState(divergence_window, 'min'),
+        }
+
+    @classmethod
+    def from_history(cls, hist, **settings):
+        """Seed a stream by replaying a cleaned history frame"""
+        stream = cls(**settings)
+        volume = hist['Volume'] if 'Volume' in hist.columns else [1000000] * len(hist)
+        for high, low, close, vol in zip(hist['High'], hist['Low'], hist['Close'], volume):
+            stream.update(close, high, low, vol)
+        return stream
+
+    def update(self, close, high=None, low=None, volume=None):
+        """Apply one new bar"""
+        states = self.states
+        high = close if high is None else high
+        low = close if low is None else low
+        volume = 1000000 if volume is None or math.isnan(volume) else volume
+
+        states['rsi_14'].update(close)
+        knox_rsi = states['knox_rsi'].update(close)
+        states['macd'].update(close)
+        states['bollinger'].update(close)
+        states['sma_20'].update(close)
+        states['sma_50'].update(close)
+        states['momentum'].update(close)
+        states['envelope'].update(close)
+        states['volume_20'].update(volume)
+        states['volume_50'].update(volume)
+        states['high_max'].update(high)
+        states['low_min'].update(low)
+        states['rsi_max'].update(knox_rsi)
+        states['rsi_min'].update(knox_rsi)
+        self.bars += 1
+        self.last_close = close
+
+    def technical_data(self):
+        """Current values keyed like calculate_technical_indicators"""
+        states = self.states
+        bollinger = states['bollinger']
+        envelope_sma = states['envelope'].mean
+        volume_50 = states['volume_50'].mean
+        return {
+            'rsi_14': states['rsi_14'].value,
+            'knox_rsi': states['knox_rsi'].value,
+            'macd': states['macd'].macd,
+            'macd_signal': states['macd'].macd_signal,
+            'bb_upper': bollinger.mean + 2 * bollinger.std,
+            'bb_lower': bollinger.mean - 2 * bollinger.std,
+            'sma_20': states['sma_20'].mean,
+            'sma_50': states['sma_50'].mean,
+            'momentum': states['momentum'].value * 100,
+            'envelope_sma': envelope_sma,
+            'upper_envelope': envelope_sma * (1 + self.envelope_percent / 100),
+            'lower_envelope': envelope_sma * (1 - self.envelope_percent / 100),
+            'volume_trend': states['volume_20'].mean / volume_50 if self.bars >= 50 and volume_50 else 1,
+        }
+
+    def divergence_inputs(self):
+        """Current price/RSI/momentum and their recent extremes for classify_divergence"""
+        states = self.states
+        return {
+            'current_price': self.last_close,
+            'current_rsi': states['knox_rsi'].value,
+            'current_momentum': states['momentum'].value,
+            'recent_price_high': states['high_max'].value,
+            'recent_price_low': states['low_min'].value,
+            'recent_rsi_high': states['rsi_max'].value,
+            'recent_rsi_low': states['rsi_min'].value,
+        }
+
+    def to_dict(self):
+        """JSON-serializable snapshot of the whole stream"""
+        return {
+            'knox_rsi_period': self.knox_rsi_period,
+            'knox_momentum_period': self.knox_momentum_period,
+            'envelope_length': self.envelope_length,
+            'envelope_percent': self.envelope_percent,
+            'divergence_window': self.divergence_window,
+            'bars': self.bars,
+            'last_close': self.last_close,
+            'states': {name: state.to_dict() for name, state in self.states.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, snapshot):
+        snapshot = dict(snapshot)
+        states = {name: STATE_TYPES[state['type']].from_dict(state) for name, state in snapshot.pop('states').items()}
+        return cls(states=states, **snapshot)
+
+STATE_TYPES = {
+    'EMAState': EMAState,
+    'RollingWindowState': RollingWindowState,
+    'RollingExtremeState': RollingExtremeState,
+    'WilderRSIState': WilderRSIState,
+    'SimpleRSIState': SimpleRSIState,
+    'MACDState': MACDState,
+    'MomentumState': MomentumState,
+}
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Knox Settings Sweep
+Backtests a grid of Knox/envelope settings in parallel over one shared copy of
+the price history and ranks the combinations
+
+    python sweep.py --period 5y                                  # default grid
+    python sweep.py --rsi-period 5 7 9 14 --bars-back 100 200    # custom grid
+    python sweep.py --data-dir .cache/benchmark/bars1250-seed42 --rank-by hit_rate
+
+History is fetched once and placed in shared memory; worker processes map it
+without copying, so each extra combination costs only the backtest compute.
+"""
+
+import os
+import time
+import logging
+import argparse
+import itertools
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from backtest import KnoxBacktester, align_by_date
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Settings the sweep varies - names match StockAnalyzer.settings(). envelope_percent is
+# not swept: it only moves upper/lower_envelope, which no score or recommendation reads.
+DEFAULT_GRID = {
+    'knox_bars_back': [100, 150, 200],
+    'knox_rsi_period': [5, 7, 9, 14],
+    'knox_momentum_period': [10, 20, 30],
+    'envelope_length': [100, 150, 200],
+}
+PANEL_ARRAYS = ('High', 'Low', 'Close', 'Volume')
+RANK_METRICS = ('avg_return', 'hit_rate', 'win_rate', 'total_return', 'annualized_return', 'max_drawdown')
+
+# Per-worker state created by the pool initializer
+_worker_backtester = None
+_worker_panel = None
+_worker_memory = None
+_worker_fundamentals = None
+
+def parameter_grid(grid):
+    """Every combination of a {setting: [values]} grid as settings dicts"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def _attach_panel(memory_name, shape, dates, symbols):
+    """Panel dict whose price arrays are views into the shared memory block"""
+    memory = shared_memory.SharedMemory(name=memory_name)
+    stacked = np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+    panel = {field: stacked[index] for index, field in enumerate(PANEL_ARRAYS)}
+    panel['symbols'] = symbols
+    panel['dates'] = dates
+    panel['lengths'] = np.sum(~np.isnan(panel['Close']), axis=0)
+    return memory, panel
+
+def _init_worker(memory_name, shape, dates, symbols, fundamental_scores, horizon, allow_short):
+    global _worker_backtester, _worker_panel, _worker_memory, _worker_fundamentals
+    from stock_analyzer import StockAnalyzer
+    _worker_memory, _worker_panel = _attach_panel(memory_name, shape, dates, symbols)
+    _worker_backtester = KnoxBacktester(StockAnalyzer(use_caches=False), horizon, allow_short)
+    _worker_fundamentals = fundamental_scores
+
+def _backtest_in_worker(settings):
+    """Backtest one settings combination on the shared panel - returns settings plus the summary"""
+    try:
+        _worker_backtester.analyzer.apply_settings(settings)
+        summary = _worker_backtester.run_panel(_worker_panel, _worker_fundamentals)['summary']
+    except Exception as e:
+        logger.error(f"Backtest failed for {settings}: {str(e)}")
+        summary = {'trades': 0, 'error': str(e)}
+    return dict(settings, **summary)
+
+class ParameterSweep:
+    """Rank settings combinations by backtested outcome on a process pool
+
+    The aligned price panel lives in one SharedMemory block for the whole
+    sweep; workers are spawned once and attach to it in their initializer.
+    """
+
+    def __init__(self, histories, fundamental_scores=None, horizon=20, allow_short=False, workers=None):
+        self.histories = histories
+        self.fundamental_scores = fundamental_scores
+        self.horizon = horizon
+        self.allow_short = allow_short
+        self.workers = workers or os.cpu_count() or 1
+
+    def run(self, combinations, rank_by='avg_return', min_trades=30, progress=None):
+        """Backtest every settings dict; returns a DataFrame ranked best first
+
+        Combinations with fewer than min_trades trades rank last. progress, if
+        given, is called with (done, total) as results arrive.
+        """
+        panel = align_by_date(self.histories)
+        stacked = np.stack([panel[field] for field in PANEL_ARRAYS])
+        memory = shared_memory.SharedMemory(create=True, size=max(stacked.nbytes, 1))
+        try:
+            np.ndarray(stacked.shape, dtype=np.float64, buffer=memory.buf)[:] = stacked
+            del stacked
+
+            rows = []
+            context = multiprocessing.get_context('spawn')
+            initargs = (
+                memory.name, (len(PANEL_ARRAYS),) + panel['Close'].shape, panel['dates'], panel['symbols'],
+                self.fundamental_scores, self.horizon, self.allow_short
+            )
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(combinations) or 1), mp_context=context,
+                                     initializer=_init_worker, initargs=initargs) as executor:
+                futures = [executor.submit(_backtest_in_worker, settings) for settings in combinations]
+                for done, future in enumerate(as_completed(futures), 1):
+                    rows.append(future.result())
+                    if progress:
+                        progress(done, len(futures))
+        finally:
+            memory.close()
+            memory.unlink()
+
+        results = pd.DataFrame(rows)
+        if results.empty:
+            return results
+        # Higher is better for every metric (max_drawdown is negative, so shallower ranks first)
+        eligible = results['trades'] >= min_trades
+        results = results.assign(_eligible=eligible).sort_values(
+            ['_eligible', rank_by], ascending=[False, False], kind='mergesort'
+        )
+        return results.drop(columns='_eligible').reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid-search Knox settings by backtested outcome")
+    parser.add_argument('--symbols-file', default='input.txt', help="One symbol per line")
+    parser.add_argument('--data-dir', help="Read LocalDirectoryProvider files instead of yfinance")
+    parser.add_argument('--symbols', type=int, help="Use the first N symbols")
+    parser.add_argument('--period', default='5y')
+    parser.add_argument('--horizon', type=int, default=20, help="Holding period in bars")
+    parser.add_argument('--allow-short', action='store_true')
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--rank-by', default='avg_return', choices=RANK_METRICS)
+    parser.add_argument('--min-trades', type=int, default=30, help="Rank combinations with fewer trades last")
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--output', help="Write every combination's results to this CSV")
+    for name, values in DEFAULT_GRID.items():
+        parser.add_argument(f"--{name.replace('knox_', '').replace('_', '-')}", dest=name,
+                            type=int, nargs='+', default=values)
+    args = parser.parse_args()
+
+    from stock_analyzer import StockAnalyzer
+    from data_providers import LocalDirectoryProvider
+
+    if args.data_dir:
+        provider = LocalDirectoryProvider(args.data_dir)
+        symbols = sorted(name.rsplit('.', 1)[0] for name in os.listdir(os.path.join(args.data_dir, 'history')))
+    else:
+        provider = None
+        with open(args.symbols_file) as f:
+            symbols = [line.strip() for line in f if line.strip()]
+    symbols = symbols[:args.symbols] if args.symbols else symbols
+
+    started = time.perf_counter()
+    analyzer = StockAnalyzer(provider=provider, use_caches=False)
+    histories = KnoxBacktester(analyzer).fetch_histories(symbols, args.period)
+    loaded = time.perf_counter()
+
+    combinations = parameter_grid({name: getattr(args, name) for name in DEFAULT_GRID})
+    print(f"Loaded {len(histories)}/{len(symbols)} symbols in {loaded - started:.1f}s; "
+          f"backtesting {len(combinations)} combinations")
+
+    def progress(done, total):
+        if done % 10 == 0 or done == total:
+            print(f"  {done}/{total} combinations ({time.perf_counter() - loaded:.1f}s)", flush=True)
+
+    sweep = ParameterSweep(histories, horizon=args.horizon, allow_short=args.allow_short, workers=args.workers)
+    results = sweep.run(combinations, args.rank_by, args.min_trades, progress)
+    print(f"Sweep finished in {time.perf_counter() - loaded:.1f}s "
+          f"({(time.perf_counter() - loaded) / max(len(combinations), 1):.2f}s per combination)")
+
+    columns = list(DEFAULT_GRID) + ['trades', 'hit_rate', 'win_rate', 'avg_return', 'total_return', 'max_drawdown']
+    with pd.option_context('display.float_format', '{:.3f}'.format, 'display.width', 160, 'display.max_columns', None):
+        print(results[[column for column in columns if column in results]].head(args.top).to_string())
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
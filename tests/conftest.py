@@ -0,0 +1,65 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import synthetic_history
+from data_providers import MarketDataProvider
+
+# yfinance-style info: P/E 20 and P/B 4 at a close of 400
+INFO = {'trailingEps': 20.0, 'bookValue': 100.0, 'returnOnEquity': 0.2, 'profitMargins': 0.12, 'revenueGrowth': 0.05}
+
+class FrameProvider(MarketDataProvider):
+    """In-memory provider over {symbol: history} that counts its calls
+
+    Symbols in missing_from_batch are left out of get_history_batch, as a bulk
+    download that drops some tickers would.
+    """
+
+    cacheable = False
+
+    def __init__(self, histories=None, info=INFO):
+        self.histories = histories or {}
+        self.info = info
+        self.missing_from_batch = set()
+        self.history_calls = []
+        self.info_calls = 0
+
+    def get_history(self, symbol, period=None, start=None):
+        self.history_calls.append(symbol)
+        hist = self.histories.get(symbol)
+        return hist.copy() if hist is not None else pd.DataFrame()
+
+    def get_history_batch(self, symbols, period=None, start=None):
+        frames = {}
+        for symbol in symbols:
+            if symbol not in self.missing_from_batch and symbol in self.histories:
+                frames[symbol] = self.histories[symbol].copy()
+        return frames
+
+    def get_info(self, symbol):
+        self.info_calls += 1
+        return dict(self.info)
+
+@pytest.fixture
+def make_history():
+    """Synthetic cleaned OHLCV history - make_history(bars, seed, end_date='2026-01-02')"""
+    def make(bars, seed, end_date='2026-01-02'):
+        dates = pd.bdate_range(end=end_date, periods=bars)
+        return synthetic_history(np.random.default_rng(seed), dates)
+    return make
+
+@pytest.fixture
+def make_universe(make_history):
+    """{symbol: history} for seeds 0..size-1 - make_universe(size, bars=300)"""
+    def make(size, bars=300):
+        return {f"S{seed}.NS": make_history(bars, seed) for seed in range(size)}
+    return make
+
+@pytest.fixture
+def make_provider():
+    """FrameProvider factory - make_provider(histories=None, info=INFO)"""
+    return FrameProvider
@@ -0,0 +1,35 @@
+import pytest
+from stock_analyzer import StockAnalyzer
+
+@pytest.fixture
+def histories(make_universe):
+    return make_universe(6)
+
+def test_new_bars_match_full_analysis(histories, make_provider):
+    symbols = list(histories)
+    before = {symbol: hist.iloc[:-3] for symbol, hist in histories.items()}
+    analyzer = StockAnalyzer(provider=make_provider(before))
+    analyzer.keep_inputs = True
+    table = analyzer.analyze_stocks(symbols, as_table=True)
+
+    refreshed = analyzer.rescore_table_with_bars(table, histories)
+    expected = StockAnalyzer(provider=make_provider(histories)).analyze_stocks(symbols)
+
+    assert refreshed.run_id == analyzer.last_run_id
+    for row, full in zip(refreshed, expected):
+        assert row['current_price'] == full['current_price']
+        assert row['divergence_signal'] == full['divergence_signal']
+        assert row['technical_score'] == pytest.approx(full['technical_score'], abs=0.01)
+        for name in ('rsi_14', 'knox_rsi', 'momentum', 'envelope_sma'):
+            assert row['technical_data'][name] == pytest.approx(full['technical_data'][name], rel=1e-6)
+
+    # The extended histories are kept one window long, so the refreshed table can be re-analyzed
+    kept = analyzer.last_inputs[symbols[0]][0]
+    assert len(kept) == 297
+    assert kept.index[-1] == histories[symbols[0]].index[-1]
+    assert analyzer.reanalyze_table(refreshed) is not None
+
+def test_foreign_table_is_not_refreshed(histories, make_provider):
+    symbols = list(histories)
+    table = StockAnalyzer(provider=make_provider(histories)).analyze_stocks(symbols, as_table=True)
+    assert StockAnalyzer(provider=make_provider(histories)).rescore_table_with_bars(table, histories) is None
@@ -0,0 +1,56 @@
+import time
+from analysis_cache import AnalysisResultCache, analysis_key
+from analysis_worker import AnalysisWorker
+from stock_analyzer import StockAnalyzer
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_requested_symbols_publish_a_snapshot(make_universe, make_provider):
+    histories = make_universe(4)
+    symbols = list(histories)
+    cache = AnalysisResultCache()
+    worker = AnalysisWorker(lambda: StockAnalyzer(provider=make_provider(histories)), cache=cache, refresh_interval=0)
+    worker.start()
+    try:
+        assert wait_for(lambda: worker.analyzer is not None)
+        settings = worker.analyzer.settings()
+        seen = []
+        worker.request('custom', settings, symbols)
+        assert wait_for(lambda: seen.append(worker.status()['progress']) or worker.snapshot_for(symbols, settings))
+    finally:
+        worker.stop(timeout=10)
+
+    snapshot = worker.snapshot_for(symbols, settings)
+    assert list(snapshot.results.frame['symbol']) == symbols
+    assert cache.get(analysis_key(symbols, settings))[0] is snapshot
+    assert set(snapshot.inputs) == set(symbols)
+    # An unregistered universe is not a "latest" default snapshot
+    assert worker.snapshot('custom') is None
+    assert worker.status()['progress'] is None
+    assert all(done <= total == len(symbols) for done, total in filter(None, seen))
+
+def test_snapshots_are_bounded_by_the_cache(make_universe, make_provider):
+    histories = make_universe(3)
+    symbols = list(histories)
+    worker = AnalysisWorker(
+        lambda: StockAnalyzer(provider=make_provider(histories)), cache=AnalysisResultCache(max_entries=2),
+        refresh_interval=0
+    )
+    worker.start()
+    try:
+        assert wait_for(lambda: worker.analyzer is not None)
+        runs = [dict(worker.analyzer.settings(), envelope_percent=percent) for percent in (10, 12, 14)]
+        for settings in runs:
+            worker.request('custom', settings, symbols)
+        assert wait_for(lambda: worker.snapshot_for(symbols, runs[-1]))
+    finally:
+        worker.stop(timeout=10)
+
+    assert worker.cache.stats()['entries'] == 2
+    assert worker.snapshot_for(symbols, runs[0]) is None
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from backtest import KnoxBacktester, align_by_date
+from stock_analyzer import StockAnalyzer
+
+@pytest.fixture
+def analyzer():
+    return StockAnalyzer(use_caches=False)
+
+def test_signals_match_scalar_analysis_across_session_gaps(analyzer, make_history):
+    histories = {f"SYN{seed}.NS": make_history(320, seed) for seed in range(4)}
+    # Two symbols miss sessions the others traded, one inside the first knox_bars_back bars
+    histories['SYN1.NS'] = histories['SYN1.NS'].drop(histories['SYN1.NS'].index[[150, 240, 241]])
+    histories['SYN3.NS'] = histories['SYN3.NS'].drop(histories['SYN3.NS'].index[[60, 275, 290]])
+
+    panel = align_by_date(histories)
+    columns = KnoxBacktester(analyzer).signals(panel)
+
+    for column, (symbol, hist) in enumerate(histories.items()):
+        for bar in range(analyzer.knox_bars_back, len(hist), 7):
+            row = panel['dates'].get_loc(hist.index[bar])
+            expected = analyzer.analyze_prefetched(symbol, hist.iloc[:bar + 1], 50, {})
+            assert columns['divergence_signal'][row, column] == expected['divergence_signal'], (symbol, bar)
+            assert columns['recommendation'][row, column] == expected['recommendation'], (symbol, bar)
+            assert columns['overall_score'][row, column] == expected['overall_score'], (symbol, bar)
+            assert columns['target_price'][row, column] == pytest.approx(expected['target_price']), (symbol, bar)
+
+def test_dates_a_symbol_did_not_trade_have_no_signal(analyzer, make_history):
+    histories = {'A.NS': make_history(260, 1), 'B.NS': make_history(260, 2)}
+    missing = histories['B.NS'].index[230]
+    histories['B.NS'] = histories['B.NS'].drop(missing)
+
+    panel = align_by_date(histories)
+    columns = KnoxBacktester(analyzer).signals(panel)
+    row = panel['dates'].get_loc(missing)
+    assert columns['recommendation'][row, 1] is None
+    assert np.isnan(columns['target_price'][row, 1])
+    assert columns['recommendation'][row, 0] is not None
+
+def test_trade_exits_after_horizon_bars_of_the_symbol(analyzer, make_history):
+    histories = {'A.NS': make_history(300, 1), 'B.NS': make_history(300, 2)}
+    histories['B.NS'] = histories['B.NS'].drop(histories['B.NS'].index[250])
+
+    trades = KnoxBacktester(analyzer, horizon=5).run(histories)['trades']
+    hist = histories['B.NS']
+    for trade in trades[trades['symbol'] == 'B.NS'].itertuples():
+        entry = hist.index.get_loc(trade.date)
+        assert trade.exit_price == hist['Close'].iloc[entry + 5]
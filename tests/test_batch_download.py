@@ -0,0 +1,52 @@
+import pytest
+from stock_analyzer import StockAnalyzer
+
+def assert_same_results(actual, expected):
+    # Dropped symbols get per-symbol indicators instead of the panel pass - equal to rounding
+    assert [result['symbol'] for result in actual] == [result['symbol'] for result in expected]
+    for result, reference in zip(actual, expected):
+        assert {key: value for key, value in result.items() if key != 'technical_data'} == \
+            {key: value for key, value in reference.items() if key != 'technical_data'}
+        assert result['technical_data'] == pytest.approx(reference['technical_data'], rel=1e-9)
+
+@pytest.fixture
+def histories(make_universe):
+    return make_universe(8)
+
+@pytest.fixture
+def dropped(histories):
+    symbols = list(histories)
+    return {symbols[2], symbols[5]}
+
+def test_only_symbols_dropped_from_the_batch_are_fetched_alone(histories, dropped, make_provider):
+    symbols = list(histories)
+    provider = make_provider(histories)
+    provider.missing_from_batch = dropped
+    analyzer = StockAnalyzer(provider=provider)
+    analyzer.batch_chunk_size = 3
+
+    results = analyzer.analyze_stocks(symbols)
+
+    assert sorted(provider.history_calls) == sorted(dropped)
+    assert_same_results(results, StockAnalyzer(provider=make_provider(histories)).analyze_stocks(symbols))
+
+def test_streaming_run_falls_back_for_dropped_symbols(histories, dropped, make_provider):
+    symbols = list(histories)
+    provider = make_provider(histories)
+    provider.missing_from_batch = dropped
+    analyzer = StockAnalyzer(provider=provider)
+    analyzer.batch_chunk_size = 3
+
+    results = dict(analyzer.iter_analyze(symbols))
+
+    assert sorted(provider.history_calls) == sorted(dropped)
+    assert all(results[symbol] for symbol in symbols)
+
+def test_unknown_symbols_fail_alone(histories, make_provider):
+    symbols = list(histories) + ['GONE.NS']
+    provider = make_provider(histories)
+    results = StockAnalyzer(provider=provider).analyze_stocks(symbols)
+
+    # Retried with the batch, then once on its own; the rest are still analyzed from the batch
+    assert provider.history_calls == ['GONE.NS']
+    assert [result['symbol'] for result in results] == list(histories)
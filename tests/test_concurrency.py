@@ -0,0 +1,109 @@
+import threading
+import time
+import pytest
+import rate_limiter
+from rate_limiter import HostRateLimiter
+from stock_analyzer import StockAnalyzer
+from conftest import FrameProvider
+
+class SlowProvider(FrameProvider):
+    """Per-symbol history calls that finish in reverse input order; broken symbols raise"""
+
+    def __init__(self, histories, broken=()):
+        super().__init__(histories)
+        self.delays = {symbol: 0.02 * index for index, symbol in enumerate(reversed(list(histories)))}
+        self.broken = set(broken)
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get_history(self, symbol, period=None, start=None):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delays.get(symbol, 0))
+            if symbol in self.broken:
+                raise ConnectionError(f"{symbol} timed out")
+            return super().get_history(symbol, period=period, start=start)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def histories(make_universe):
+    return make_universe(8)
+
+def per_symbol_analyzer(provider):
+    analyzer = StockAnalyzer(provider=provider, use_caches=False)
+    analyzer.use_batch_download = False
+    return analyzer
+
+def test_results_keep_input_order_under_concurrency(histories):
+    symbols = list(histories)
+    provider = SlowProvider(histories)
+    results = per_symbol_analyzer(provider).analyze_stocks(symbols, max_workers=8)
+
+    assert provider.max_active > 1
+    assert [result['symbol'] for result in results] == symbols
+    assert results == per_symbol_analyzer(FrameProvider(histories)).analyze_stocks(symbols, max_workers=1)
+
+def test_a_failing_symbol_is_isolated(histories):
+    symbols = list(histories)
+    broken = {symbols[1], symbols[5]}
+    analyzer = per_symbol_analyzer(SlowProvider(histories, broken=broken))
+    analyze_prefetched = analyzer.analyze_prefetched
+
+    def failing_analysis(symbol, *args, **kwargs):
+        if symbol == symbols[3]:
+            raise ValueError("corrupt history")
+        return analyze_prefetched(symbol, *args, **kwargs)
+    analyzer.analyze_prefetched = failing_analysis
+
+    results = analyzer.analyze_stocks(symbols, max_workers=4)
+    expected = [symbol for symbol in symbols if symbol not in broken and symbol != symbols[3]]
+    assert [result['symbol'] for result in results] == expected
+
+def test_token_bucket_paces_each_host(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, 'time', clock)
+    limiter = HostRateLimiter(requests_per_second=10, burst=2)
+
+    granted = []
+    for _ in range(5):
+        limiter.acquire('a.example')
+        granted.append(round(clock.now - 100.0, 9))
+    # The burst goes out at once, then one request every 1/10 s
+    assert granted == [0.0, 0.0, 0.1, 0.2, 0.3]
+
+    # Another host has its own full bucket
+    limiter.acquire('b.example')
+    assert round(clock.now - 100.0, 9) == 0.3
+
+    # Idle time refills the bucket, up to the burst size
+    clock.now += 10
+    sleeps = len(clock.sleeps)
+    for _ in range(3):
+        limiter.acquire('a.example')
+    assert len(clock.sleeps) == sleeps + 1
+    assert clock.sleeps[-1] == pytest.approx(0.1)
+
+def test_zero_rate_never_waits(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, 'time', clock)
+    limiter = HostRateLimiter(requests_per_second=0)
+    for _ in range(100):
+        limiter.acquire('a.example')
+    assert clock.sleeps == []
@@ -0,0 +1,21 @@
+import pytest
+from data_providers import LatencyInjectingProvider, MarketDataProvider
+
+class HistoryOnly(MarketDataProvider):
+    def get_history(self, symbol, period=None, start=None):
+        return None
+
+def test_providers_must_implement_history_and_info():
+    with pytest.raises(TypeError):
+        MarketDataProvider()
+    with pytest.raises(TypeError):
+        HistoryOnly()
+
+def test_latency_provider_is_a_complete_provider():
+    class Complete(HistoryOnly):
+        def get_info(self, symbol):
+            return {}
+
+    provider = LatencyInjectingProvider(Complete(), latency=0)
+    assert provider.get_info('A.NS') == {}
+    assert provider.get_history_batch(['A.NS']) == {}
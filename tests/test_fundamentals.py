@@ -0,0 +1,78 @@
+import time
+import pytest
+from fundamentals_cache import FundamentalsCache, DAY
+from stock_analyzer import StockAnalyzer
+
+@pytest.fixture
+def analyzer(tmp_path, make_provider):
+    analyzer = StockAnalyzer(provider=make_provider())
+    analyzer.fundamentals_cache = FundamentalsCache(path=str(tmp_path / 'fundamentals.json'))
+    return analyzer
+
+def test_ratios_follow_price_without_refetch(analyzer):
+    _, metrics = analyzer.get_fundamental_data('A.NS', price=400.0)
+    assert metrics['pe_ratio'] == pytest.approx(20.0)
+    assert metrics['pb_ratio'] == pytest.approx(4.0)
+
+    # A day later the old P/E TTL would have expired; only the price matters now
+    entry = analyzer.fundamentals_cache._entries['A.NS']
+    for item in entry.values():
+        item['fetched_at'] -= 2 * DAY
+    score, metrics = analyzer.get_fundamental_data('A.NS', price=600.0)
+    assert analyzer.provider.info_calls == 1
+    assert metrics['pe_ratio'] == pytest.approx(30.0)
+    assert score == analyzer.score_fundamentals(metrics)
+
+def test_expired_statement_field_revalidates(analyzer):
+    analyzer.get_fundamental_data('A.NS', price=400.0)
+    analyzer.fundamentals_cache._entries['A.NS']['roe']['fetched_at'] -= 8 * DAY
+    analyzer.get_fundamental_data('A.NS', price=400.0)
+    analyzer.fundamentals_cache._executor.shutdown(wait=True)
+    assert analyzer.provider.info_calls == 2
+
+def test_old_cache_layout_is_revalidated(analyzer):
+    now = time.time()
+    analyzer.fundamentals_cache._entries['A.NS'] = {
+        field: {'value': value, 'fetched_at': now}
+        for field, value in {'pe_ratio': 18.0, 'pb_ratio': 2.0, 'roe': 0.2, 'profit_margin': 0.1, 'revenue_growth': 0.1}.items()
+    }
+    analyzer.get_fundamental_data('A.NS', price=400.0)
+    analyzer.fundamentals_cache._executor.shutdown(wait=True)
+    assert analyzer.provider.info_calls == 1
+    assert 'eps' in analyzer.fundamentals_cache._entries['A.NS']
+
+def test_eps_and_book_value_recovered_from_ratios(analyzer):
+    analyzer.provider.info = {'trailingPE': 25.0, 'priceToBook': 5.0, 'currentPrice': 500.0}
+    fundamentals = analyzer._fetch_fundamental_metrics('A.NS')
+    assert fundamentals['eps'] == pytest.approx(20.0)
+    assert fundamentals['book_value'] == pytest.approx(100.0)
+
+def test_pe_undefined_for_negative_eps(analyzer):
+    metrics = analyzer.valuation_metrics({'eps': -5.0, 'book_value': 50.0}, 100.0)
+    assert metrics['pe_ratio'] is None
+    assert metrics['pb_ratio'] == pytest.approx(2.0)
+
+def test_missing_fields_are_retried_sooner(analyzer):
+    analyzer.provider.info = {key: value for key, value in analyzer.provider.info.items() if key != 'returnOnEquity'}
+    analyzer.get_fundamental_data('A.NS', price=400.0)
+    entry = analyzer.fundamentals_cache._entries['A.NS']
+    assert entry['roe']['value'] is None
+
+    # Well inside the 7-day TTL of the reported fields, but past missing_ttl for roe
+    for item in entry.values():
+        item['fetched_at'] -= analyzer.fundamentals_cache.missing_ttl + 60
+    analyzer.get_fundamental_data('A.NS', price=400.0)
+    analyzer.fundamentals_cache._executor.shutdown(wait=True)
+    assert analyzer.provider.info_calls == 2
+
+def test_empty_response_keeps_cached_fundamentals(analyzer):
+    analyzer.get_fundamental_data('A.NS', price=400.0)
+    analyzer.fundamentals_cache._entries['A.NS']['roe']['fetched_at'] -= 8 * DAY
+    analyzer.provider.info = {}
+    analyzer.get_fundamental_data('A.NS', price=400.0)
+    analyzer.fundamentals_cache._executor.shutdown(wait=True)
+
+    assert analyzer.provider.info_calls == 2
+    entry = analyzer.fundamentals_cache._entries['A.NS']
+    assert entry['eps']['value'] == pytest.approx(20.0)
+    assert entry['roe']['value'] == pytest.approx(0.2)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from ta import add_all_ta_features
+from indicators import TECHNICAL_INDICATORS, FeatureContext, clean_volume, compute_indicators
+from stock_analyzer import StockAnalyzer
+
+# add_all_ta_features' PSAR indexes series by position
+pytestmark = pytest.mark.filterwarnings('ignore::FutureWarning')
+
+def baseline_indicators(hist):
+    """The columns of the add_all_ta_features call calculate_technical_indicators used to make"""
+    frame = hist.copy()
+    frame['Volume'] = clean_volume(frame)
+    frame = add_all_ta_features(frame, open="Open", high="High", low="Low", close="Close", volume="Volume", fillna=True)
+    return {column: frame[column] for column in TECHNICAL_INDICATORS.values()}
+
+# 30 bars is about the shortest history add_all_ta_features accepts; under 50 the
+# analyzer rejects a history, under 26 the slow SMA and MACD are still warming up
+@pytest.mark.parametrize('bars', [30, 50, 60, 120, 300])
+def test_compute_indicators_matches_add_all_ta_features(make_history, bars):
+    hist = make_history(bars, bars)
+    expected = baseline_indicators(hist)
+    context = FeatureContext(hist)
+
+    for indicators in (compute_indicators(hist['Close']), context.indicators()):
+        assert list(indicators) == list(expected)
+        for column, series in expected.items():
+            np.testing.assert_array_equal(indicators[column].to_numpy(), series.to_numpy(), err_msg=column)
+            assert indicators[column].index.equals(series.index), column
+
+@pytest.mark.parametrize('bars', [50, 60, 300])
+def test_technical_data_matches_add_all_ta_features(make_history, bars):
+    hist = make_history(bars, bars + 1)
+    expected = baseline_indicators(hist)
+    technical_data = StockAnalyzer(use_caches=False).calculate_technical_indicators(FeatureContext(hist))
+
+    for key, column in TECHNICAL_INDICATORS.items():
+        assert technical_data[key] == expected[column].iloc[-1], key
+
+def test_unknown_indicator_column_is_rejected(make_history):
+    with pytest.raises(KeyError):
+        compute_indicators(make_history(60, 1)['Close'], columns=['momentum_stoch'])
@@ -0,0 +1,58 @@
+import math
+import numpy as np
+import pytest
+from stock_analyzer import StockAnalyzer
+
+@pytest.fixture
+def analyzer():
+    return StockAnalyzer(use_caches=False)
+
+def assert_same_indicators(panel, reference):
+    assert set(panel) == set(reference)
+    for name, expected in reference.items():
+        value = panel[name]
+        if isinstance(expected, float) and math.isnan(expected):
+            assert math.isnan(value), name
+        elif isinstance(expected, (int, float, np.number)):
+            assert value == pytest.approx(expected, rel=1e-6, abs=1e-9), name
+        else:
+            assert value == expected, name
+
+def test_panel_matches_reference_for_mixed_lengths(analyzer, make_history):
+    # Different lengths and end dates, so the panel has leading and trailing gaps
+    raw = {
+        'SHORT.NS': make_history(60, 1),
+        'MID.NS': make_history(150, 2, end_date='2025-12-15'),
+        'LONG.NS': make_history(300, 3),
+        'EXACT.NS': make_history(200, 4, end_date='2025-11-28'),
+    }
+    histories = {symbol: analyzer._prepare_history(symbol, hist) for symbol, hist in raw.items()}
+    panel = analyzer.calculate_technical_indicators_panel(histories)
+
+    assert set(panel) == set(histories)
+    for symbol, hist in histories.items():
+        assert_same_indicators(panel[symbol], analyzer.calculate_technical_indicators(hist))
+
+def test_panel_matches_reference_without_volume(analyzer, make_history):
+    no_volume = make_history(250, 5).drop(columns=['Volume'])
+    gappy_volume = make_history(250, 6)
+    gappy_volume.iloc[::7, gappy_volume.columns.get_loc('Volume')] = np.nan
+    histories = {
+        'NOVOL.NS': analyzer._prepare_history('NOVOL.NS', no_volume),
+        'GAPPY.NS': analyzer._prepare_history('GAPPY.NS', gappy_volume),
+    }
+    panel = analyzer.calculate_technical_indicators_panel(histories)
+
+    for symbol, hist in histories.items():
+        assert_same_indicators(panel[symbol], analyzer.calculate_technical_indicators(hist))
+
+def test_batch_histories_are_cleaned_once(make_history, make_universe, make_provider):
+    histories = make_universe(5)
+    histories['TINY.NS'] = make_history(30, 9)
+    analyzer = StockAnalyzer(provider=make_provider(histories))
+    analyzer.profiler.enabled = True
+
+    results = analyzer.analyze_stocks(list(histories))
+
+    assert [result['symbol'] for result in results] == [f"S{seed}.NS" for seed in range(5)]
+    assert analyzer.profiler.summary()['stages']['clean']['count'] == len(histories)
@@ -0,0 +1,73 @@
+import threading
+import pytest
+from stock_analyzer import StockAnalyzer
+from conftest import FrameProvider
+
+class GatedProvider(FrameProvider):
+    """Holds back any batch that includes the gated symbol until the gate opens"""
+
+    def __init__(self, histories, gated_symbol):
+        super().__init__(histories)
+        self.gated_symbol = gated_symbol
+        self.gate = threading.Event()
+        self.gate_opened_in_time = None
+        self.batches = []
+
+    def get_history_batch(self, symbols, period=None, start=None):
+        self.batches.append(list(symbols))
+        if self.gated_symbol in symbols:
+            self.gate_opened_in_time = self.gate.wait(timeout=20)
+        return super().get_history_batch(symbols, period=period, start=start)
+
+@pytest.fixture
+def pool_analyzer():
+    def make(provider):
+        analyzer = StockAnalyzer(provider=provider)
+        analyzer.use_process_pool = True
+        analyzer.process_workers = 2
+        analyzer.batch_chunk_size = 4
+        return analyzer
+    return make
+
+def test_first_results_arrive_before_the_last_chunk_downloads(make_universe, pool_analyzer):
+    histories = make_universe(10)
+    symbols = list(histories)
+    provider = GatedProvider(histories, symbols[-1])
+    analyzer = pool_analyzer(provider)
+
+    results = {}
+    for symbol, result in analyzer.iter_analyze(symbols):
+        provider.gate.set()
+        results[symbol] = result
+
+    assert provider.gate_opened_in_time
+    assert provider.batches == [symbols[0:4], symbols[4:8], symbols[8:10]]
+    # The pool scores each symbol with the per-symbol indicators, not the panel
+    threaded = StockAnalyzer(provider=FrameProvider(histories))
+    threaded.use_panel_indicators = False
+    expected = threaded.analyze_stocks(symbols)
+    assert [results[result['symbol']] for result in expected] == expected
+
+def test_threaded_chunks_wait_for_analysis(make_universe):
+    histories = make_universe(6)
+    symbols = list(histories)
+    provider = GatedProvider(histories, None)
+    analyzer = StockAnalyzer(provider=provider)
+    analyzer.batch_chunk_size = 2
+    analyze_prefetched = analyzer.analyze_prefetched
+
+    def held_analysis(symbol, *args, **kwargs):
+        if symbol == symbols[0]:
+            provider.gate.wait(timeout=20)
+        return analyze_prefetched(symbol, *args, **kwargs)
+    analyzer.analyze_prefetched = held_analysis
+
+    stream = analyzer.iter_analyze(symbols)
+    first = [next(stream) for _ in range(3)]
+    # The first chunk is still being analyzed, so only one chunk beyond it is downloaded
+    assert provider.batches == [symbols[0:2], symbols[2:4]]
+    provider.gate.set()
+    results = first + list(stream)
+
+    assert provider.batches == [symbols[0:2], symbols[2:4], symbols[4:6]]
+    assert sorted(symbol for symbol, result in results if result) == sorted(symbols)
@@ -0,0 +1,37 @@
+import os
+from datetime import datetime
+import pandas as pd
+import pytz
+from price_cache import PriceCache
+
+IST = pytz.timezone('Asia/Kolkata')
+
+def bars(closes, dates):
+    closes = pd.Series(closes, index=pd.DatetimeIndex(dates), dtype=float)
+    return pd.DataFrame({'Open': closes, 'High': closes, 'Low': closes, 'Close': closes, 'Volume': 1000.0})
+
+def written(cache, symbol, local_time):
+    stamp = IST.localize(local_time).timestamp()
+    os.utime(cache.path(symbol), (stamp, stamp))
+
+def test_intraday_bar_is_not_an_adjustment(tmp_path):
+    cache = PriceCache(cache_dir=str(tmp_path))
+    # Cached at 11:00 on Wednesday - Wednesday's close is an intraday price
+    cache.merge('A.NS', None, bars([100, 101, 150], ['2026-01-05', '2026-01-06', '2026-01-07']))
+    written(cache, 'A.NS', datetime(2026, 1, 7, 11, 0))
+    cached = cache.load('A.NS')
+
+    assert cache.refresh_start(cached, 'A.NS') == datetime(2026, 1, 6).date()
+    new_bars = bars([101, 104, 105], ['2026-01-06', '2026-01-07', '2026-01-08'])
+    merged = cache.merge('A.NS', cached, new_bars)
+    assert merged is not None
+    assert list(merged['Close']) == [100, 101, 104, 105]
+
+def test_adjusted_final_close_still_triggers_refetch(tmp_path):
+    cache = PriceCache(cache_dir=str(tmp_path))
+    cache.merge('A.NS', None, bars([100, 101], ['2026-01-05', '2026-01-06']))
+    written(cache, 'A.NS', datetime(2026, 1, 6, 18, 0))
+    cached = cache.load('A.NS')
+
+    assert cache.refresh_start(cached, 'A.NS') == datetime(2026, 1, 6).date()
+    assert cache.merge('A.NS', cached, bars([50.5, 52], ['2026-01-06', '2026-01-07'])) is None
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from stock_analyzer import StockAnalyzer
+
+NEW_SETTINGS = {
+    'knox_rsi_period': 9, 'knox_momentum_period': 14, 'envelope_length': 150, 'envelope_percent': 10,
+    'divergence_weight': 0.5, 'fundamental_weight': 0.3, 'technical_weight': 0.2,
+}
+
+@pytest.fixture
+def histories(make_universe, make_history):
+    histories = make_universe(30)
+    # Shorter than knox_bars_back and envelope_length - divergence gating and NaN envelopes
+    histories['SHORT.NS'] = make_history(120, 99)
+    return histories
+
+def assert_tables_equal(actual, expected):
+    assert list(actual.frame['symbol']) == list(expected.frame['symbol'])
+    for column in expected.frame.columns:
+        left, right = actual.frame[column].to_numpy(), expected.frame[column].to_numpy()
+        if left.dtype.kind == 'f' or right.dtype.kind == 'f':
+            np.testing.assert_allclose(left.astype(float), right.astype(float), rtol=1e-9, equal_nan=True, err_msg=column)
+        else:
+            assert list(left) == list(right), column
+
+def test_reanalyze_matches_a_full_run(histories, make_provider):
+    symbols = list(histories)
+    analyzer = StockAnalyzer(provider=make_provider(histories))
+    analyzer.keep_inputs = True
+    table = analyzer.analyze_stocks(symbols, as_table=True)
+
+    analyzer.apply_settings(dict(analyzer.settings(), **NEW_SETTINGS))
+    rescored = analyzer.reanalyze_table(table)
+
+    fresh = StockAnalyzer(provider=make_provider(histories))
+    fresh.apply_settings(analyzer.settings())
+    assert_tables_equal(rescored, fresh.analyze_stocks(symbols, as_table=True))
+
+def test_adopted_inputs_reanalyze_on_another_analyzer(histories, make_provider):
+    # The dashboard's pattern: the worker runs, the session re-scores its snapshot
+    symbols = list(histories)
+    worker = StockAnalyzer(provider=make_provider(histories))
+    worker.keep_inputs = True
+    table = worker.analyze_stocks(symbols, as_table=True)
+
+    session = StockAnalyzer(provider=make_provider())
+    assert session.reanalyze_table(table) is None
+    session.adopt_inputs(table.run_id, worker.last_inputs)
+    session.apply_settings(dict(session.settings(), **NEW_SETTINGS))
+    rescored = session.reanalyze_table(table)
+
+    assert session.provider.history_calls == []
+    fresh = StockAnalyzer(provider=make_provider(histories))
+    fresh.apply_settings(session.settings())
+    assert_tables_equal(rescored, fresh.analyze_stocks(symbols, as_table=True))
+
+def test_inputs_are_only_kept_on_request(histories, make_provider):
+    symbols = list(histories)
+    analyzer = StockAnalyzer(provider=make_provider(histories))
+    table = analyzer.analyze_stocks(symbols, as_table=True)
+    assert analyzer.last_inputs == {}
+    assert analyzer.reanalyze_table(table) is None
+
+    analyzer.keep_inputs = True
+    analyzer.analyze_stocks(symbols, as_table=True)
+    hist, _, _ = analyzer.last_inputs[symbols[0]]
+    assert list(hist.columns) == ['High', 'Low', 'Close', 'Volume']
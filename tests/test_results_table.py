@@ -0,0 +1,30 @@
+import math
+from results_table import INTEGER_COLUMNS, ResultsTable
+from stock_analyzer import StockAnalyzer
+
+def test_rows_match_the_result_dicts(make_universe, make_provider):
+    histories = make_universe(6)
+    analyzer = StockAnalyzer(provider=make_provider(histories))
+    analyzer.keep_inputs = True
+    results = analyzer.analyze_stocks(list(histories))
+    table = ResultsTable.from_results(results, analyzer.last_run_id)
+
+    assert table.to_records() == results
+    for column in INTEGER_COLUMNS:
+        assert table.frame[column].dtype == 'int64', column
+        assert all(type(row[column]) is int for row in table), column
+
+    # Re-scored and re-analyzed tables keep the integer columns
+    analyzer.knox_rsi_period = 9
+    for derived in (analyzer.reweight_table(table, 0.5, 0.3, 0.2), analyzer.reanalyze_table(table)):
+        for column in INTEGER_COLUMNS:
+            assert all(type(row[column]) is int for row in derived), column
+
+def test_missing_scores_stay_nan():
+    table = ResultsTable.from_results([
+        {'symbol': 'A.NS', 'technical_score': 60, 'fundamental_score': 70},
+        {'symbol': 'B.NS', 'technical_score': 55},
+    ])
+    assert table[0]['technical_score'] == 60
+    assert table.frame['fundamental_score'].dtype == 'float64'
+    assert math.isnan(table[1]['fundamental_score'])
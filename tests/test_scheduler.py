@@ -0,0 +1,82 @@
+import threading
+import time
+from datetime import datetime
+import pytz
+from scheduler import JobScheduler, ScheduledJob, WEEKDAYS
+
+IST = pytz.timezone('Asia/Kolkata')
+
+def ist(*args):
+    return IST.localize(datetime(*args))
+
+class ClockScheduler(JobScheduler):
+    """JobScheduler whose wall clock is set by the test"""
+
+    def __init__(self, moment):
+        super().__init__(IST)
+        self.moment = moment
+
+    def now(self):
+        return self.moment
+
+def test_next_run_crosses_the_ist_day_boundary():
+    job = ScheduledJob('alerts', '00:00:30', None)
+    assert job.next_after(ist(2026, 1, 5, 23, 59, 59), IST) == ist(2026, 1, 6, 0, 0, 30)
+    # Exactly on time is not "after" - the next run is a day later
+    assert job.next_after(ist(2026, 1, 6, 0, 0, 30), IST) == ist(2026, 1, 7, 0, 0, 30)
+
+    # 18:30 UTC on the 5th is already the 6th in IST
+    morning = ScheduledJob('alerts', '09:00', None)
+    assert morning.next_after(pytz.utc.localize(datetime(2026, 1, 5, 18, 30)), IST) == ist(2026, 1, 6, 9, 0)
+
+def test_weekday_jobs_skip_the_weekend():
+    job = ScheduledJob('alerts', '15:45', None, days=WEEKDAYS)
+    # 2026-01-09 is a Friday
+    assert job.next_after(ist(2026, 1, 9, 15, 0), IST) == ist(2026, 1, 9, 15, 45)
+    assert job.next_after(ist(2026, 1, 9, 16, 0), IST) == ist(2026, 1, 12, 15, 45)
+    assert job.next_after(ist(2026, 1, 10, 12, 0), IST) == ist(2026, 1, 12, 15, 45)
+    assert job.next_after(ist(2026, 1, 11, 23, 59), IST) == ist(2026, 1, 12, 15, 45)
+
+def test_stop_wakes_a_waiting_thread():
+    scheduler = JobScheduler()
+    scheduler.add_job('later', scheduler.now().strftime('%H:%M:%S'), lambda: None)
+    scheduler.start()
+    assert scheduler.is_running()
+
+    started = time.monotonic()
+    scheduler.stop(timeout=5)
+    assert not scheduler.is_running()
+    assert time.monotonic() - started < 1
+
+def test_restart_while_a_job_finishes_runs_one_thread():
+    scheduler = ClockScheduler(ist(2026, 1, 5, 9, 0, 0))
+    release = threading.Event()
+    runs = []
+
+    def job():
+        runs.append(threading.current_thread())
+        release.wait(timeout=20)
+    scheduler.add_job('slow', '09:00:01', job)
+    scheduler.moment = ist(2026, 1, 5, 9, 0, 1)
+    scheduler.start()
+    old_thread = scheduler._thread
+    for _ in range(200):
+        if runs:
+            break
+        time.sleep(0.01)
+    assert runs == [old_thread]
+
+    # stop() gives up while the job is still running; start() must not revive the old thread
+    scheduler.stop(timeout=0.05)
+    assert old_thread.is_alive()
+    scheduler.start()
+    assert scheduler._thread is not old_thread
+
+    release.set()
+    old_thread.join(timeout=5)
+    assert not old_thread.is_alive()
+    assert scheduler.is_running()
+    assert runs == [old_thread]
+
+    scheduler.stop(timeout=5)
+    assert not scheduler.is_running()
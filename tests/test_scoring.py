@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from scoring import FUNDAMENTAL_METRICS, TECHNICAL_DEFAULTS, score_universe
+from stock_analyzer import StockAnalyzer
+
+SIGNALS = ["STRONG_BULLISH", "BULLISH", "HIDDEN_BULLISH", "NEUTRAL", "BEARISH", "HIDDEN_BEARISH", "STRONG_BEARISH"]
+
+@pytest.fixture
+def analyzer():
+    return StockAnalyzer(use_caches=False)
+
+def fuzz_rows(rng, size):
+    """Rows as the scalar path sees them - metrics may be None, 0 or NaN"""
+    def metric(low, high):
+        pick = rng.integers(0, 6)
+        return (None, 0, float('nan'))[pick] if pick < 3 else float(rng.uniform(low, high))
+
+    def indicator(low, high):
+        return float('nan') if rng.random() < 0.05 else float(rng.uniform(low, high))
+
+    rows = []
+    for _ in range(size):
+        price = np.float64(rng.integers(1000, 500000) / 1000)  # 3 decimals, so targets land near .xx5
+        rows.append({
+            'current_price': price,
+            'divergence_signal': SIGNALS[rng.integers(len(SIGNALS))],
+            'divergence_score': int(rng.integers(15, 86)),
+            'technical_data': {
+                'rsi_14': indicator(0, 100),
+                'macd': indicator(-5, 5),
+                'macd_signal': indicator(-5, 5),
+                'sma_20': indicator(90, 110),
+                'sma_50': indicator(90, 110),
+                'volume_trend': indicator(0.5, 1.5),
+                'envelope_sma': float(price * rng.uniform(0.8, 1.2)),
+            },
+            'fundamental_metrics': {
+                'pe_ratio': metric(0, 60), 'pb_ratio': metric(0, 8), 'roe': metric(-0.2, 0.4),
+                'profit_margin': metric(-0.2, 0.3), 'revenue_growth': metric(-0.2, 0.4),
+            },
+        })
+    return rows
+
+def columns_for(rows, technical_keys):
+    columns = {
+        'current_price': np.array([row['current_price'] for row in rows]),
+        'divergence_signal': np.array([row['divergence_signal'] for row in rows], dtype=object),
+        'divergence_score': np.array([row['divergence_score'] for row in rows]),
+        'envelope_sma': np.array([row['technical_data']['envelope_sma'] for row in rows]),
+    }
+    for key in technical_keys:
+        columns[key] = np.array([row['technical_data'][key] for row in rows])
+    for name in FUNDAMENTAL_METRICS:
+        columns[name] = np.array([
+            np.nan if row['fundamental_metrics'][name] is None else row['fundamental_metrics'][name] for row in rows
+        ])
+    return columns
+
+def assert_matches_scalar(analyzer, rows, scores, weights):
+    analyzer.divergence_weight, analyzer.fundamental_weight, analyzer.technical_weight = weights
+    for index, row in enumerate(rows):
+        technical_score = analyzer.calculate_technical_score(row['technical_data'])
+        fundamental_score = analyzer.score_fundamentals(row['fundamental_metrics'])
+        expected = analyzer.calculate_recommendation(
+            technical_score, fundamental_score, row['divergence_signal'], row['divergence_score'],
+            row['current_price'], row['technical_data']
+        )
+        actual = (
+            scores['recommendation'][index], scores['overall_score'][index],
+            scores['target_price'][index], scores['confidence'][index],
+        )
+        assert scores['technical_score'][index] == technical_score, index
+        assert scores['fundamental_score'][index] == fundamental_score, index
+        assert actual == expected, (index, row)
+
+@pytest.mark.parametrize('weights', [(0.60, 0.30, 0.10), (0.50, 0.25, 0.25), (0.35, 0.45, 0.20)])
+def test_vectorized_scoring_matches_scalar(analyzer, weights):
+    rows = fuzz_rows(np.random.default_rng(7), 3000)
+    scores = score_universe(columns_for(rows, TECHNICAL_DEFAULTS), weights)
+    assert_matches_scalar(analyzer, rows, scores, weights)
+
+def test_missing_technical_keys_use_scalar_defaults(analyzer):
+    rows = fuzz_rows(np.random.default_rng(11), 500)
+    for row in rows:
+        for key in ('macd', 'macd_signal', 'volume_trend'):
+            del row['technical_data'][key]
+    scores = score_universe(columns_for(rows, ('rsi_14', 'sma_20', 'sma_50')), (0.60, 0.30, 0.10))
+    assert_matches_scalar(analyzer, rows, scores, (0.60, 0.30, 0.10))
+
+def test_rounding_ties_follow_python_round(analyzer):
+    # Integer scores with quarter weights give exact .x5 ties (e.g. 61.25) in binary
+    weights = (0.50, 0.25, 0.25)
+    rows = fuzz_rows(np.random.default_rng(3), 2000)
+    scores = score_universe(columns_for(rows, TECHNICAL_DEFAULTS), weights)
+    unrounded = (
+        np.array([row['divergence_score'] for row in rows]) * 0.50 +
+        scores['fundamental_score'] * 0.25 + scores['technical_score'] * 0.25
+    )
+    assert np.count_nonzero((unrounded * 10) % 1 == 0.5) > 100
+    assert_matches_scalar(analyzer, rows, scores, weights)
+
+def test_rescore_table_reproduces_full_run(make_universe, make_provider):
+    histories = make_universe(40)
+    analyzer = StockAnalyzer(provider=make_provider(histories))
+    table = analyzer.analyze_stocks(list(histories), as_table=True)
+
+    closes = np.array([histories[symbol]['Close'].iloc[-1] for symbol in table.frame['symbol']])
+    rescored = analyzer.rescore_table(table, closes)
+    for column in ('recommendation', 'overall_score', 'target_price', 'confidence', 'potential_return'):
+        assert list(rescored.frame[column]) == list(table.frame[column]), column
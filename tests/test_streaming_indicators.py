@@ -0,0 +1,46 @@
+import json
+import pytest
+from stock_analyzer import StockAnalyzer
+from streaming_indicators import IndicatorStream
+
+NEW_BARS = 5
+
+@pytest.fixture
+def analyzer():
+    return StockAnalyzer(use_caches=False)
+
+@pytest.fixture
+def hist(analyzer, make_history):
+    return analyzer._prepare_history('A.NS', make_history(300, 11))
+
+def assert_same_result(actual, expected):
+    assert set(actual) == set(expected)
+    for key, value in expected.items():
+        if key == 'technical_data':
+            assert set(actual[key]) == set(value)
+            for name, indicator in value.items():
+                assert actual[key][name] == pytest.approx(indicator, rel=1e-9), name
+        else:
+            assert actual[key] == value, key
+
+def test_bars_applied_one_at_a_time_match_a_full_recompute(analyzer, hist):
+    stream = analyzer.create_indicator_stream(hist.iloc[:-NEW_BARS])
+    result = analyzer.analyze_prefetched('A.NS', hist.iloc[:-NEW_BARS], 60, {'roe': 0.2})
+
+    for end in range(len(hist) - NEW_BARS + 1, len(hist) + 1):
+        result = analyzer.rescore_with_bar(result, stream, hist.iloc[end - 1].to_dict())
+        # Every intermediate result, not just the last, equals re-analyzing the extended history
+        assert_same_result(result, analyzer.analyze_prefetched('A.NS', hist.iloc[:end], 60, {'roe': 0.2}))
+    assert stream.bars == len(hist)
+
+def test_restored_stream_continues_like_the_original(analyzer, hist):
+    stream = analyzer.create_indicator_stream(hist.iloc[:-NEW_BARS])
+    restored = IndicatorStream.from_dict(json.loads(json.dumps(stream.to_dict())))
+    assert restored.to_dict() == stream.to_dict()
+
+    for bar in hist.iloc[-NEW_BARS:].to_dict('records'):
+        stream.update(bar['Close'], bar['High'], bar['Low'], bar['Volume'])
+        restored.update(bar['Close'], bar['High'], bar['Low'], bar['Volume'])
+    assert restored.technical_data() == stream.technical_data()
+    assert restored.divergence_inputs() == stream.divergence_inputs()
+    assert restored.bars == stream.bars